@@ -0,0 +1,326 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from emotion_engine import BroadcastEvent, GameEvent, SimulatedClock, VillageEmotionEngine, VillagerEmotionSystem
+from forecast import Forecaster
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+# Opt-in with --huge: several GB of RAM and minutes per benchmark
+HUGE_SIZE = 1000000
+
+# Villagers per square block used to lay out benchmark villages (about 4 per chunk)
+VILLAGE_DENSITY = 4 / 256
+
+# Simulated seconds between consecutive benchmark events
+EVENT_INTERVAL = 0.05
+
+BENCH_EVENTS = [
+    GameEvent('player_gift', 'bench_player_1', 0.8),
+    GameEvent('player_trade', 'bench_player_2', 0.5),
+    GameEvent('player_attack', 'bench_player_3', 0.6),
+    GameEvent('monster_nearby', '', 0.7),
+    GameEvent('village_celebration', '', 0.6),
+    GameEvent('night_time', '', 0.3)
+]
+
+def _best_of(repeats: int, run: Callable[[], None]) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def build_engine(size: int, seed: int, clock: SimulatedClock) -> VillageEmotionEngine:
+    """A seeded village of ``size`` villagers spread at VILLAGE_DENSITY"""
+    rng = np.random.default_rng(seed)
+    engine = VillageEmotionEngine(capacity=size, clock=clock, rng=rng)
+    side = np.sqrt(size / VILLAGE_DENSITY)
+    positions = np.column_stack([
+        rng.uniform(0, side, size),
+        np.full(size, 64.0),
+        rng.uniform(0, side, size)
+    ])
+    engine.add_villagers([f'villager_{i}' for i in range(size)], positions=positions)
+    return engine
+
+def bench_engine_events(size: int, seed: int, repeats: int) -> Dict:
+    """Vectorized VillageEmotionEngine.apply_event over the whole village"""
+    clock = SimulatedClock()
+    engine = build_engine(size, seed, clock)
+
+    def run():
+        for event in BENCH_EVENTS:
+            clock.advance(EVENT_INTERVAL)
+            engine.apply_event(event)
+
+    seconds = _best_of(repeats, run)
+    return {
+        'seconds_per_event': seconds / len(BENCH_EVENTS),
+        'villager_events_per_second': size * len(BENCH_EVENTS) / seconds
+    }
+
+def bench_broadcast(size: int, seed: int, repeats: int, radius: float = 64.0) -> Dict:
+    """VillageEmotionEngine.broadcast of a raid with distance falloff around the middle of the village"""
+    clock = SimulatedClock()
+    engine = build_engine(size, seed, clock)
+    middle = np.sqrt(size / VILLAGE_DENSITY) / 2
+    raid = BroadcastEvent('monster_nearby', 0.8, (middle, 64.0, middle), radius)
+    reached = len(engine.broadcast(raid))
+    
+    def run():
+        clock.advance(EVENT_INTERVAL)
+        engine.broadcast(raid)
+    
+    seconds = _best_of(repeats, run)
+    return {'seconds_per_broadcast': seconds, 'villagers_reached': reached}
+
+def bench_parallel_events(size: int, seed: int, repeats: int, threads: int = 4) -> Dict:
+    """apply_event_batch on disjoint village partitions from a thread pool, against the same work serially"""
+    clock = SimulatedClock()
+    engine = build_engine(size, seed, clock)
+    # Contiguous partitions, so each thread mostly holds its own row lock stripes
+    partitions = np.array_split(np.arange(size), threads)
+    
+    def apply(rows):
+        for event in BENCH_EVENTS:
+            engine.apply_event_batch(event.event_type, event.player_id, rows, event.intensity)
+    
+    def serial():
+        clock.advance(EVENT_INTERVAL)
+        for rows in partitions:
+            apply(rows)
+    
+    with ThreadPoolExecutor(threads) as pool:
+        def parallel():
+            clock.advance(EVENT_INTERVAL)
+            list(pool.map(apply, partitions))
+        
+        serial_seconds = _best_of(repeats, serial)
+        seconds = _best_of(repeats, parallel)
+    return {
+        'villager_events_per_second': size * len(BENCH_EVENTS) / seconds,
+        'speedup': serial_seconds / seconds
+    }
+
+def bench_process_game_event(size: int, seed: int, repeats: int) -> Dict:
+    """Per-villager VillagerEmotionSystem.process_game_event calls"""
+    clock = SimulatedClock()
+    rng = np.random.default_rng(seed)
+    villagers = [VillagerEmotionSystem(f'villager_{i}', clock=clock, rng=rng) for i in range(size)]
+
+    def run():
+        for event in BENCH_EVENTS:
+            clock.advance(EVENT_INTERVAL)
+            for villager in villagers:
+                villager.process_game_event(event)
+
+    seconds = _best_of(repeats, run)
+    return {'events_per_second': size * len(BENCH_EVENTS) / seconds}
+
+def bench_contagion(size: int, seed: int, repeats: int) -> Dict:
+    """Latency of one VillageEmotionEngine.contagion_tick"""
+    clock = SimulatedClock()
+    engine = build_engine(size, seed, clock)
+    engine.apply_event(GameEvent('monster_nearby', '', 0.7), np.arange(0, size, 3))
+
+    def run():
+        clock.advance(EVENT_INTERVAL)
+        engine.contagion_tick()
+
+    return {'tick_seconds': _best_of(repeats, run)}
+
+def bench_forecast(size: int, seed: int, repeats: int, scenarios: int = 8, villagers: int = 10000,
+                   horizon: float = 60.0) -> Dict:
+    """Forecaster.run over up to ``villagers`` rows: ``scenarios`` event sequences rolled forward with contagion"""
+    clock = SimulatedClock()
+    engine = build_engine(size, seed, clock)
+    forecaster = Forecaster.from_engine(engine, np.arange(min(size, villagers)))
+    candidates = [[(5.0 * (i + j), BENCH_EVENTS[(i + j) % len(BENCH_EVENTS)]) for j in range(6)]
+                  for i in range(scenarios)]
+    seconds = _best_of(repeats, lambda: forecaster.run(candidates, horizon))
+    return {
+        'seconds_per_forecast': seconds,
+        'villager_scenario_seconds_per_second': len(forecaster) * scenarios * horizon / seconds
+    }
+
+def bench_dialogue(size: int, seed: int, repeats: int, calls: int = 2000) -> Dict:
+    """generate_dialogue throughput on engine-backed villagers"""
+    clock = SimulatedClock()
+    engine = build_engine(size, seed, clock)
+    engine.apply_event(GameEvent('player_gift', 'bench_player_1', 0.8), np.arange(0, size, 2))
+    rows = np.random.default_rng(seed).integers(0, size, calls)
+    ids = engine.villager_ids
+    villagers = [engine.villager(ids[row]) for row in rows.tolist()]
+
+    def run():
+        for villager in villagers:
+            villager.generate_dialogue('bench_player_1')
+
+    return {'dialogues_per_second': calls / _best_of(repeats, run)}
+
+def bench_dialogue_many(size: int, seed: int, repeats: int, calls: int = 2000) -> Dict:
+    """Batched VillageEmotionEngine.generate_dialogue_many throughput"""
+    clock = SimulatedClock()
+    engine = build_engine(size, seed, clock)
+    engine.apply_event(GameEvent('player_gift', 'bench_player_1', 0.8), np.arange(0, size, 2))
+    rows = np.random.default_rng(seed).integers(0, size, calls)
+    ids = engine.villager_ids
+    villager_ids = [ids[row] for row in rows.tolist()]
+
+    def run():
+        engine.generate_dialogue_many(villager_ids, 'bench_player_1')
+
+    return {'dialogues_per_second': calls / _best_of(repeats, run)}
+
+def bench_memory(size: int, seed: int) -> Dict:
+    """Traced bytes per villager for an engine-backed village after a player interaction"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    clock = SimulatedClock()
+    engine = build_engine(size, seed, clock)
+    engine.apply_event(GameEvent('player_gift', 'bench_player_1', 0.8))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del engine
+    return {
+        'bytes_per_villager': (current - baseline) / size,
+        'peak_bytes_per_villager': (peak - baseline) / size
+    }
+
+def bench_object_memory(size: int, seed: int, events: int = 300) -> Dict:
+    """Traced bytes per standalone VillagerEmotionSystem, and transient bytes per process_game_event"""
+    clock = SimulatedClock()
+    rng = np.random.default_rng(seed)
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    villagers = [VillagerEmotionSystem(f'villager_{i}', clock=clock, rng=rng) for i in range(size)]
+    built = tracemalloc.get_traced_memory()[0]
+
+    # Warm up one villager so its lazily allocated memory ring is not counted per event
+    villager = villagers[0]
+    for event in BENCH_EVENTS:
+        villager.process_game_event(event)
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    peak_above = 0
+    for i in range(events):
+        clock.advance(EVENT_INTERVAL)
+        villager.process_game_event(BENCH_EVENTS[i % len(BENCH_EVENTS)])
+        current, peak = tracemalloc.get_traced_memory()
+        peak_above += peak - current
+        tracemalloc.reset_peak()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del villagers
+    return {
+        'bytes_per_villager': (built - baseline) / size,
+        'transient_bytes_per_event': peak_above / events,
+        'retained_bytes_per_event': (after - before) / events
+    }
+
+def run_benchmarks(sizes: List[int], seed: int = 0, repeats: int = 3, object_limit: int = 10000,
+                   log: Optional[Callable[[str], None]] = None) -> Dict:
+    """Run every benchmark for every village size and return a JSON-ready report.
+
+    Per-object benchmarks (``process_game_event`` and the memory footprint
+    of standalone villagers) are skipped above ``object_limit`` villagers.
+    """
+    results = []
+    for size in sizes:
+        benchmarks = {
+            'engine_apply_event': lambda: bench_engine_events(size, seed, repeats),
+            'parallel_events': lambda: bench_parallel_events(size, seed, repeats),
+            'broadcast': lambda: bench_broadcast(size, seed, repeats),
+            'process_game_event': lambda: bench_process_game_event(size, seed, repeats) if size <= object_limit else None,
+            'object_memory': lambda: bench_object_memory(size, seed) if size <= object_limit else None,
+            'contagion_tick': lambda: bench_contagion(size, seed, repeats),
+            'forecast': lambda: bench_forecast(size, seed, repeats),
+            'dialogue': lambda: bench_dialogue(size, seed, repeats),
+            'dialogue_many': lambda: bench_dialogue_many(size, seed, repeats),
+            'memory': lambda: bench_memory(size, seed)
+        }
+        for name, bench in benchmarks.items():
+            metrics = bench()
+            if metrics is None:
+                continue
+            results.append({'benchmark': name, 'villagers': size, **metrics})
+            if log is not None:
+                log(f"{name:>20} n={size:<8} " + ' '.join(f"{key}={value:.4g}" for key, value in metrics.items()))
+
+    return {
+        'schema': 1,
+        'created': time.time(),
+        'seed': seed,
+        'repeats': repeats,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'results': results
+    }
+
+# Metrics where a larger value is better; every other metric is a cost
+HIGHER_IS_BETTER = {'villager_events_per_second', 'events_per_second', 'dialogues_per_second', 'speedup',
+                    'villager_scenario_seconds_per_second'}
+
+# Workload descriptions reported alongside the timings, neither costs nor gains
+NOT_COMPARED = {'benchmark', 'villagers', 'villagers_reached'}
+
+def compare(report: Dict, baseline: Dict, tolerance: float = 0.2) -> List[str]:
+    """Regressions of ``report`` against ``baseline`` larger than ``tolerance`` (a fraction)"""
+    previous = {(entry['benchmark'], entry['villagers']): entry for entry in baseline['results']}
+    regressions = []
+    for entry in report['results']:
+        old = previous.get((entry['benchmark'], entry['villagers']))
+        if old is None:
+            continue
+        for metric, value in entry.items():
+            if metric in NOT_COMPARED or metric not in old or not old[metric]:
+                continue
+            change = value / old[metric] - 1.0
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            if worse > tolerance:
+                regressions.append(
+                    f"{entry['benchmark']} n={entry['villagers']} {metric}: {old[metric]:.4g} -> {value:.4g} ({worse:+.0%} worse)"
+                )
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Deterministic emotion engine benchmarks')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='village sizes to benchmark')
+    parser.add_argument('--huge', action='store_true', help=f'also benchmark {HUGE_SIZE:,} villagers')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=3, help='best-of repeats per timing')
+    parser.add_argument('--object-limit', type=int, default=10000,
+                        help='largest village for per-object process_game_event runs')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', help='previous JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before failing (fraction)')
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes + [HUGE_SIZE] if args.huge and HUGE_SIZE not in args.sizes else args.sizes
+    report = run_benchmarks(sizes, args.seed, args.repeats, args.object_limit,
+                            log=lambda line: print(line, file=sys.stderr))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(report, json.load(handle), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
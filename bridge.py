@@ -0,0 +1,666 @@
+import argparse
+import asyncio
+import json
+import socket
+import struct
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from emotion_engine import EMOTIONS, GameEvent, VillageEmotionEngine
+from dialogue import DEFAULT_TOPIC
+
+# Every frame is FRAME (uint32 payload length, uint8 message type, uint8
+# flags, uint32 request id) + payload. Replies echo the request id, so a
+# client can pipeline any number of requests on one connection. With
+# FLAG_JSON set the payload is UTF-8 JSON instead of the binary layout.
+FRAME = struct.Struct('<IBBI')
+FLAG_JSON = 1
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+MSG_EVENTS = 1
+MSG_ACTIONS = 2
+MSG_DIALOGUE = 3
+MSG_LINES = 4
+MSG_SCHEMA = 5
+MSG_SPAWN = 6
+MSG_MOVE = 7
+MSG_DESPAWN = 8
+MSG_ACK = 9
+MSG_ERROR = 127
+
+# Binary payloads start with a string table (uint32 count, then uint16
+# length + UTF-8 bytes per string); records refer to strings by index.
+# EVENTS:   strings, uint32 n, n EVENT_DTYPE records
+# ACTIONS:  ACTIONS_HEADER (behaviors B, villagers n, unknown records), n uint32
+#           villager string indices (into the request's table), n * ceil(B / 8)
+#           action bitsets (bit i = behavior i, see BehaviorModel.pack)
+# DIALOGUE: strings, uint32 n, n DIALOGUE_DTYPE records
+# LINES:    strings, uint32 n, n uint32 line indices (NO_STRING for unknown villagers)
+# SCHEMA:   always JSON: emotions, behaviors and event types
+# SPAWN:    strings, uint32 n, n PLACEMENT_DTYPE records; adds unknown villagers
+#           (random traits) and places every listed villager (NaN x = unplaced)
+# MOVE:     same layout as SPAWN, for villagers the server already knows
+# DESPAWN:  strings, uint32 n, n uint32 villager string indices; the engine
+#           cannot drop rows, so a despawned villager is unplaced instead: it
+#           leaves the spatial index (no contagion, broadcasts or scheduler
+#           tiers) but keeps its emotions, traits and memories, and a later
+#           SPAWN or MOVE of the same id places it again
+# ACK:      ACK (applied, unknown): villagers created (SPAWN) or moved /
+#           despawned (MOVE, DESPAWN), and records naming unknown villagers
+# ERROR:    UTF-8 message
+NO_STRING = 0xFFFFFFFF
+EVENT_DTYPE = np.dtype([('villager', '<u4'), ('event_type', '<u4'), ('player', '<u4'), ('intensity', '<f4')])
+DIALOGUE_DTYPE = np.dtype([('villager', '<u4'), ('player', '<u4'), ('topic', '<u4')])
+# Block coordinates reach +-30 million, past float32's whole-block precision
+PLACEMENT_DTYPE = np.dtype([('villager', '<u4'), ('x', '<f8'), ('y', '<f8'), ('z', '<f8')])
+COUNT = struct.Struct('<I')
+STRING_LENGTH = struct.Struct('<H')
+ACTIONS_HEADER = struct.Struct('<HII')
+ACK = struct.Struct('<II')
+
+class BridgeError(ValueError):
+    """Malformed frame or payload, or an error reported by the server"""
+
+class _Request(NamedTuple):
+    kind: int
+    flags: int
+    request_id: int
+    payload: bytes
+
+class _StringTable:
+    """Builds the per-payload string table"""
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+
+    def code(self, string: Optional[str]) -> int:
+        if not string:
+            return NO_STRING
+        return self.codes.setdefault(string, len(self.codes))
+
+    def encode(self) -> bytes:
+        parts = [COUNT.pack(len(self.codes))]
+        for string in self.codes:
+            data = string.encode('utf-8')
+            parts.append(STRING_LENGTH.pack(len(data)))
+            parts.append(data)
+        return b''.join(parts)
+
+def decode_strings(payload: bytes, offset: int = 0) -> Tuple[List[str], int]:
+    """String table at ``offset``; returns the strings and the offset after it"""
+    try:
+        (count,), offset = COUNT.unpack_from(payload, offset), offset + COUNT.size
+        strings = []
+        for _ in range(count):
+            (length,) = STRING_LENGTH.unpack_from(payload, offset)
+            offset += STRING_LENGTH.size
+            if offset + length > len(payload):
+                raise BridgeError("String table runs past the end of the payload")
+            strings.append(payload[offset:offset + length].decode('utf-8'))
+            offset += length
+    except (struct.error, UnicodeDecodeError) as error:
+        raise BridgeError(f"Bad string table: {error}") from None
+    return strings, offset
+
+def _decode_records(payload: bytes, offset: int, dtype: np.dtype) -> np.ndarray:
+    try:
+        (count,) = COUNT.unpack_from(payload, offset)
+    except struct.error:
+        raise BridgeError("Missing record count") from None
+    offset += COUNT.size
+    if len(payload) - offset != count * dtype.itemsize:
+        raise BridgeError(f"Expected {count} records of {dtype.itemsize} bytes")
+    return np.frombuffer(payload, dtype, count, offset)
+
+def _check_codes(strings: List[str], *columns: np.ndarray):
+    for column in columns:
+        valid = (column < len(strings)) | (column == NO_STRING)
+        if not valid.all():
+            raise BridgeError("Record refers to a string outside the table")
+
+def _json_records(payload: bytes, key: str) -> List[Dict]:
+    try:
+        body = json.loads(payload)
+    except ValueError as error:
+        raise BridgeError(f"Bad JSON payload: {error}") from None
+    records = body.get(key) if isinstance(body, dict) else None
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        raise BridgeError(f"JSON payload needs a '{key}' list of objects")
+    return records
+
+def _json_field(record: Dict, name: str, kind, default=None):
+    value = record.get(name, default)
+    # bool is an int subclass, but never a valid intensity
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise BridgeError(f"JSON field '{name}' has the wrong type")
+    return value
+
+def encode_frame(kind: int, request_id: int, payload: bytes, flags: int = 0) -> bytes:
+    return FRAME.pack(len(payload), kind, flags, request_id) + payload
+
+def encode_events(events: Sequence[Tuple[str, GameEvent]]) -> bytes:
+    """EVENTS payload for (villager id, GameEvent) pairs"""
+    table = _StringTable()
+    records = np.empty(len(events), EVENT_DTYPE)
+    for i, (villager_id, event) in enumerate(events):
+        records[i] = (table.code(villager_id), table.code(event.event_type), table.code(event.player_id),
+                      event.intensity)
+    return table.encode() + COUNT.pack(len(records)) + records.tobytes()
+
+def decode_events(payload: bytes) -> Tuple[List[str], np.ndarray]:
+    strings, offset = decode_strings(payload)
+    records = _decode_records(payload, offset, EVENT_DTYPE)
+    _check_codes(strings, records['villager'], records['event_type'], records['player'])
+    if (records['villager'] == NO_STRING).any() or (records['event_type'] == NO_STRING).any():
+        raise BridgeError("Events need a villager id and an event type")
+    if not np.isfinite(records['intensity']).all():
+        raise BridgeError("Event intensities must be finite")
+    return strings, records
+
+def encode_actions(behaviors: int, villagers: np.ndarray, bitsets: np.ndarray, unknown: int) -> bytes:
+    return (ACTIONS_HEADER.pack(behaviors, len(villagers), unknown) + villagers.astype('<u4').tobytes()
+            + np.ascontiguousarray(bitsets, dtype=np.uint8).tobytes())
+
+def decode_actions(payload: bytes, strings: List[str], behaviors: List[str]) -> Tuple[Dict[str, List[str]], int]:
+    """Actions per villager id (``strings`` is the request's table) and the count of unknown records"""
+    count, villagers, unknown = ACTIONS_HEADER.unpack_from(payload)
+    offset = ACTIONS_HEADER.size
+    codes = np.frombuffer(payload, '<u4', villagers, offset)
+    offset += codes.nbytes
+    width = (count + 7) // 8
+    bitsets = np.frombuffer(payload, np.uint8, villagers * width, offset).reshape(villagers, width)
+    masks = np.unpackbits(bitsets, axis=-1, count=count, bitorder='little').astype(bool)
+    actions = {strings[code]: [behaviors[i] for i in np.flatnonzero(mask).tolist()]
+               for code, mask in zip(codes.tolist(), masks)}
+    return actions, unknown
+
+def encode_dialogue(requests: Sequence[Tuple[str, str, str]]) -> bytes:
+    """DIALOGUE payload for (villager id, player id, topic) triples"""
+    table = _StringTable()
+    records = np.empty(len(requests), DIALOGUE_DTYPE)
+    for i, (villager_id, player_id, topic) in enumerate(requests):
+        records[i] = (table.code(villager_id), table.code(player_id), table.code(topic))
+    return table.encode() + COUNT.pack(len(records)) + records.tobytes()
+
+def decode_dialogue(payload: bytes) -> Tuple[List[str], np.ndarray]:
+    strings, offset = decode_strings(payload)
+    records = _decode_records(payload, offset, DIALOGUE_DTYPE)
+    _check_codes(strings, records['villager'], records['player'], records['topic'])
+    return strings, records
+
+def encode_placements(placements: Sequence[Tuple[str, Optional[Sequence[float]]]]) -> bytes:
+    """SPAWN / MOVE payload for (villager id, (x, y, z) or None) pairs"""
+    table = _StringTable()
+    records = np.empty(len(placements), PLACEMENT_DTYPE)
+    for i, (villager_id, position) in enumerate(placements):
+        records[i] = (table.code(villager_id),) + ((np.nan,) * 3 if position is None else tuple(position))
+    return table.encode() + COUNT.pack(len(records)) + records.tobytes()
+
+def decode_placements(payload: bytes) -> Tuple[List[str], np.ndarray]:
+    strings, offset = decode_strings(payload)
+    records = _decode_records(payload, offset, PLACEMENT_DTYPE)
+    _check_codes(strings, records['villager'])
+    if (records['villager'] == NO_STRING).any():
+        raise BridgeError("Placements need a villager id")
+    if np.isinf(np.column_stack([records['x'], records['y'], records['z']])).any():
+        raise BridgeError("Positions must be finite (NaN unplaces a villager)")
+    return strings, records
+
+def encode_villagers(villager_ids: Sequence[str]) -> bytes:
+    """DESPAWN payload for villager ids"""
+    table = _StringTable()
+    codes = np.array([table.code(villager_id) for villager_id in villager_ids], dtype='<u4')
+    return table.encode() + COUNT.pack(len(codes)) + codes.tobytes()
+
+def decode_villagers(payload: bytes) -> Tuple[List[str], np.ndarray]:
+    strings, offset = decode_strings(payload)
+    codes = _decode_records(payload, offset, np.dtype('<u4'))
+    _check_codes(strings, codes)
+    if (codes == NO_STRING).any():
+        raise BridgeError("Despawns need a villager id")
+    return strings, codes
+
+def encode_lines(lines: Sequence[Optional[str]]) -> bytes:
+    table = _StringTable()
+    indices = np.array([table.code(line) for line in lines], dtype='<u4')
+    return table.encode() + COUNT.pack(len(indices)) + indices.tobytes()
+
+def decode_lines(payload: bytes) -> List[Optional[str]]:
+    strings, offset = decode_strings(payload)
+    indices = _decode_records(payload, offset, np.dtype('<u4'))
+    return [None if index == NO_STRING else strings[index] for index in indices.tolist()]
+
+class BridgeServer:
+    """Local asyncio server that lets an out-of-process game (e.g. a JVM plugin) drive a VillageEmotionEngine.
+
+    Listens on TCP (``host``/``port``) or a Unix socket (``path``). Clients
+    send length-prefixed frames: an EVENTS frame carries any number of
+    (villager, event type, player, intensity) records and is answered with
+    one ACTIONS frame of packed action bitsets for every villager it
+    touched; a DIALOGUE frame is answered with a LINES frame. SPAWN, MOVE
+    and DESPAWN frames keep the engine's villagers and positions in step
+    with the game and are answered with an ACK frame; despawning unplaces a
+    villager rather than deleting it (see DESPAWN above). Requests are
+    pipelined - a connection keeps reading while earlier requests run -
+    and every request already waiting on a connection is handed to the
+    engine in one hop. Within an EVENTS frame, events are coalesced like
+    EventPipeline does: one ``apply_event_batch`` per (event type, player)
+    with duplicate villagers' intensities summed. Setting FLAG_JSON on a
+    request switches that request and its reply to JSON, for debugging.
+
+    Engine calls run on one worker thread, which makes the server the only
+    writer of the engine while it runs. At most ``max_connections`` clients
+    are served (others get an ERROR frame and are closed), and each
+    connection stops reading once ``max_inflight`` of its requests are
+    waiting, so a fast client is slowed by TCP backpressure instead of
+    growing server memory.
+    """
+    def __init__(self, engine: VillageEmotionEngine, host: str = '127.0.0.1', port: int = 0,
+                 path: Optional[str] = None, max_connections: int = 64, max_inflight: int = 32,
+                 max_frame_bytes: int = MAX_FRAME_BYTES):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.path = path
+        self.max_connections = max_connections
+        self.max_inflight = max_inflight
+        self.max_frame_bytes = max_frame_bytes
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='emotion-bridge')
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections = 0
+
+        self._accepted = 0
+        self._refused = 0
+        self._requests = 0
+        self._events = 0
+        self._errors = 0
+
+    async def start(self):
+        if self._server is not None:
+            return
+        if self.path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+
+    @property
+    def address(self):
+        """Socket path, or the (host, port) actually bound"""
+        if self.path is not None:
+            return self.path
+        return self._server.sockets[0].getsockname()[:2] if self._server is not None else (self.host, self.port)
+
+    async def serve_forever(self):
+        await self.start()
+        await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> 'BridgeServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self._connections >= self.max_connections:
+            self._refused += 1
+            writer.write(encode_frame(MSG_ERROR, 0, b'Too many connections'))
+            await self._close_writer(writer)
+            return
+        self._connections += 1
+        self._accepted += 1
+        queue: asyncio.Queue = asyncio.Queue(self.max_inflight)
+        responder = asyncio.ensure_future(self._respond(queue, writer))
+        try:
+            while not responder.done():
+                try:
+                    header = await reader.readexactly(FRAME.size)
+                except asyncio.IncompleteReadError:
+                    break
+                length, kind, flags, request_id = FRAME.unpack(header)
+                if length > self.max_frame_bytes:
+                    # The stream cannot be resynchronized after an oversized frame
+                    message = f"Frame of {length} bytes exceeds {self.max_frame_bytes}".encode('utf-8')
+                    await queue.put(_Request(MSG_ERROR, flags, request_id, message))
+                    break
+                payload = await reader.readexactly(length)
+                await queue.put(_Request(kind, flags, request_id, payload))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if not responder.done():
+                await queue.put(None)
+            await responder
+            await self._close_writer(writer)
+            self._connections -= 1
+
+    async def _respond(self, queue: asyncio.Queue, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            # Everything already pipelined on this connection goes to the engine in one hop
+            while batch[-1] is not None and not queue.empty():
+                batch.append(queue.get_nowait())
+            requests = [request for request in batch if request is not None]
+            if requests:
+                replies = await loop.run_in_executor(self._executor, self._process, requests)
+                try:
+                    writer.write(b''.join(replies))
+                    await writer.drain()
+                except ConnectionError:
+                    return
+            if batch[-1] is None:
+                return
+
+    @staticmethod
+    async def _close_writer(writer: asyncio.StreamWriter):
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    def _process(self, requests: List[_Request]) -> List[bytes]:
+        # Runs on the engine thread
+        replies = []
+        for request in requests:
+            self._requests += 1
+            try:
+                replies.append(self._dispatch(request))
+            except Exception as error:
+                # Whatever one request raises, it gets an ERROR reply and the rest of the batch still runs
+                self._errors += 1
+                message = str(error) if request.kind == MSG_ERROR else f"{type(error).__name__}: {error}"
+                replies.append(self._error(request, message))
+        return replies
+
+    @staticmethod
+    def _error(request: _Request, message: str) -> bytes:
+        if request.flags & FLAG_JSON:
+            return encode_frame(MSG_ERROR, request.request_id, json.dumps({'error': message}).encode('utf-8'), FLAG_JSON)
+        return encode_frame(MSG_ERROR, request.request_id, message.encode('utf-8'))
+
+    def _dispatch(self, request: _Request) -> bytes:
+        as_json = bool(request.flags & FLAG_JSON)
+        if request.kind == MSG_EVENTS:
+            strings, records = self._events_from_json(request.payload) if as_json else decode_events(request.payload)
+            villagers, masks, unknown = self.apply_events(strings, records)
+            if as_json:
+                names = self.engine.behavior_model.actions
+                body = {
+                    'actions': {strings[code]: names(mask) for code, mask in zip(villagers.tolist(), masks)},
+                    'unknown': unknown
+                }
+                return encode_frame(MSG_ACTIONS, request.request_id, json.dumps(body).encode('utf-8'), FLAG_JSON)
+            payload = encode_actions(len(self.engine.behavior_model), villagers,
+                                     self.engine.behavior_model.pack(masks), unknown)
+            return encode_frame(MSG_ACTIONS, request.request_id, payload)
+        if request.kind == MSG_DIALOGUE:
+            strings, records = self._dialogue_from_json(request.payload) if as_json else decode_dialogue(request.payload)
+            lines = self.dialogue(strings, records)
+            if as_json:
+                return encode_frame(MSG_LINES, request.request_id, json.dumps({'lines': lines}).encode('utf-8'), FLAG_JSON)
+            return encode_frame(MSG_LINES, request.request_id, encode_lines(lines))
+        if request.kind in (MSG_SPAWN, MSG_MOVE, MSG_DESPAWN):
+            if request.kind == MSG_DESPAWN:
+                strings, codes = self._villagers_from_json(request.payload) if as_json else decode_villagers(request.payload)
+                applied, unknown = self.despawn(strings, codes)
+            else:
+                strings, records = (self._placements_from_json(request.payload) if as_json
+                                    else decode_placements(request.payload))
+                applied, unknown = self.place(strings, records, spawn=request.kind == MSG_SPAWN)
+            if as_json:
+                body = {'applied': applied, 'unknown': unknown}
+                return encode_frame(MSG_ACK, request.request_id, json.dumps(body).encode('utf-8'), FLAG_JSON)
+            return encode_frame(MSG_ACK, request.request_id, ACK.pack(applied, unknown))
+        if request.kind == MSG_SCHEMA:
+            schema = {
+                'emotions': list(EMOTIONS),
+                'behaviors': list(self.engine.behavior_model.names),
+                'event_types': list(self.engine.event_catalog)
+            }
+            return encode_frame(MSG_SCHEMA, request.request_id, json.dumps(schema).encode('utf-8'), FLAG_JSON)
+        if request.kind == MSG_ERROR:
+            raise BridgeError(request.payload.decode('utf-8', 'replace'))
+        raise BridgeError(f"Unknown message type {request.kind}")
+
+    @staticmethod
+    def _events_from_json(payload: bytes) -> Tuple[List[str], np.ndarray]:
+        events = _json_records(payload, 'events')
+        return decode_events(encode_events([
+            (_json_field(event, 'villager_id', str),
+             GameEvent(_json_field(event, 'event_type', str), _json_field(event, 'player_id', str, ''),
+                       float(_json_field(event, 'intensity', (int, float), 1.0))))
+            for event in events
+        ]))
+
+    @staticmethod
+    def _dialogue_from_json(payload: bytes) -> Tuple[List[str], np.ndarray]:
+        requests = _json_records(payload, 'requests')
+        return decode_dialogue(encode_dialogue([
+            (_json_field(request, 'villager_id', str), _json_field(request, 'player_id', str, ''),
+             _json_field(request, 'topic', str, DEFAULT_TOPIC))
+            for request in requests
+        ]))
+
+    @staticmethod
+    def _placements_from_json(payload: bytes) -> Tuple[List[str], np.ndarray]:
+        placements = []
+        for placement in _json_records(payload, 'villagers'):
+            position = placement.get('position')
+            if position is not None and (not isinstance(position, list) or len(position) != 3 or not all(
+                    isinstance(value, (int, float)) and not isinstance(value, bool) for value in position)):
+                raise BridgeError("JSON field 'position' must be null or a list of three numbers")
+            placements.append((_json_field(placement, 'villager_id', str), position))
+        return decode_placements(encode_placements(placements))
+
+    @staticmethod
+    def _villagers_from_json(payload: bytes) -> Tuple[List[str], np.ndarray]:
+        villagers = _json_records(payload, 'villagers')
+        return decode_villagers(encode_villagers([_json_field(villager, 'villager_id', str) for villager in villagers]))
+
+    def place(self, strings: List[str], records: np.ndarray, spawn: bool) -> Tuple[int, int]:
+        """Apply decoded SPAWN / MOVE records; returns (villagers created or moved, unknown records)"""
+        engine = self.engine
+        created = 0
+        if spawn:
+            # dict.fromkeys keeps first-seen order and drops repeats within the frame
+            new = [villager_id for villager_id in dict.fromkeys(strings[code] for code in records['villager'].tolist())
+                   if villager_id not in engine]
+            if new:
+                engine.add_villagers(new)
+            created = len(new)
+        rows = engine.rows_for(strings, missing=-1)[records['villager']]
+        known = rows >= 0
+        if known.any():
+            positions = np.column_stack([records['x'], records['y'], records['z']])[known]
+            engine.move_villagers(rows[known], positions)
+        unknown = int(len(rows) - known.sum())
+        return (created if spawn else len(np.unique(rows[known]))), unknown
+
+    def despawn(self, strings: List[str], codes: np.ndarray) -> Tuple[int, int]:
+        """Unplace decoded DESPAWN villagers; returns (villagers despawned, unknown records)"""
+        engine = self.engine
+        rows = engine.rows_for(strings, missing=-1)[codes] if len(codes) else np.zeros(0, np.intp)
+        rows, unknown = np.unique(rows[rows >= 0]), int((rows < 0).sum())
+        if len(rows):
+            engine.move_villagers(rows, [None] * len(rows))
+        return len(rows), unknown
+
+    def apply_events(self, strings: List[str], records: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Apply decoded EVENTS records; returns villager string codes, their action masks and the unknown count"""
+        engine = self.engine
+        rows = engine.rows_for(strings, missing=-1)[records['villager']]
+        known = rows >= 0
+        unknown = int(len(rows) - known.sum())
+        rows, records = rows[known], records[known]
+        self._events += len(records)
+
+        # One coalesced apply_event_batch per (event type, player), like EventPipeline
+        keys = records['event_type'].astype(np.int64) << 32 | records['player'].astype(np.int64)
+        groups, inverse = np.unique(keys, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(groups)))
+        for key, members in zip(groups.tolist(), np.split(order, bounds[:-1])):
+            event_type = strings[key >> 32]
+            player = key & NO_STRING
+            if event_type not in engine.event_catalog:
+                continue
+            group_rows, where = np.unique(rows[members], return_inverse=True)
+            intensities = np.bincount(where, weights=records['intensity'][members].astype(float))
+            engine.apply_event_batch(event_type, '' if player == NO_STRING else strings[player], group_rows, intensities)
+
+        touched, first = np.unique(rows, return_index=True)
+        masks = engine.sample_actions(touched)
+        return records['villager'][first], masks, unknown
+
+    def dialogue(self, strings: List[str], records: np.ndarray) -> List[Optional[str]]:
+        """Lines for decoded DIALOGUE records (None for unknown villagers)"""
+        engine = self.engine
+        rows = engine.rows_for(strings, missing=-1)[records['villager']] if len(records) else np.zeros(0, np.intp)
+        known = np.flatnonzero(rows >= 0)
+        lines: List[Optional[str]] = [None] * len(records)
+        if len(known):
+            known_records = records[known]
+
+            def lookup(codes: np.ndarray, default: str) -> List[str]:
+                return [default if code == NO_STRING else strings[code] for code in codes.tolist()]
+
+            generated = engine.generate_dialogue_many(lookup(known_records['villager'], ''),
+                                                      lookup(known_records['player'], ''),
+                                                      lookup(known_records['topic'], DEFAULT_TOPIC))
+            for index, line in zip(known.tolist(), generated):
+                lines[index] = line
+        return lines
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            'connections': self._connections,
+            'accepted': self._accepted,
+            'refused': self._refused,
+            'requests': self._requests,
+            'events': self._events,
+            'errors': self._errors
+        }
+
+class BridgeClient:
+    """Blocking BridgeServer client for tools, tests and non-async Python callers.
+
+    ``apply_events``/``dialogue`` do one round trip each; ``send`` and
+    ``receive`` expose the raw frames for pipelining.
+    """
+    def __init__(self, host: str = '127.0.0.1', port: Optional[int] = None, path: Optional[str] = None,
+                 timeout: Optional[float] = None):
+        if path is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(timeout)
+            self._socket.connect(path)
+        else:
+            self._socket = socket.create_connection((host, port), timeout)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._next_id = 0
+        self._behaviors: Optional[List[str]] = None
+
+    def close(self):
+        self._socket.close()
+
+    def __enter__(self) -> 'BridgeClient':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send(self, kind: int, payload: bytes, flags: int = 0) -> int:
+        """Send one request frame and return its request id"""
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+        self._socket.sendall(encode_frame(kind, self._next_id, payload, flags))
+        return self._next_id
+
+    def _read(self, size: int) -> bytes:
+        chunks = []
+        while size:
+            chunk = self._socket.recv(size)
+            if not chunk:
+                raise ConnectionError("Bridge server closed the connection")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    def receive(self) -> _Request:
+        """Next reply frame; ERROR replies raise BridgeError"""
+        length, kind, flags, request_id = FRAME.unpack(self._read(FRAME.size))
+        reply = _Request(kind, flags, request_id, self._read(length))
+        if kind == MSG_ERROR:
+            raise BridgeError(reply.payload.decode('utf-8', 'replace'))
+        return reply
+
+    def schema(self) -> Dict:
+        self.send(MSG_SCHEMA, b'')
+        return json.loads(self.receive().payload)
+
+    def apply_events(self, events: Sequence[Tuple[str, GameEvent]]) -> Dict[str, List[str]]:
+        """Send (villager id, GameEvent) pairs in one frame; returns the actions of every known villager"""
+        if self._behaviors is None:
+            self._behaviors = self.schema()['behaviors']
+        payload = encode_events(events)
+        strings, _ = decode_strings(payload)
+        self.send(MSG_EVENTS, payload)
+        actions, _ = decode_actions(self.receive().payload, strings, self._behaviors)
+        return actions
+
+    def dialogue(self, requests: Sequence[Tuple[str, str, str]]) -> List[Optional[str]]:
+        """Lines for (villager id, player id, topic) triples, in order"""
+        self.send(MSG_DIALOGUE, encode_dialogue(requests))
+        return decode_lines(self.receive().payload)
+
+    def spawn(self, placements: Sequence[Tuple[str, Optional[Sequence[float]]]]) -> Tuple[int, int]:
+        """Add (villager id, position) pairs the server does not know yet and place all of them"""
+        self.send(MSG_SPAWN, encode_placements(placements))
+        return ACK.unpack(self.receive().payload)
+
+    def move(self, placements: Sequence[Tuple[str, Optional[Sequence[float]]]]) -> Tuple[int, int]:
+        """Move known villagers; returns (villagers moved, unknown records)"""
+        self.send(MSG_MOVE, encode_placements(placements))
+        return ACK.unpack(self.receive().payload)
+
+    def despawn(self, villager_ids: Sequence[str]) -> Tuple[int, int]:
+        """Unplace villagers (their state is kept); returns (villagers despawned, unknown ids)"""
+        self.send(MSG_DESPAWN, encode_villagers(villager_ids))
+        return ACK.unpack(self.receive().payload)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Serve a VillageEmotionEngine to an out-of-process game')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=25580)
+    parser.add_argument('--unix', help='listen on this Unix socket path instead of TCP')
+    parser.add_argument('--villagers', type=int, default=0, help='spawn villager_0 .. villager_N-1 at startup')
+    parser.add_argument('--max-connections', type=int, default=64)
+    args = parser.parse_args(argv)
+
+    engine = VillageEmotionEngine(capacity=max(64, args.villagers))
+    if args.villagers:
+        engine.add_villagers([f'villager_{i}' for i in range(args.villagers)])
+    server = BridgeServer(engine, args.host, args.port, args.unix, args.max_connections)
+
+    async def serve():
+        await server.start()
+        print(f"Emotion bridge listening on {server.address}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
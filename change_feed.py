@@ -0,0 +1,218 @@
+import numpy as np
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+from emotion_engine import EMOTIONS, VillageEmotionEngine
+from dialogue import BAND_INDEX, REPUTATION_BANDS, reputation_bands
+
+CHANGE_DOMINANT = 1
+CHANGE_BEHAVIOR = 2
+CHANGE_REPUTATION = 3
+
+CHANGE_KINDS = {
+    CHANGE_DOMINANT: 'dominant_emotion',
+    CHANGE_BEHAVIOR: 'behavior',
+    CHANGE_REPUTATION: 'reputation_band'
+}
+
+# One delta per (villager row, kind, key). ``key`` is -1 for dominant emotion
+# changes, the behavior index for behavior crossings and the interned player
+# code for reputation bands. ``old``/``new`` are emotion indices (old is -1
+# for newly spawned villagers), 0/1 for below/above a behavior threshold, or
+# band indices into REPUTATION_BANDS.
+DELTA_DTYPE = np.dtype([
+    ('row', np.int32),
+    ('kind', np.uint8),
+    ('key', np.int32),
+    ('old', np.int8),
+    ('new', np.int8)
+])
+
+NEUTRAL_BAND = BAND_INDEX['neutral']
+
+class ChangeBatch(NamedTuple):
+    sequence: int
+    timestamp: float
+    deltas: np.ndarray
+
+def _deltas(rows, kind: int, keys, old, new) -> np.ndarray:
+    deltas = np.empty(len(rows), dtype=DELTA_DTYPE)
+    deltas['row'] = rows
+    deltas['kind'] = kind
+    deltas['key'] = keys
+    deltas['old'] = old
+    deltas['new'] = new
+    return deltas
+
+class Subscription:
+    """One consumer's thresholds and the last state it was told about"""
+    def __init__(self, feed: 'ChangeFeed', callback: Optional[Callable[[ChangeBatch], None]], dominant: bool,
+                 behaviors: Dict[str, float], reputation: bool, players: Optional[Sequence[str]]):
+        engine = feed.engine
+        self.feed = feed
+        self.callback = callback
+        self.dominant = dominant
+        self.behavior_index = np.array([engine.behavior_model.names.index(name) for name in behaviors], dtype=np.intp)
+        self.thresholds = np.array(list(behaviors.values()), dtype=float)
+        self.reputation = reputation
+        self.players = None if players is None else list(players)
+        self._dominant = np.zeros(0, dtype=np.int8)
+        self._above = np.zeros((0, len(self.behavior_index)), dtype=bool)
+        # Non-neutral bands only: row -> {player code: band}
+        self._bands: Dict[int, Dict[int, int]] = {}
+        self._pending: List[ChangeBatch] = []
+        self._seen = 0
+        rows = np.arange(len(engine))
+        self._diff(rows, rows, feed.engine.clock())
+
+    def _grow(self, size: int):
+        # Rows this subscription has not seen yet start out as "new"
+        if size <= self._seen:
+            return
+        self._dominant = np.concatenate([self._dominant[:self._seen], np.full(size - self._seen, -1, dtype=np.int8)])
+        self._above = np.concatenate([self._above[:self._seen],
+                                      np.zeros((size - self._seen, len(self.behavior_index)), dtype=bool)])
+        self._seen = size
+
+    def _player_codes(self) -> Optional[np.ndarray]:
+        players = self.feed.engine.relationships.players
+        codes = [players.code(player_id) for player_id in self.players]
+        return np.array([code for code in codes if code is not None], dtype=np.int64)
+
+    def _diff(self, rows: np.ndarray, behavior_rows: np.ndarray, now: float) -> np.ndarray:
+        engine = self.feed.engine
+        self._grow(len(engine))
+        parts = []
+
+        if self.dominant and len(rows):
+            new = np.argmax(np.abs(engine.emotions[rows]), axis=1).astype(np.int8)
+            old = self._dominant[rows]
+            changed = np.flatnonzero(new != old)
+            parts.append(_deltas(rows[changed], CHANGE_DOMINANT, -1, old[changed], new[changed]))
+            self._dominant[rows] = new
+
+        if len(self.behavior_index) and len(behavior_rows):
+            weights = engine.behavior_weights(behavior_rows, now)[:, self.behavior_index]
+            new = weights >= self.thresholds
+            old = self._above[behavior_rows]
+            changed_rows, changed_keys = np.nonzero(new != old)
+            parts.append(_deltas(behavior_rows[changed_rows], CHANGE_BEHAVIOR, self.behavior_index[changed_keys],
+                                 old[changed_rows, changed_keys], new[changed_rows, changed_keys]))
+            self._above[behavior_rows] = new
+
+        if self.reputation and len(rows):
+            parts.append(self._diff_reputation(rows))
+
+        if not parts:
+            return np.zeros(0, dtype=DELTA_DTYPE)
+        return np.concatenate(parts)
+
+    def _diff_reputation(self, rows: np.ndarray) -> np.ndarray:
+        villagers, codes, reputation = self.feed.engine.relationships.reputation_entries(rows)
+        bands = reputation_bands(reputation)
+        keep = bands != NEUTRAL_BAND
+        if self.players is not None:
+            keep &= np.isin(codes, self._player_codes())
+        current: Dict[int, Dict[int, int]] = {}
+        for row, code, band in zip(villagers[keep].tolist(), codes[keep].tolist(), bands[keep].tolist()):
+            current.setdefault(row, {})[code] = band
+
+        changes = []
+        for row in rows.tolist():
+            old = self._bands.pop(row, {})
+            new = current.get(row, {})
+            if new:
+                self._bands[row] = new
+            # Relationships missing on either side count as neutral
+            for code in old.keys() | new.keys():
+                before = old.get(code, NEUTRAL_BAND)
+                after = new.get(code, NEUTRAL_BAND)
+                if before != after:
+                    changes.append((row, code, before, after))
+        if not changes:
+            return np.zeros(0, dtype=DELTA_DTYPE)
+        changed_rows, changed_codes, before, after = zip(*changes)
+        return _deltas(changed_rows, CHANGE_REPUTATION, changed_codes, before, after)
+
+    def drain(self) -> List[ChangeBatch]:
+        """Batches queued for a subscription without a callback"""
+        batches, self._pending = self._pending, []
+        return batches
+
+    def cancel(self):
+        self.feed.unsubscribe(self)
+
+class ChangeFeed:
+    """Batched emotional-state deltas pushed to subscribers, replacing per-villager get_status polling.
+
+    Each subscription picks what it cares about: dominant emotion flips,
+    behavior weights crossing per-behavior thresholds, and reputation band
+    changes (optionally for some players only). ``poll()`` - typically once
+    per tick, e.g. from a TickScheduler - looks only at rows the engine
+    stamped as changed since the previous poll and hands every subscription
+    one ChangeBatch of DELTA_DTYPE records for the villagers that actually
+    crossed one of its thresholds.
+
+    Decay scales all of a villager's emotions alike, so it never flips the
+    dominant emotion, but it can carry a behavior weight across a threshold
+    without touching the row. Pass ``include_decay=True`` to re-check the
+    behavior thresholds of every villager on each poll.
+    """
+    def __init__(self, engine: VillageEmotionEngine, include_decay: bool = False):
+        self.engine = engine
+        self.include_decay = include_decay
+        self.subscriptions: List[Subscription] = []
+        self._sequence = engine.change_sequence
+
+    def subscribe(self, callback: Optional[Callable[[ChangeBatch], None]] = None, dominant: bool = True,
+                  behaviors: Optional[Dict[str, float]] = None, reputation: bool = False,
+                  players: Optional[Sequence[str]] = None) -> Subscription:
+        """Start receiving deltas from the current state; without a callback, batches queue until drain()"""
+        subscription = Subscription(self, callback, dominant, dict(behaviors or {}), reputation, players)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+
+    def poll(self, now: Optional[float] = None) -> int:
+        """Publish deltas for rows changed since the last poll; returns the number of deltas sent"""
+        engine = self.engine
+        if now is None:
+            now = engine.clock()
+        rows, self._sequence = engine.changes_since(self._sequence)
+        behavior_rows = np.arange(len(engine)) if self.include_decay else rows
+
+        published = 0
+        for subscription in list(self.subscriptions):
+            deltas = subscription._diff(rows, behavior_rows, now)
+            if not len(deltas):
+                continue
+            batch = ChangeBatch(self._sequence, now, deltas)
+            if subscription.callback is not None:
+                subscription.callback(batch)
+            else:
+                subscription._pending.append(batch)
+            published += len(deltas)
+        return published
+
+    def describe(self, deltas: np.ndarray) -> List[Dict]:
+        """Decode delta records into readable dicts (for logging and debugging)"""
+        engine = self.engine
+        ids = engine._ids
+        names = engine.behavior_model.names
+        players = engine.relationships.players
+        described = []
+        for row, kind, key, old, new in deltas.tolist():
+            record = {'villager_id': ids[row], 'change': CHANGE_KINDS[kind]}
+            if kind == CHANGE_DOMINANT:
+                record['old'] = EMOTIONS[old] if old >= 0 else None
+                record['new'] = EMOTIONS[new]
+            elif kind == CHANGE_BEHAVIOR:
+                record['behavior'] = names[key]
+                record['above'] = bool(new)
+            else:
+                record['player_id'] = players.string(key)
+                record['old'] = REPUTATION_BANDS[old]
+                record['new'] = REPUTATION_BANDS[new]
+            described.append(record)
+        return described
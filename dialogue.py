@@ -0,0 +1,203 @@
+import json
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+MOODS = ('joyful', 'angry', 'fearful', 'neutral')
+MOOD_INDEX = {mood: i for i, mood in enumerate(MOODS)}
+REPUTATION_BANDS = ('suspicious', 'neutral', 'warm')
+BAND_INDEX = {band: i for i, band in enumerate(REPUTATION_BANDS)}
+DEFAULT_TOPIC = 'general'
+
+# Moods are checked in MOODS order on emotion + BIAS_WEIGHT * player bias
+JOY_THRESHOLD = 0.4
+ANGER_THRESHOLD = 0.3
+FEAR_THRESHOLD = 0.3
+BIAS_WEIGHT = 0.3
+# Reputation below the first edge is suspicious, above the second warm
+REPUTATION_EDGES = (-0.5, 0.5)
+
+DEFAULT_LINES = {
+    'joyful': {
+        DEFAULT_TOPIC: [
+            "Hello there! It's wonderful to see you again!",
+            "What a beautiful day! How can I help you?",
+            "*cheerful sounds* Trading today?",
+            "You always bring such good energy to our village!"
+        ]
+    },
+    'angry': {
+        DEFAULT_TOPIC: [
+            "*grumbles* What do you want?",
+            "I'm not in the mood for visitors right now.",
+            "Haven't you caused enough trouble already?",
+            "Make it quick. I have important things to do."
+        ]
+    },
+    'fearful': {
+        DEFAULT_TOPIC: [
+            "*nervous sounds* P-please don't hurt me...",
+            "I... I don't have anything valuable...",
+            "Are you here to cause trouble again?",
+            "*whispers* Maybe you should talk to the iron golem instead..."
+        ]
+    },
+    'neutral': {
+        DEFAULT_TOPIC: [
+            "Greetings, traveler. How may I assist you?",
+            "Welcome to our village. What brings you here?",
+            "*nods politely* Good to see you.",
+            "The weather has been quite nice lately, hasn't it?"
+        ]
+    }
+}
+
+DEFAULT_SUFFIXES = {
+    'suspicious': " *eyes you suspiciously*",
+    'neutral': "",
+    'warm': " *smiles warmly*"
+}
+
+def mood_buckets(joy, anger, fear) -> np.ndarray:
+    """Mood index (into MOODS) for bias-weighted joy, anger and fear values or arrays"""
+    joy, anger, fear = np.broadcast_arrays(np.asarray(joy, dtype=float), np.asarray(anger, dtype=float),
+                                           np.asarray(fear, dtype=float))
+    return np.select([joy > JOY_THRESHOLD, anger > ANGER_THRESHOLD, fear > FEAR_THRESHOLD],
+                     [MOOD_INDEX['joyful'], MOOD_INDEX['angry'], MOOD_INDEX['fearful']], MOOD_INDEX['neutral'])
+
+def reputation_bands(reputation) -> np.ndarray:
+    """Band index (into REPUTATION_BANDS) for reputation values or arrays"""
+    reputation = np.asarray(reputation, dtype=float)
+    low, high = REPUTATION_EDGES
+    return np.where(reputation < low, BAND_INDEX['suspicious'],
+                    np.where(reputation > high, BAND_INDEX['warm'], BAND_INDEX['neutral']))
+
+class DialogueRegistry:
+    """Dialogue lines keyed by (mood, reputation band, topic), compiled into flat arrays.
+
+    Lines are registered per (mood, topic) and reputation bands add a
+    suffix. ``compile()`` renders every (mood, band, topic) bucket once into
+    one object array, so picking lines for a whole batch is an index lookup
+    plus one vectorized random draw. Topics without lines for a mood fall
+    back to DEFAULT_TOPIC, and unknown topics are treated as DEFAULT_TOPIC.
+
+    The scalar path (``lines_for``) keeps an LRU cache of resolved buckets
+    (``cache_size=0`` disables it), since most villagers asked about the
+    same topic land in a handful of buckets.
+    """
+    def __init__(self, lines: Optional[Dict[str, Dict[str, List[str]]]] = None,
+                 suffixes: Optional[Dict[str, str]] = None, cache_size: int = 256):
+        self._lines: Dict[Tuple[str, str], List[str]] = {}
+        self._suffixes = dict(DEFAULT_SUFFIXES if suffixes is None else suffixes)
+        self.topics: List[str] = [DEFAULT_TOPIC]
+        self._topic_codes = {DEFAULT_TOPIC: 0}
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[Tuple[int, int, str], Tuple[str, ...]]' = OrderedDict()
+        self._table: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._counts: Optional[np.ndarray] = None
+        for mood, topics in (DEFAULT_LINES if lines is None else lines).items():
+            for topic, topic_lines in topics.items():
+                self.add_lines(mood, topic_lines, topic)
+
+    def add_lines(self, mood: str, lines: Sequence[str], topic: str = DEFAULT_TOPIC):
+        """Append lines for a mood and topic"""
+        if mood not in MOOD_INDEX:
+            raise ValueError(f"Unknown mood {mood!r} (expected one of {MOODS})")
+        self._lines.setdefault((mood, topic), []).extend(lines)
+        if topic not in self._topic_codes:
+            self._topic_codes[topic] = len(self.topics)
+            self.topics.append(topic)
+        self._invalidate()
+
+    def set_suffix(self, band: str, suffix: str):
+        """Text appended to every line spoken to players in a reputation band"""
+        if band not in BAND_INDEX:
+            raise ValueError(f"Unknown reputation band {band!r} (expected one of {REPUTATION_BANDS})")
+        self._suffixes[band] = suffix
+        self._invalidate()
+
+    def load(self, path: str, replace: bool = False):
+        """Add line sets from a JSON file: {"lines": {mood: {topic: [...]}}, "suffixes": {band: text}}
+
+        With ``replace=True`` lines for the (mood, topic) pairs in the file
+        replace the registered ones instead of extending them.
+        """
+        with open(path) as handle:
+            data = json.load(handle)
+        for mood, topics in data.get('lines', {}).items():
+            for topic, lines in topics.items():
+                if replace:
+                    self._lines.pop((mood, topic), None)
+                self.add_lines(mood, lines, topic)
+        for band, suffix in data.get('suffixes', {}).items():
+            self.set_suffix(band, suffix)
+
+    @classmethod
+    def from_file(cls, path: str, defaults: bool = True, cache_size: int = 256) -> 'DialogueRegistry':
+        """Registry from a JSON line file, on top of the default lines unless ``defaults`` is False"""
+        registry = cls(None if defaults else {}, cache_size=cache_size)
+        registry.load(path, replace=defaults)
+        return registry
+
+    def _invalidate(self):
+        self._table = None
+        self._cache.clear()
+
+    def compile(self):
+        """Render every (mood, band, topic) bucket into the flat line table"""
+        shape = (len(MOODS), len(REPUTATION_BANDS), len(self.topics))
+        offsets = np.zeros(shape, dtype=np.int64)
+        counts = np.zeros(shape, dtype=np.int64)
+        rendered: List[str] = []
+        for mood_code, mood in enumerate(MOODS):
+            for topic_code, topic in enumerate(self.topics):
+                lines = self._lines.get((mood, topic)) or self._lines.get((mood, DEFAULT_TOPIC))
+                if not lines:
+                    raise ValueError(f"No {DEFAULT_TOPIC!r} lines registered for mood {mood!r}")
+                for band_code, band in enumerate(REPUTATION_BANDS):
+                    suffix = self._suffixes.get(band, '')
+                    offsets[mood_code, band_code, topic_code] = len(rendered)
+                    counts[mood_code, band_code, topic_code] = len(lines)
+                    rendered.extend(line + suffix for line in lines)
+        table = np.empty(len(rendered), dtype=object)
+        table[:] = rendered
+        self._table, self._offsets, self._counts = table, offsets, counts
+
+    def topic_codes(self, topics: Union[str, Sequence[str]], count: int) -> np.ndarray:
+        """Topic codes for one topic (broadcast to ``count``) or a sequence of topics"""
+        if isinstance(topics, str):
+            return np.full(count, self._topic_codes.get(topics, 0), dtype=np.int64)
+        return np.array([self._topic_codes.get(topic, 0) for topic in topics], dtype=np.int64)
+
+    def lines_for(self, mood: int, band: int, topic: str = DEFAULT_TOPIC) -> Tuple[str, ...]:
+        """Rendered lines of one bucket"""
+        key = (mood, band, topic)
+        lines = self._cache.get(key)
+        if lines is not None:
+            self._cache.move_to_end(key)
+            return lines
+        if self._table is None:
+            self.compile()
+        code = self._topic_codes.get(topic, 0)
+        offset = self._offsets[mood, band, code]
+        lines = tuple(self._table[offset:offset + self._counts[mood, band, code]])
+        if self.cache_size > 0:
+            self._cache[key] = lines
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return lines
+
+    def select(self, moods: np.ndarray, bands: np.ndarray, topics: Union[str, Sequence[str]],
+               rng: np.random.Generator) -> List[str]:
+        """One random line per (mood, band, topic) with a single vectorized draw"""
+        if self._table is None:
+            self.compile()
+        moods = np.asarray(moods, dtype=np.int64)
+        bands = np.asarray(bands, dtype=np.int64)
+        codes = self.topic_codes(topics, len(moods))
+        counts = self._counts[moods, bands, codes]
+        picks = self._offsets[moods, bands, codes] + rng.integers(counts)
+        return self._table[picks].tolist()
+
+DEFAULT_DIALOGUE = DialogueRegistry()
@@ -1,313 +1,2018 @@
 import numpy as np
-import json
 import time
-import random
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
 from collections import deque
+from dataclasses import dataclass
+from collections.abc import MutableMapping
 import threading
+import bisect
+from contextlib import contextmanager
+from spatial_index import ChunkSpatialIndex, FALLOFF_CURVES, group_by_cell
+from instrumentation import Instrumentation
+from dialogue import BIAS_WEIGHT, DEFAULT_DIALOGUE, DEFAULT_TOPIC, DialogueRegistry, mood_buckets, reputation_bands
+
+EMOTIONS = ('joy', 'anger', 'fear', 'sadness', 'trust', 'curiosity')
+EMOTION_INDEX = {emotion: i for i, emotion in enumerate(EMOTIONS)}
+
+TRAITS = ('emotional_stability', 'socialness', 'fearfulness', 'optimism', 'curiosity')
+TRAIT_INDEX = {trait: i for i, trait in enumerate(TRAITS)}
+
+# Uniform ranges personality traits are rolled from
+TRAIT_RANGES = {
+    'emotional_stability': (0.3, 0.8),
+    'socialness': (0.2, 0.9),
+    'fearfulness': (0.1, 0.7),
+    'optimism': (0.2, 0.8),
+    'curiosity': (0.3, 0.9)
+}
+
+# Villagers farther apart than this (in blocks) don't influence each other
+CONTAGION_RADIUS = 16.0
+
+DEFAULT_EVENT_RESPONSES = {
+    'player_gift': {'joy': 0.6, 'trust': 0.4},
+    'player_attack': {'anger': 0.8, 'fear': 0.3, 'trust': -0.5},
+    'player_trade': {'joy': 0.3, 'trust': 0.2},
+    'monster_nearby': {'fear': 0.7, 'sadness': 0.2},
+    'village_celebration': {'joy': 0.5, 'curiosity': 0.3},
+    'night_time': {'fear': 0.2, 'sadness': 0.1},
+    'sunny_weather': {'joy': 0.2, 'curiosity': 0.1}
+}
+
+class SimulatedClock:
+    """Manually advanced clock, injectable wherever a ``clock`` callable is accepted"""
+    def __init__(self, start: float = 0.0):
+        self.now = start
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    def advance(self, seconds: float) -> float:
+        self.now += seconds
+        return self.now
+    
+    def set(self, timestamp: float):
+        self.now = timestamp
+
+class StripedLock:
+    """Fixed set of reentrant locks that integer keys are spread over (lock striping).
+    
+    Key k maps to stripe ``(k // block) % stripes``, so with ``block`` > 1
+    runs of neighbouring keys (e.g. the rows of one village) share a few
+    stripes. ``hold`` takes several stripes in ascending order, so holders
+    of overlapping key sets never deadlock.
+    """
+    def __init__(self, stripes: int = 64, block: int = 1):
+        self.block = block
+        self._locks = [threading.RLock() for _ in range(stripes)]
+    
+    def __len__(self) -> int:
+        return len(self._locks)
+    
+    def lock_for(self, key: int) -> threading.RLock:
+        return self._locks[(key // self.block) % len(self._locks)]
+    
+    @contextmanager
+    def hold(self, keys=None):
+        """Hold the stripes of the given keys (default: every stripe)"""
+        if keys is None:
+            stripes = range(len(self._locks))
+        else:
+            stripes = np.unique(np.asarray(keys, dtype=np.int64).reshape(-1) // self.block % len(self._locks)).tolist()
+        locks = [self._locks[stripe] for stripe in stripes]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+def emotion_array(emotions: Dict[str, float]) -> np.ndarray:
+    """Pack an emotion dict into a 6-float vector (missing emotions are 0)"""
+    values = np.zeros(len(EMOTIONS))
+    for emotion, value in emotions.items():
+        if emotion in EMOTION_INDEX:
+            values[EMOTION_INDEX[emotion]] = value
+    return values
+
+def emotion_dict(values: np.ndarray) -> Dict[str, float]:
+    """Unpack a 6-float vector into an emotion dict"""
+    return dict(zip(EMOTIONS, np.asarray(values, dtype=float).tolist()))
+
+def trait_bounds() -> tuple:
+    """(low, high) vectors of TRAIT_RANGES, ordered as TRAITS"""
+    return (np.array([TRAIT_RANGES[trait][0] for trait in TRAITS]),
+            np.array([TRAIT_RANGES[trait][1] for trait in TRAITS]))
+
+# Which trait raises which emotion's gain (optimism -> joy, fearfulness -> fear, curiosity -> curiosity)
+TRAIT_GAINS = np.zeros((len(TRAITS), len(EMOTIONS)))
+TRAIT_GAINS[TRAIT_INDEX['optimism'], EMOTION_INDEX['joy']] = 1.0
+TRAIT_GAINS[TRAIT_INDEX['fearfulness'], EMOTION_INDEX['fear']] = 1.0
+TRAIT_GAINS[TRAIT_INDEX['curiosity'], EMOTION_INDEX['curiosity']] = 1.0
+
+def personality_gains(traits: np.ndarray) -> np.ndarray:
+    """Per-emotion response multipliers for one (5,) or many (N, 5) trait rows"""
+    traits = np.asarray(traits, dtype=float)
+    return (1.0 + traits @ TRAIT_GAINS) * traits[..., TRAIT_INDEX['emotional_stability'], None]
+
+class BehaviorModel:
+    """Linear behavior model: weights = max(emotions @ coefficients.T + bias, floor).
+    
+    Each registered behavior is one row of a (B, 6) coefficient matrix plus a
+    bias and a floor, so weights for N villagers come from a single matmul and
+    actions for all of them from a single uniform draw. Behaviors can be
+    registered at runtime; everything sharing the model picks them up.
+    """
+    def __init__(self):
+        self.names: List[str] = []
+        self.coefficients = np.zeros((0, len(EMOTIONS)))
+        self.bias = np.zeros(0)
+        self.floor = np.zeros(0)
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def register(self, name: str, coefficients: Dict[str, float], bias: float = 0.0, floor: float = 0.0):
+        """Add a behavior (or replace an existing one with the same name)"""
+        row = emotion_array(coefficients)
+        if name in self.names:
+            index = self.names.index(name)
+            self.coefficients[index] = row
+            self.bias[index] = bias
+            self.floor[index] = floor
+            return
+        self.names.append(name)
+        self.coefficients = np.vstack([self.coefficients, row])
+        self.bias = np.append(self.bias, bias)
+        self.floor = np.append(self.floor, floor)
+    
+    def weights(self, emotions: np.ndarray) -> np.ndarray:
+        """Behavior weights for one (6,) or many (N, 6) emotion rows"""
+        return np.maximum(np.asarray(emotions) @ self.coefficients.T + self.bias, self.floor)
+    
+    def as_dict(self, weights: np.ndarray) -> Dict[str, float]:
+        return dict(zip(self.names, np.asarray(weights, dtype=float).tolist()))
+    
+    def sample(self, weights: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Boolean action mask: each behavior fires with probability equal to its weight"""
+        return rng.random(np.shape(weights)) < weights
+    
+    def actions(self, mask: np.ndarray) -> List[str]:
+        """Behavior names set in one villager's action mask"""
+        return [name for name, fired in zip(self.names, mask.tolist()) if fired]
+    
+    @staticmethod
+    def pack(mask: np.ndarray) -> np.ndarray:
+        """Pack (N, B) action masks into (N, ceil(B / 8)) uint8 bitsets (bit i = behavior i)"""
+        return np.packbits(mask, axis=-1, bitorder='little')
+    
+    def unpack(self, bitsets: np.ndarray) -> np.ndarray:
+        """Inverse of ``pack``"""
+        return np.unpackbits(bitsets, axis=-1, count=len(self.names), bitorder='little').astype(bool)
+
+NO_FLOOR = -np.inf
+
+DEFAULT_BEHAVIOR_MODEL = BehaviorModel()
+
+# Social behaviors
+DEFAULT_BEHAVIOR_MODEL.register('approach_player', {'joy': 0.8, 'curiosity': 0.5, 'fear': -0.6})
+DEFAULT_BEHAVIOR_MODEL.register('give_gift', {'joy': 0.9, 'trust': 0.7})
+DEFAULT_BEHAVIOR_MODEL.register('wave_greeting', {'joy': 0.6, 'curiosity': 0.4})
+DEFAULT_BEHAVIOR_MODEL.register('follow_player', {'joy': 0.5, 'trust': 0.8, 'fear': -0.3})
+
+# Defensive behaviors
+DEFAULT_BEHAVIOR_MODEL.register('flee_from_player', {'fear': 0.9, 'anger': 0.3})
+DEFAULT_BEHAVIOR_MODEL.register('hide_indoors', {'fear': 0.8, 'sadness': 0.4})
+DEFAULT_BEHAVIOR_MODEL.register('call_for_help', {'fear': 0.7, 'anger': 0.5})
+DEFAULT_BEHAVIOR_MODEL.register('avoid_interaction', {'anger': 0.6, 'sadness': 0.7})
+
+# Work behaviors
+DEFAULT_BEHAVIOR_MODEL.register('work_efficiency', {'joy': 0.3, 'sadness': -0.4, 'fear': -0.2}, bias=1.0, floor=NO_FLOOR)
+DEFAULT_BEHAVIOR_MODEL.register('trading_willingness', {'joy': 0.4, 'trust': 0.6, 'anger': -0.8}, bias=1.0, floor=0.1)
 
-@dataclass
+# Exploration behaviors
+DEFAULT_BEHAVIOR_MODEL.register('explore_area', {'curiosity': 0.8, 'joy': 0.3, 'fear': -0.5})
+DEFAULT_BEHAVIOR_MODEL.register('investigate_sounds', {'curiosity': 0.7, 'fear': -0.4})
+
+@dataclass(slots=True)
 class GameEvent:
     event_type: str
     player_id: str
     intensity: float
-    context: Dict = None
+    context: Optional[Dict] = None
+
+# Default reach of an area-of-effect event (a raid or celebration across a village), in blocks
+BROADCAST_RADIUS = 32.0
+
+class BroadcastEvent(NamedTuple):
+    """An event felt by every villager in range of ``origin``, fading with distance along ``falloff``.
+    
+    ``origin=None`` gives global scope (weather, time of day): every
+    villager receives the full intensity, positioned or not.
+    """
+    event_type: str
+    intensity: float
+    origin: Optional[tuple] = None
+    radius: float = BROADCAST_RADIUS
+    falloff: str = 'linear'
+    player_id: str = ''
 
 class EmotionVector:
-    def __init__(self):
-        self.emotions = {
-            'joy': 0.0,
-            'anger': 0.0,
-            'fear': 0.0,
-            'sadness': 0.0,
-            'trust': 0.0,
-            'curiosity': 0.0
-        }
+    """Six emotions with lazily applied exponential decay.
+    
+    ``values`` holds the emotions as of ``last_update``; decay toward zero is
+    computed in closed form (``decay_rate ** elapsed``) only when the vector
+    is read or written, so an idle vector costs nothing between touches.
+    """
+    __slots__ = ('values', 'intensity', 'decay_rate', 'clock', 'last_update')
+    
+    def __init__(self, decay_rate: float = 0.98, clock: Callable[[], float] = time.time):
+        self.values = np.zeros(len(EMOTIONS))
         self.intensity = 1.0
-        self.last_update = time.time()
+        self.decay_rate = decay_rate
+        self.clock = clock
+        self.last_update = clock()
     
-    def update_emotion(self, emotion_delta: Dict[str, float], decay_rate: float = 0.98):
+    @property
+    def emotions(self) -> Dict[str, float]:
+        """Current (decayed) emotion values keyed by name"""
+        return emotion_dict(self.current_values())
+    
+    @emotions.setter
+    def emotions(self, emotions: Dict[str, float]):
+        self.values[:] = emotion_array(emotions)
+        self.last_update = self.clock()
+    
+    def current_values(self, now: Optional[float] = None) -> np.ndarray:
+        """Emotion vector decayed up to ``now`` (default: the clock), without storing it"""
+        if now is None:
+            now = self.clock()
+        return self.values * self.decay_rate ** (now - self.last_update)
+    
+    def materialize(self, now: Optional[float] = None):
+        """Fold pending decay into the stored values"""
+        if now is None:
+            now = self.clock()
+        values = self.values
+        values *= self.decay_rate ** (now - self.last_update)
+        self.last_update = now
+    
+    def update_emotion(self, emotion_delta: Dict[str, float], decay_rate: Optional[float] = None):
         """Update emotions with temporal decay"""
-        current_time = time.time()
-        time_passed = current_time - self.last_update
-        
-        # Apply temporal decay based on time passed
-        decay_factor = decay_rate ** time_passed
+        if decay_rate is not None:
+            self.decay_rate = decay_rate
         
-        for emotion in self.emotions:
-            # Apply decay
-            self.emotions[emotion] *= decay_factor
-            
-            # Add new emotion if present in delta
-            if emotion in emotion_delta:
-                new_value = self.emotions[emotion] + emotion_delta[emotion]
-                self.emotions[emotion] = np.clip(new_value, -1.0, 1.0)
-        
-        self.last_update = current_time
+        self.add(emotion_array(emotion_delta))
+    
+    def add(self, delta: np.ndarray):
+        """Decay up to now, then add a 6-float delta and clip"""
+        self.materialize()
+        values = self.values
+        values += delta
+        np.clip(values, -1.0, 1.0, out=values)
     
     def get_dominant_emotion(self) -> str:
         """Get the strongest emotion"""
-        return max(self.emotions.items(), key=lambda x: abs(x[1]))[0]
+        # Decay scales every emotion by the same factor, so the stored values rank the same
+        return EMOTIONS[int(np.argmax(np.abs(self.values)))]
     
     def get_emotional_state(self) -> Dict[str, float]:
         """Return current emotional state"""
-        return self.emotions.copy()
+        return emotion_dict(self.current_values())
     
     def blend_emotions(self, other_emotions: Dict[str, float], blend_factor: float = 0.1):
         """Blend with another emotion vector (for social contagion)"""
-        for emotion, value in other_emotions.items():
-            if emotion in self.emotions:
-                blended_value = self.emotions[emotion] * (1 - blend_factor) + value * blend_factor
-                self.emotions[emotion] = np.clip(blended_value, -1.0, 1.0)
+        self.materialize()
+        mask = np.array([emotion in other_emotions for emotion in EMOTIONS])
+        values = self.values
+        blended = values * (1 - blend_factor) + emotion_array(other_emotions) * blend_factor
+        values[mask] = np.clip(blended[mask], -1.0, 1.0)
 
 class VillagerPersonality:
-    def __init__(self):
-        self.traits = {
-            'emotional_stability': random.uniform(0.3, 0.8),
-            'socialness': random.uniform(0.2, 0.9),
-            'fearfulness': random.uniform(0.1, 0.7),
-            'optimism': random.uniform(0.2, 0.8),
-            'curiosity': random.uniform(0.3, 0.9)
-        }
+    __slots__ = ('values',)
+    
+    def __init__(self, rng: Optional[np.random.Generator] = None):
+        rng = rng if rng is not None else np.random.default_rng()
+        self.values = rng.uniform(*trait_bounds())
+    
+    @property
+    def traits(self) -> Dict[str, float]:
+        """Personality traits keyed by name (a copy of the underlying vector)"""
+        return dict(zip(TRAITS, self.values.tolist()))
+    
+    @traits.setter
+    def traits(self, traits: Dict[str, float]):
+        self.values[:] = [traits[trait] for trait in TRAITS]
     
     def modify_emotional_response(self, emotion_delta: Dict[str, float]) -> Dict[str, float]:
         """Modify emotion response based on personality - FIXED VERSION"""
-        modified_delta = emotion_delta.copy()
+        gains = dict(zip(EMOTIONS, personality_gains(self.values).tolist()))
+        stability = float(self.values[TRAIT_INDEX['emotional_stability']])
         
         # Apply personality modifiers only to emotions that exist in the response
-        for emotion in modified_delta:
-            if emotion == 'joy':
-                modified_delta[emotion] *= (1.0 + self.traits['optimism'])
-            elif emotion == 'fear':
-                modified_delta[emotion] *= (1.0 + self.traits['fearfulness'])
-            elif emotion == 'curiosity':
-                modified_delta[emotion] *= (1.0 + self.traits['curiosity'])
-            
-            # Apply emotional stability to all emotions
-            modified_delta[emotion] *= self.traits['emotional_stability']
+        return {emotion: value * gains.get(emotion, stability) for emotion, value in emotion_delta.items()}
+
+# How each emotion in a response moves a player's reputation
+REPUTATION_WEIGHTS = emotion_array({'joy': 0.5, 'trust': 0.7, 'anger': -0.8, 'fear': -0.3})
+
+class StringInterner:
+    """Maps strings to dense integer codes and back"""
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self._strings: List[str] = []
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._strings)
+    
+    def __contains__(self, string: str) -> bool:
+        return string in self._codes
+    
+    def intern(self, string: str) -> int:
+        """Code for a string, assigning the next free one if it is new"""
+        code = self._codes.get(string)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(string)
+                if code is None:
+                    # Append first so a reader never sees a code without its string
+                    self._strings.append(string)
+                    code = self._codes[string] = len(self._strings) - 1
+        return code
+    
+    def code(self, string: str) -> Optional[int]:
+        """Code for a string, or None if it was never interned"""
+        return self._codes.get(string)
+    
+    def string(self, code: int) -> str:
+        return self._strings[code]
+    
+    # Locks cannot be copied or pickled; a restored interner gets a fresh one
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+    
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+class EventCatalog(MutableMapping):
+    """Event types compiled to integer codes and 6-float base response vectors.
+    
+    Event type names are interned in ``types`` and code i's response is row i
+    of ``responses``, so handling an event is a row lookup and a vector scale
+    rather than copying and scaling a dict. One catalog is shared by every
+    villager and engine in the process (DEFAULT_EVENT_CATALOG) unless they
+    are given their own; memory records store the same codes. It still reads
+    and writes like the old ``{event_type: {emotion: value}}`` dict, and
+    assigning a new entry registers the event type at runtime. A villager's
+    or engine's ``event_responses`` is copied from the shared catalog on
+    first access, so edits made through it stay with that villager/engine.
+    """
+    def __init__(self, responses: Optional[Dict[str, Dict[str, float]]] = None,
+                 types: Optional[StringInterner] = None):
+        self.types = types if types is not None else StringInterner()
+        self._lock = threading.Lock()
+        self.responses = np.zeros((0, len(EMOTIONS)))
+        # Memory records intern event types without responses too; only registered codes are events
+        self._registered = np.zeros(0, dtype=bool)
+        for event_type, response in (responses or {}).items():
+            self.register(event_type, response)
+    
+    def register(self, event_type: str, response: Dict[str, float]) -> int:
+        """Add an event type (or replace its response) and return its code"""
+        code = self.types.intern(event_type)
+        with self._lock:
+            if code >= len(self.responses):
+                grow = len(self.types) - len(self.responses)
+                self.responses = np.vstack([self.responses, np.zeros((grow, len(EMOTIONS)))])
+                self._registered = np.append(self._registered, np.zeros(grow, dtype=bool))
+            self.responses[code] = emotion_array(response)
+            self._registered[code] = True
+        return code
+    
+    def copy(self) -> 'EventCatalog':
+        """Independent copy of the responses; the type interner stays shared so memory codes keep their meaning"""
+        catalog = EventCatalog(types=self.types)
+        with self._lock:
+            catalog.responses = self.responses.copy()
+            catalog._registered = self._registered.copy()
+        return catalog
+    
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+    
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    def code(self, event_type: str) -> Optional[int]:
+        """Code of a registered event type, or None"""
+        code = self.types.code(event_type)
+        if code is None or code >= len(self._registered) or not self._registered[code]:
+            return None
+        return code
+    
+    def response(self, event_type: str) -> Optional[np.ndarray]:
+        """Base response vector of an event type (a view into ``responses``), or None if unknown"""
+        code = self.code(event_type)
+        return None if code is None else self.responses[code]
+    
+    def __contains__(self, event_type) -> bool:
+        return self.code(event_type) is not None
+    
+    def __getitem__(self, event_type: str) -> Dict[str, float]:
+        response = self.response(event_type)
+        if response is None:
+            raise KeyError(event_type)
+        return {emotion: value for emotion, value in emotion_dict(response).items() if value}
+    
+    def __setitem__(self, event_type: str, response: Dict[str, float]):
+        self.register(event_type, response)
+    
+    def __delitem__(self, event_type: str):
+        code = self.code(event_type)
+        if code is None:
+            raise KeyError(event_type)
+        self._registered[code] = False
+        self.responses[code] = 0.0
+    
+    def __iter__(self) -> Iterator[str]:
+        return (self.types.string(code) for code in np.flatnonzero(self._registered).tolist())
+    
+    def __len__(self) -> int:
+        return int(self._registered.sum())
+    
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """Plain ``{event_type: {emotion: value}}`` copy (e.g. for JSON)"""
+        return {event_type: self[event_type] for event_type in self}
+
+DEFAULT_EVENT_CATALOG = EventCatalog(DEFAULT_EVENT_RESPONSES)
+
+class ReputationIndex:
+    """Village-wide reputation statistics per player, kept current as reputations change.
+    
+    For every player the index holds the sum, count, min and max of the
+    reputations villagers have of them, plus a recency-weighted mean in
+    which each villager's opinion counts ``decay_rate ** age`` (age since
+    that opinion last changed). Players are also kept sorted by mean
+    reputation, so ``top``/``bottom`` cost O(k), one player's stats O(1),
+    and each change O(log P) for P players.
+    
+    Min and max widen in O(1); when an extreme value moves inward or is
+    dropped, that player's bound is recomputed on the next read.
+    
+    RelationshipStore builds its index from the stored reputations on first
+    use and only maintains it from then on, so stores nobody queries (such
+    as each standalone villager's) pay nothing per interaction.
+    """
+    def __init__(self, store: 'RelationshipStore', decay_rate: float = 0.999):
+        self.store = store
+        self.decay_rate = decay_rate
+        self._sum = np.zeros(0)
+        self._count = np.zeros(0, dtype=np.int64)
+        self._min = np.zeros(0)
+        self._max = np.zeros(0)
+        self._stale = np.zeros(0, dtype=bool)
+        # Recency-weighted sums, both as of the player's _stamp time
+        self._weighted = np.zeros(0)
+        self._weight = np.zeros(0)
+        self._stamp = np.zeros(0)
+        # Per relationship slot: counted yet, and when its reputation last changed
+        self._tracked = np.zeros(0, dtype=bool)
+        self._changed = np.zeros(0)
+        # (mean, player code) pairs in ascending order, and each player's current key
+        self._ranked: List[tuple] = []
+        self._rank_key: Dict[int, float] = {}
+    
+    def __len__(self) -> int:
+        return len(self._rank_key)
+    
+    def _reserve(self, codes: np.ndarray):
+        players = max(len(self.store.players), int(codes.max()) + 1 if len(codes) else 0)
+        if players > len(self._sum):
+            capacity = max(16, 2 * players)
+            for name, fill in (('_sum', 0.0), ('_count', 0), ('_min', np.inf), ('_max', -np.inf), ('_stale', False),
+                               ('_weighted', 0.0), ('_weight', 0.0), ('_stamp', 0.0)):
+                old = getattr(self, name)
+                new = np.full(capacity, fill, dtype=old.dtype)
+                new[:len(old)] = old
+                setattr(self, name, new)
+        slots = len(self.store._reputation)
+        if slots > len(self._tracked):
+            self._tracked = np.concatenate([self._tracked, np.zeros(slots - len(self._tracked), dtype=bool)])
+            self._changed = np.concatenate([self._changed, np.zeros(slots - len(self._changed))])
+    
+    def _rebase(self, codes: np.ndarray, now: float):
+        # Age the weighted sums of the given players to ``now``
+        factor = self.decay_rate ** (now - self._stamp[codes])
+        self._weighted[codes] *= factor
+        self._weight[codes] *= factor
+        self._stamp[codes] = now
+    
+    def update(self, slots: np.ndarray, old: np.ndarray, now: float):
+        """Account for ``slots`` whose reputation changed from ``old`` to its stored value"""
+        codes = self.store._player[slots]
+        self._reserve(codes)
+        new = self.store._reputation[slots]
+        fresh = ~self._tracked[slots]
+        old = np.where(fresh, 0.0, old)
+        players = np.unique(codes)
+        self._rebase(players, now)
+        old_weight = np.where(fresh, 0.0, self.decay_rate ** (self._stamp[codes] - self._changed[slots]))
+        
+        moved_in = ~fresh & (((old <= self._min[codes]) & (new > old)) | ((old >= self._max[codes]) & (new < old)))
+        np.logical_or.at(self._stale, codes, moved_in)
+        np.minimum.at(self._min, codes, new)
+        np.maximum.at(self._max, codes, new)
+        np.add.at(self._sum, codes, new - old)
+        np.add.at(self._count, codes, fresh)
+        np.add.at(self._weighted, codes, new - old * old_weight)
+        np.add.at(self._weight, codes, 1.0 - old_weight)
+        self._tracked[slots] = True
+        self._changed[slots] = now
+        self._rerank(players)
+    
+    def load(self, slots: np.ndarray, changed: np.ndarray):
+        """Count bulk-inserted slots whose reputations last changed at ``changed`` (e.g. a snapshot's last_update)"""
+        if len(slots) == 0:
+            return
+        self._reserve(slots[:0])
+        self._tracked[slots] = False
+        self.update(slots, np.zeros(len(slots)), float(np.max(changed)))
+        self._changed[slots] = changed
+        codes = self.store._player[slots]
+        # update() counted the slots as changed just now; re-weight them by their real age
+        weight = self.decay_rate ** (self._stamp[codes] - changed)
+        np.add.at(self._weighted, codes, self.store._reputation[slots] * (weight - 1.0))
+        np.add.at(self._weight, codes, weight - 1.0)
+    
+    def remove(self, slots: np.ndarray):
+        """Stop counting ``slots`` (called before they are released)"""
+        self._reserve(slots[:0])
+        slots = slots[self._tracked[slots]]
+        if len(slots) == 0:
+            return
+        codes = self.store._player[slots]
+        old = self.store._reputation[slots]
+        weight = self.decay_rate ** (self._stamp[codes] - self._changed[slots])
+        np.logical_or.at(self._stale, codes, (old <= self._min[codes]) | (old >= self._max[codes]))
+        np.add.at(self._sum, codes, -old)
+        np.add.at(self._count, codes, -1)
+        np.add.at(self._weighted, codes, -old * weight)
+        np.add.at(self._weight, codes, -weight)
+        self._tracked[slots] = False
+        self._rerank(np.unique(codes))
+    
+    def _rerank(self, codes: np.ndarray):
+        for code, total, count in zip(codes.tolist(), self._sum[codes].tolist(), self._count[codes].tolist()):
+            previous = self._rank_key.pop(code, None)
+            if previous is not None:
+                del self._ranked[bisect.bisect_left(self._ranked, (previous, code))]
+            if count > 0:
+                key = total / count
+                bisect.insort(self._ranked, (key, code))
+                self._rank_key[code] = key
+            else:
+                self._sum[code] = 0.0
+                self._min[code], self._max[code] = np.inf, -np.inf
+                self._weighted[code] = self._weight[code] = 0.0
+                self._stale[code] = False
+    
+    def _refresh_extremes(self, code: int):
+        self._reserve(np.zeros(0, dtype=np.intp))
+        slots = np.flatnonzero((self.store._player == code) & self._tracked)
+        values = self.store._reputation[slots]
+        if len(values):
+            self._min[code], self._max[code] = values.min(), values.max()
+        else:
+            self._min[code], self._max[code] = np.inf, -np.inf
+        self._stale[code] = False
+    
+    def stats(self, player_id: str) -> Optional[Dict[str, float]]:
+        """sum, count, mean, min, max and recency-weighted mean of a player's reputation, None if unknown
+        
+        ``min``/``max`` are None when no opinion of the player is tracked.
+        """
+        code = self.store.players.code(player_id)
+        if code is None or code not in self._rank_key:
+            return None
+        if self._stale[code]:
+            self._refresh_extremes(code)
+        return {
+            'sum': float(self._sum[code]),
+            'count': int(self._count[code]),
+            'mean': self._rank_key[code],
+            # No tracked opinions left (e.g. all evicted): no extremes rather than +-inf
+            'min': float(self._min[code]) if np.isfinite(self._min[code]) else None,
+            'max': float(self._max[code]) if np.isfinite(self._max[code]) else None,
+            'decayed_mean': float(self._weighted[code] / self._weight[code]) if self._weight[code] > 0 else self._rank_key[code]
+        }
+    
+    def mean(self, player_id: str, default: float = 0.0) -> float:
+        """Average reputation of a player across the village"""
+        code = self.store.players.code(player_id)
+        return self._rank_key.get(code, default)
+    
+    def top(self, k: int = 10) -> List[tuple]:
+        """The ``k`` best-liked players as (player_id, mean reputation), best first"""
+        if k <= 0:
+            return []
+        return [(self.store.players.string(code), key) for key, code in reversed(self._ranked[-k:])]
+    
+    def bottom(self, k: int = 10) -> List[tuple]:
+        """The ``k`` most disliked players as (player_id, mean reputation), worst first"""
+        return [(self.store.players.string(code), key) for key, code in self._ranked[:k]]
+
+class RelationshipStore:
+    """Sparse villager x player relationships backed by NumPy columns.
+    
+    Each (villager row, player) pair that has interacted owns one slot in
+    flat arrays holding its six relationship emotions (lazily decayed like
+    EmotionVector), reputation and last-access time. Player ids are interned
+    to integer codes and a per-villager dict maps codes to slots, so nothing
+    is allocated per relationship beyond a dict entry. Freed slots are
+    reused.
+    
+    When ``max_relationships`` is set, inserting past the cap evicts the
+    least recently used eighth of the store; ``evict_stale`` drops
+    relationships untouched for longer than a given age.
+    """
+    def __init__(self, capacity: int = 1024, max_relationships: Optional[int] = None,
+                 decay_rate: float = 0.995, clock: Callable[[], float] = time.time,
+                 players: Optional[StringInterner] = None):
+        self.decay_rate = decay_rate
+        self.clock = clock
+        self.max_relationships = max_relationships
+        self.players = players if players is not None else StringInterner()
+        
+        self._emotions = np.zeros((capacity, len(EMOTIONS)))
+        self._last_update = np.zeros(capacity)
+        self._last_access = np.zeros(capacity)
+        self._reputation = np.zeros(capacity)
+        # When each slot's reputation last changed (weights the index's recency-weighted mean)
+        self._reputation_changed = np.zeros(capacity)
+        self._villager = np.full(capacity, -1, dtype=np.int64)
+        self._player = np.full(capacity, -1, dtype=np.int32)
+        self._rows: Dict[int, Dict[int, int]] = {}
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+        # Villager rows whose relationships changed since the last clear_dirty()
+        self.dirty_rows = set()
+        # Optional hook called with the villager rows of every relationship change (see VillageEmotionEngine)
+        self.on_change: Optional[Callable[[List[int]], None]] = None
+        self._reputation_index: Optional[ReputationIndex] = None
+    
+    def __len__(self) -> int:
+        return len(self._last_update) - len(self._free)
+    
+    @property
+    def reputation_index(self) -> ReputationIndex:
+        """Reputation aggregates per player, built on first access and kept current afterwards"""
+        if self._reputation_index is None:
+            index = ReputationIndex(self)
+            used = self._used_slots()
+            index.load(used, self._reputation_changed[used])
+            self._reputation_index = index
+        return self._reputation_index
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the slot arrays"""
+        return sum(array.nbytes for array in (self._emotions, self._last_update, self._last_access,
+                                              self._reputation, self._reputation_changed, self._villager,
+                                              self._player))
+    
+    def _grow(self):
+        old_capacity = len(self._last_update)
+        capacity = 2 * old_capacity
+        for name in ('_emotions', '_last_update', '_last_access', '_reputation', '_reputation_changed', '_villager',
+                     '_player'):
+            old = getattr(self, name)
+            new = np.full((capacity,) + old.shape[1:], -1 if name in ('_villager', '_player') else 0, dtype=old.dtype)
+            new[:old_capacity] = old
+            setattr(self, name, new)
+        self._free.extend(range(capacity - 1, old_capacity - 1, -1))
+    
+    def slot(self, row: int, player_id: str) -> Optional[int]:
+        """Slot of an existing relationship, or None"""
+        code = self.players.code(player_id)
+        if code is None:
+            return None
+        return self._rows.get(row, {}).get(code)
+    
+    def _slots_for(self, rows: np.ndarray, code: int, now: float) -> np.ndarray:
+        # Resolve the whole batch first so eviction runs once and never takes a slot the batch is using
+        slots = np.array([self._rows.get(row, {}).get(code, -1) for row in rows.tolist()], dtype=np.intp)
+        missing = np.flatnonzero(slots < 0)
+        if len(missing) == 0:
+            return slots
+        if self.max_relationships is not None:
+            overflow = len(self) + len(missing) - self.max_relationships
+            if overflow > 0:
+                self.evict_lru(max(overflow, self.max_relationships // 8), keep=slots[slots >= 0])
+        for i in missing.tolist():
+            row = int(rows[i])
+            if not self._free:
+                self._grow()
+            slot = slots[i] = self._rows.setdefault(row, {})[code] = self._free.pop()
+            self._emotions[slot] = 0.0
+            self._reputation[slot] = 0.0
+            self._last_update[slot] = now
+            self._last_access[slot] = now
+            self._villager[slot] = row
+            self._player[slot] = code
+        return slots
+    
+    def record(self, rows, player_id: str, responses: np.ndarray, now: Optional[float] = None):
+        """Fold (n, 6) responses into the relationships of ``rows`` with one player, then update reputation"""
+        rows = np.asarray(rows, dtype=np.intp).reshape(-1)
+        responses = np.asarray(responses, dtype=float).reshape(len(rows), len(EMOTIONS))
+        if now is None:
+            now = self.clock()
+        if len(rows) == 1:
+            self._record_one(int(rows[0]), self.players.intern(player_id), responses[0], now)
+            return
+        # A row listed twice is stored once, like the engine's emotion write; the last response wins
+        unique, last = np.unique(rows[::-1], return_index=True)
+        if len(unique) < len(rows):
+            keep = np.sort(len(rows) - 1 - last)
+            rows, responses = rows[keep], responses[keep]
+        code = self.players.intern(player_id)
+        slots = self._slots_for(rows, code, now)
+        self._changed_rows(rows.tolist())
+        
+        emotions = self._decayed(slots, now) + responses
+        self._emotions[slots] = np.clip(emotions, -1.0, 1.0)
+        self._last_update[slots] = now
+        self._last_access[slots] = now
+        self._add_reputation(slots, responses, now)
+    
+    def _slot_for(self, row: int, code: int, now: float) -> int:
+        slot = self._rows.get(row, {}).get(code)
+        if slot is None:
+            slot = int(self._slots_for(np.array([row]), code, now)[0])
+        return slot
+    
+    def _record_one(self, row: int, code: int, response: np.ndarray, now: float):
+        # record() for a single row (every standalone villager interaction) with scalar indexing:
+        # fancy indexing, np.unique and temporaries cost more than the arithmetic on one slot
+        slot = self._slot_for(row, code, now)
+        self._changed_rows([row])
+        emotions = self._emotions[slot]
+        emotions *= self.decay_rate ** (now - self._last_update[slot])
+        emotions += response
+        np.clip(emotions, -1.0, 1.0, out=emotions)
+        self._last_update[slot] = now
+        self._last_access[slot] = now
+        self._add_reputation_one(slot, response, now)
+    
+    def update_reputation(self, row: int, player_id: str, response: np.ndarray):
+        """Move one villager's reputation of a player by an emotional response"""
+        now = self.clock()
+        slot = self._slot_for(row, self.players.intern(player_id), now)
+        self._last_access[slot] = now
+        self._changed_rows([row])
+        self._add_reputation_one(slot, np.asarray(response, dtype=float).reshape(-1), now)
+    
+    def _add_reputation_one(self, slot: int, response: np.ndarray, now: float):
+        old = float(self._reputation[slot])
+        self._reputation[slot] = min(max(old + float(response @ REPUTATION_WEIGHTS) * 0.1, -1.0), 1.0)
+        self._reputation_changed[slot] = now
+        if self._reputation_index is not None:
+            self._reputation_index.update(np.array([slot]), np.array([old]), now)
+    
+    def _add_reputation(self, slots: np.ndarray, responses: np.ndarray, now: float):
+        # Positive emotions increase reputation, negative decrease it
+        change = responses @ REPUTATION_WEIGHTS * 0.1
+        old = self._reputation[slots]
+        self._reputation[slots] = np.clip(old + change, -1.0, 1.0)
+        self._reputation_changed[slots] = now
+        if self._reputation_index is not None:
+            self._reputation_index.update(slots, old, now)
+    
+    def _decayed(self, slots: np.ndarray, now: float) -> np.ndarray:
+        return self._emotions[slots] * self.decay_rate ** (now - self._last_update[slots])[:, None]
+    
+    def bias(self, row: int, player_id: str) -> np.ndarray:
+        """Current (decayed) relationship emotions, zeros if the pair never interacted"""
+        slot = self.slot(row, player_id)
+        if slot is None:
+            return np.zeros(len(EMOTIONS))
+        now = self.clock()
+        self._last_access[slot] = now
+        return self._decayed(np.array([slot]), now)[0]
+    
+    def biases(self, rows, player_ids: List[str], now: Optional[float] = None):
+        """Decayed relationship emotions (n, 6) and reputations (n,) for (row, player) pairs; zeros for strangers"""
+        rows = np.asarray(rows, dtype=np.intp).reshape(-1)
+        if now is None:
+            now = self.clock()
+        slots = np.array([
+            -1 if slot is None else slot
+            for slot in (self.slot(row, player_id) for row, player_id in zip(rows.tolist(), player_ids))
+        ], dtype=np.intp)
+        known = slots >= 0
+        bias = np.zeros((len(rows), len(EMOTIONS)))
+        reputation = np.zeros(len(rows))
+        bias[known] = self._decayed(slots[known], now)
+        reputation[known] = self._reputation[slots[known]]
+        self._last_access[slots[known]] = now
+        return bias, reputation
+    
+    def reputation(self, row: int, player_id: str, default: float = 0.0) -> float:
+        slot = self.slot(row, player_id)
+        return default if slot is None else float(self._reputation[slot])
+    
+    def reputations(self, row: int) -> Dict[str, float]:
+        """All reputations one villager holds, keyed by player id"""
+        slots = self._rows.get(row, {})
+        return {self.players.string(code): float(self._reputation[slot]) for code, slot in slots.items()}
+    
+    def reputation_entries(self, rows) -> tuple:
+        """(villager rows, player codes, reputations) of every relationship held by ``rows``"""
+        slots = np.array([slot for row in np.asarray(rows).tolist() for slot in self._rows.get(row, {}).values()],
+                         dtype=np.intp)
+        return self._villager[slots], self._player[slots], self._reputation[slots]
+    
+    def _changed_rows(self, rows: List[int]):
+        self.dirty_rows.update(rows)
+        if self.on_change is not None and rows:
+            self.on_change(rows)
+    
+    def _release(self, slots: np.ndarray):
+        if self._reputation_index is not None:
+            self._reputation_index.remove(slots)
+        rows = self._villager[slots].tolist()
+        for slot, row, code in zip(slots.tolist(), rows, self._player[slots].tolist()):
+            row_slots = self._rows[row]
+            del row_slots[code]
+            if not row_slots:
+                del self._rows[row]
+            self._free.append(slot)
+        self._villager[slots] = -1
+        self._player[slots] = -1
+        self._changed_rows(rows)
+    
+    def _used_slots(self) -> np.ndarray:
+        return np.flatnonzero(self._villager >= 0)
+    
+    def export(self, rows=None) -> Dict[str, np.ndarray]:
+        """Column arrays of every relationship (or only those of ``rows``)"""
+        if rows is None:
+            slots = self._used_slots()
+        else:
+            slots = np.array([slot for row in np.asarray(rows).tolist() for slot in self._rows.get(row, {}).values()], dtype=np.intp)
+        return {
+            'villager': self._villager[slots],
+            'player': self._player[slots],
+            'emotions': self._emotions[slots],
+            'last_update': self._last_update[slots],
+            'last_access': self._last_access[slots],
+            'reputation': self._reputation[slots]
+        }
+    
+    def drop_rows(self, rows):
+        """Forget every relationship held by the given villager rows"""
+        slots = [slot for row in np.asarray(rows).tolist() for slot in self._rows.get(row, {}).values()]
+        self._release(np.array(slots, dtype=np.intp))
+    
+    def load(self, villager: np.ndarray, player: np.ndarray, emotions: np.ndarray, last_update: np.ndarray,
+             last_access: np.ndarray, reputation: np.ndarray):
+        """Bulk-insert relationships (player codes must already belong to ``players``)"""
+        count = len(villager)
+        while len(self._free) < count:
+            self._grow()
+        slots = np.array(self._free[-count:][::-1], dtype=np.intp) if count else np.zeros(0, dtype=np.intp)
+        del self._free[len(self._free) - count:]
+        self._villager[slots] = villager
+        self._player[slots] = player
+        self._emotions[slots] = emotions
+        self._last_update[slots] = last_update
+        self._last_access[slots] = last_access
+        self._reputation[slots] = reputation
+        self._reputation_changed[slots] = last_update
+        for slot, row, code in zip(slots.tolist(), np.asarray(villager).tolist(), np.asarray(player).tolist()):
+            self._rows.setdefault(row, {})[code] = slot
+        if self._reputation_index is not None:
+            self._reputation_index.load(slots, self._reputation_changed[slots])
+    
+    def evict_lru(self, count: int, keep=None) -> int:
+        """Drop the ``count`` least recently used relationships, sparing the slots in ``keep``"""
+        used = self._used_slots()
+        if keep is not None and len(keep):
+            used = np.setdiff1d(used, keep)
+        if count <= 0 or len(used) == 0:
+            return 0
+        if count < len(used):
+            used = used[np.argpartition(self._last_access[used], count)[:count]]
+        self._release(used)
+        return len(used)
+    
+    def evict_stale(self, max_age: float) -> int:
+        """Drop relationships not touched for more than ``max_age`` seconds"""
+        used = self._used_slots()
+        stale = used[self._last_access[used] < self.clock() - max_age]
+        self._release(stale)
+        return len(stale)
+
+MEMORY_DTYPE = np.dtype([
+    ('player', np.int32),
+    ('event_type', np.int32),
+    ('response', np.float32, (len(EMOTIONS),)),
+    ('timestamp', np.float64)
+])
+
+class MemoryRing:
+    """Fixed-capacity ring buffer of event memories stored as a structured array.
+    
+    Records hold interned player and event-type codes, the six-float
+    response and a timestamp. Two small secondary indexes are maintained
+    as records enter and leave the ring: per-player sequence numbers (for
+    "last N from player X") and per-event-type running sums (for aggregate
+    responses). Timestamps are appended in clock order, so time windows are
+    found by binary search. Storage is allocated on the first append.
+    """
+    def __init__(self, capacity: int = 100, players: Optional[StringInterner] = None,
+                 event_types: Optional[StringInterner] = None):
+        self.capacity = capacity
+        self.players = players if players is not None else StringInterner()
+        self.event_types = event_types if event_types is not None else StringInterner()
+        self._records: Optional[np.ndarray] = None
+        self._count = 0
+        self._by_player: Dict[int, deque] = {}
+        self._event_sums: Dict[int, np.ndarray] = {}
+        self._event_counts: Dict[int, int] = {}
+    
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+    
+    def __iter__(self):
+        # Dict view kept for callers that used to iterate the old deque of dicts
+        for record in self.records():
+            yield self.as_dict(record)
+    
+    @property
+    def nbytes(self) -> int:
+        return 0 if self._records is None else self._records.nbytes
+    
+    def append(self, player_id: str, event_type: str, response: np.ndarray, timestamp: float):
+        """Store one memory, overwriting the oldest when full"""
+        if self.capacity <= 0:
+            return
+        if self._records is None:
+            self._records = np.zeros(self.capacity, MEMORY_DTYPE)
+        slot = self._count % self.capacity
+        if self._count >= self.capacity:
+            self._forget(self._records[slot])
+        
+        player = self.players.intern(player_id)
+        event = self.event_types.intern(event_type)
+        record = self._records[slot]
+        record['player'] = player
+        record['event_type'] = event
+        record['response'] = response
+        record['timestamp'] = timestamp
         
-        return modified_delta
+        self._by_player.setdefault(player, deque()).append(self._count)
+        if event not in self._event_sums:
+            self._event_sums[event] = np.zeros(len(EMOTIONS))
+            self._event_counts[event] = 0
+        self._event_sums[event] += record['response']
+        self._event_counts[event] += 1
+        self._count += 1
+    
+    def _forget(self, record: np.void):
+        player = int(record['player'])
+        sequence = self._by_player[player]
+        sequence.popleft()
+        if not sequence:
+            del self._by_player[player]
+        
+        event = int(record['event_type'])
+        self._event_counts[event] -= 1
+        if self._event_counts[event] == 0:
+            del self._event_sums[event]
+            del self._event_counts[event]
+        else:
+            self._event_sums[event] -= record['response']
+    
+    def load(self, records: np.ndarray):
+        """Replace the contents with ``records`` (oldest first, codes from this ring's interners)"""
+        self._records = None
+        self._count = 0
+        self._by_player.clear()
+        self._event_sums.clear()
+        self._event_counts.clear()
+        records = records[-self.capacity:] if self.capacity > 0 else records[:0]
+        if len(records) == 0:
+            return
+        self._records = np.zeros(self.capacity, MEMORY_DTYPE)
+        self._records[:len(records)] = records
+        self._count = len(records)
+        for sequence, record in enumerate(self._records[:self._count]):
+            player = int(record['player'])
+            event = int(record['event_type'])
+            self._by_player.setdefault(player, deque()).append(sequence)
+            if event not in self._event_sums:
+                self._event_sums[event] = np.zeros(len(EMOTIONS))
+                self._event_counts[event] = 0
+            self._event_sums[event] += record['response']
+            self._event_counts[event] += 1
+    
+    def records(self) -> np.ndarray:
+        """All stored memories, oldest first"""
+        if self._records is None:
+            return np.zeros(0, MEMORY_DTYPE)
+        if self._count <= self.capacity:
+            return self._records[:self._count]
+        start = self._count % self.capacity
+        return np.concatenate([self._records[start:], self._records[:start]])
+    
+    def last_from_player(self, player_id: str, n: int = 10) -> np.ndarray:
+        """The player's ``n`` most recent memories, oldest first"""
+        code = self.players.code(player_id)
+        sequence = self._by_player.get(code) if code is not None else None
+        if not sequence or n <= 0:
+            return np.zeros(0, MEMORY_DTYPE)
+        recent = list(sequence)[-n:]
+        return self._records[np.array(recent) % self.capacity]
+    
+    def in_window(self, start: float, end: float) -> np.ndarray:
+        """Memories with ``start <= timestamp < end``, oldest first"""
+        records = self.records()
+        timestamps = records['timestamp']
+        return records[np.searchsorted(timestamps, start, 'left'):np.searchsorted(timestamps, end, 'left')]
+    
+    def aggregate_by_event_type(self) -> Dict[str, Dict]:
+        """Count and mean response per event type over the stored memories"""
+        return {
+            self.event_types.string(event): {
+                'count': count,
+                'mean_response': emotion_dict(self._event_sums[event] / count)
+            }
+            for event, count in self._event_counts.items()
+        }
+    
+    def as_dict(self, record: np.void) -> Dict:
+        """Expand one record into the legacy memory dict"""
+        return {
+            'player_id': self.players.string(int(record['player'])),
+            'event_type': self.event_types.string(int(record['event_type'])),
+            'emotional_response': emotion_dict(record['response']),
+            'timestamp': float(record['timestamp'])
+        }
 
 class EmotionalMemory:
-    def __init__(self, max_memories: int = 100):
-        self.player_relationships = {}
-        self.event_memories = deque(maxlen=max_memories)
-        self.reputation_scores = {}
+    def __init__(self, max_memories: int = 100, clock: Callable[[], float] = time.time,
+                 relationships: Optional[RelationshipStore] = None, row: int = 0,
+                 event_types: Optional[StringInterner] = None):
+        self.clock = clock
+        self.relationships = relationships if relationships is not None else RelationshipStore(capacity=8, clock=clock)
+        self.row = row
+        if event_types is None:
+            event_types = DEFAULT_EVENT_CATALOG.types
+        self.event_memories = MemoryRing(max_memories, self.relationships.players, event_types)
+    
+    @property
+    def reputation_scores(self) -> Dict[str, float]:
+        """Reputation of every known player (a copy)"""
+        return self.relationships.reputations(self.row)
     
     def record_interaction(self, player_id: str, event_type: str, emotional_response: Dict[str, float]):
         """Record emotional interaction with player"""
-        timestamp = time.time()
-        
-        # Update player relationship
-        if player_id not in self.player_relationships:
-            self.player_relationships[player_id] = EmotionVector()
+        self.record_response(player_id, event_type, emotion_array(emotional_response))
+    
+    def record_response(self, player_id: str, event_type: str, response: np.ndarray):
+        """``record_interaction`` for a 6-float response vector"""
+        timestamp = self.clock()
         
-        self.player_relationships[player_id].update_emotion(emotional_response, decay_rate=0.995)
+        # Update player relationship and reputation
+        self.relationships.record([self.row], player_id, response, timestamp)
         
         # Store memory
-        memory = {
-            'player_id': player_id,
-            'event_type': event_type,
-            'emotional_response': emotional_response,
-            'timestamp': timestamp
-        }
-        self.event_memories.append(memory)
-        
-        # Update reputation
-        self.update_reputation(player_id, emotional_response)
+        self.event_memories.append(player_id, event_type, response, timestamp)
     
     def update_reputation(self, player_id: str, emotional_response: Dict[str, float]):
         """Update player reputation based on emotional response"""
-        if player_id not in self.reputation_scores:
-            self.reputation_scores[player_id] = 0.0
-        
-        # Positive emotions increase reputation, negative decrease it
-        reputation_change = (
-            emotional_response.get('joy', 0) * 0.5 +
-            emotional_response.get('trust', 0) * 0.7 -
-            emotional_response.get('anger', 0) * 0.8 -
-            emotional_response.get('fear', 0) * 0.3
-        )
-        
-        self.reputation_scores[player_id] += reputation_change * 0.1
-        self.reputation_scores[player_id] = np.clip(self.reputation_scores[player_id], -1.0, 1.0)
+        self.relationships.update_reputation(self.row, player_id, emotion_array(emotional_response))
+    
+    def get_reputation(self, player_id: str, default: float = 0.0) -> float:
+        """Reputation of a player, ``default`` if never met"""
+        return self.relationships.reputation(self.row, player_id, default)
     
     def get_player_bias(self, player_id: str) -> Dict[str, float]:
         """Get emotional bias toward specific player"""
-        if player_id in self.player_relationships:
-            return self.player_relationships[player_id].get_emotional_state()
-        return {'joy': 0, 'anger': 0, 'fear': 0, 'sadness': 0, 'trust': 0, 'curiosity': 0}
+        return emotion_dict(self.relationships.bias(self.row, player_id))
+
+# Standalone villagers lock a stripe chosen by villager id; engine views lock their engine's row stripes
+VILLAGER_LOCKS = StripedLock(256)
 
 class VillagerEmotionSystem:
-    def __init__(self, villager_id: str):
+    def __init__(self, villager_id: str, position: Optional[tuple] = None,
+                 clock: Callable[[], float] = time.time, rng: Optional[np.random.Generator] = None,
+                 behavior_model: BehaviorModel = DEFAULT_BEHAVIOR_MODEL,
+                 dialogue: DialogueRegistry = DEFAULT_DIALOGUE, instrumentation: Optional[Instrumentation] = None,
+                 event_catalog: EventCatalog = DEFAULT_EVENT_CATALOG):
         self.villager_id = villager_id
-        self.emotions = EmotionVector()
-        self.personality = VillagerPersonality()
-        self.memory = EmotionalMemory()
+        self.position = position
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.emotions = EmotionVector(clock=clock)
+        self.personality = VillagerPersonality(self.rng)
+        # Event responses come from a catalog shared by every villager instead of a per-villager dict
+        self.event_catalog = event_catalog
+        self._owns_catalog = False
+        self.memory = EmotionalMemory(clock=clock, event_types=event_catalog.types)
         
         # Behavior weights based on emotions
-        self.behavior_weights = {}
+        self.behavior_model = behavior_model
+        self.dialogue = dialogue
+        # Optional stage timers (see instrumentation.Instrumentation); None costs one check per event
+        self.instrumentation = instrumentation
         self.update_behavior_weights()
-        
-        # Event response mappings
-        self.event_responses = {
-            'player_gift': {'joy': 0.6, 'trust': 0.4},
-            'player_attack': {'anger': 0.8, 'fear': 0.3, 'trust': -0.5},
-            'player_trade': {'joy': 0.3, 'trust': 0.2},
-            'monster_nearby': {'fear': 0.7, 'sadness': 0.2},
-            'village_celebration': {'joy': 0.5, 'curiosity': 0.3},
-            'night_time': {'fear': 0.2, 'sadness': 0.1},
-            'sunny_weather': {'joy': 0.2, 'curiosity': 0.1}
-        }
+    
+    @property
+    def lock(self) -> threading.RLock:
+        """Lock guarding this villager's state (a stripe of VILLAGER_LOCKS shared with other villagers)"""
+        return VILLAGER_LOCKS.lock_for(hash(self.villager_id))
+    
+    @property
+    def event_responses(self) -> EventCatalog:
+        """This villager's event response table, copied from the shared catalog on first access"""
+        if not self._owns_catalog:
+            self.event_catalog = self.event_catalog.copy()
+            self._owns_catalog = True
+        return self.event_catalog
+    
+    @event_responses.setter
+    def event_responses(self, responses: Dict[str, Dict[str, float]]):
+        self.event_catalog = (responses if isinstance(responses, EventCatalog)
+                              else EventCatalog(responses, self.event_catalog.types))
+        self._owns_catalog = True
     
     def process_game_event(self, event: GameEvent):
         """Process a game event and update emotional state"""
-        if event.event_type in self.event_responses:
-            base_response = self.event_responses[event.event_type].copy()
-            
-            # Scale by event intensity
-            for emotion in base_response:
-                base_response[emotion] *= event.intensity
+        base_response = self.event_catalog.response(event.event_type)
+        if base_response is None:
+            return []
+        with self.lock:
+            trace = self.instrumentation.trace('process_game_event', event.event_type) if self.instrumentation is not None else None
             
-            # Apply personality modifiers
-            modified_response = self.personality.modify_emotional_response(base_response)
+            # Scale by event intensity and apply personality modifiers
+            modified_response = personality_gains(self.personality.values) * (base_response * event.intensity)
+            if trace is not None:
+                trace.mark('modify_emotional_response')
             
             # Update emotions
-            self.emotions.update_emotion(modified_response)
+            self.emotions.add(modified_response)
+            if trace is not None:
+                trace.mark('update_emotion')
             
             # Record in memory if player involved
             if event.player_id:
-                self.memory.record_interaction(event.player_id, event.event_type, modified_response)
+                self.memory.record_response(event.player_id, event.event_type, modified_response)
+                if trace is not None:
+                    trace.mark('record_interaction')
             
             # Update behavior weights
             self.update_behavior_weights()
+            if trace is not None:
+                trace.mark('update_behavior_weights')
             
-            return self.get_behavior_actions()
-        
-        return []
+            actions = self.get_behavior_actions()
+            if trace is not None:
+                trace.mark('get_behavior_actions')
+                trace.finish()
+            return actions
     
     def update_behavior_weights(self):
         """Update behavior action weights based on current emotions"""
-        emotions = self.emotions.get_emotional_state()
-        
-        self.behavior_weights = {
-            # Social behaviors
-            'approach_player': max(0, emotions['joy'] * 0.8 + emotions['curiosity'] * 0.5 - emotions['fear'] * 0.6),
-            'give_gift': max(0, emotions['joy'] * 0.9 + emotions['trust'] * 0.7),
-            'wave_greeting': max(0, emotions['joy'] * 0.6 + emotions['curiosity'] * 0.4),
-            'follow_player': max(0, emotions['joy'] * 0.5 + emotions['trust'] * 0.8 - emotions['fear'] * 0.3),
-            
-            # Defensive behaviors  
-            'flee_from_player': max(0, emotions['fear'] * 0.9 + emotions['anger'] * 0.3),
-            'hide_indoors': max(0, emotions['fear'] * 0.8 + emotions['sadness'] * 0.4),
-            'call_for_help': max(0, emotions['fear'] * 0.7 + emotions['anger'] * 0.5),
-            'avoid_interaction': max(0, emotions['anger'] * 0.6 + emotions['sadness'] * 0.7),
-            
-            # Work behaviors
-            'work_efficiency': 1.0 + emotions['joy'] * 0.3 - emotions['sadness'] * 0.4 - emotions['fear'] * 0.2,
-            'trading_willingness': max(0.1, 1.0 + emotions['joy'] * 0.4 + emotions['trust'] * 0.6 - emotions['anger'] * 0.8),
-            
-            # Exploration behaviors
-            'explore_area': max(0, emotions['curiosity'] * 0.8 + emotions['joy'] * 0.3 - emotions['fear'] * 0.5),
-            'investigate_sounds': max(0, emotions['curiosity'] * 0.7 - emotions['fear'] * 0.4)
-        }
+        self.behavior_vector = self.behavior_model.weights(self.emotions.current_values())
+    
+    @property
+    def behavior_weights(self) -> Dict[str, float]:
+        """Behavior weights keyed by name, built from ``behavior_vector`` only when asked for"""
+        return self.behavior_model.as_dict(self.behavior_vector)
+    
+    def compute_behavior_weights(self, emotions: Dict[str, float]) -> Dict[str, float]:
+        """Behavior action weights for an emotional state"""
+        return self.behavior_model.as_dict(self.behavior_model.weights(emotion_array(emotions)))
     
     def get_behavior_actions(self) -> List[str]:
         """Get list of actions villager should perform based on emotional state"""
-        actions = []
-        
-        for behavior, weight in self.behavior_weights.items():
-            # Use weight as probability threshold
-            if random.random() < weight:
-                actions.append(behavior)
-        
-        return actions
+        # Use weight as probability threshold
+        return self.behavior_model.actions(self.behavior_model.sample(self.behavior_vector, self.rng))
     
-    def process_social_contagion(self, nearby_villagers: List['VillagerEmotionSystem']):
+    def process_social_contagion(self, nearby_villagers: List['VillagerEmotionSystem'],
+                                 radius: float = CONTAGION_RADIUS, falloff: str = 'linear'):
         """Process emotional contagion from nearby villagers"""
         if not nearby_villagers:
             return
         
         # Average nearby emotions with distance weighting
-        social_emotions = {'joy': 0, 'anger': 0, 'fear': 0, 'sadness': 0, 'trust': 0, 'curiosity': 0}
-        total_weight = 0
+        curve = FALLOFF_CURVES[falloff]
+        social_emotions = np.zeros(len(EMOTIONS))
+        total_weight = 0.0
         
         for villager in nearby_villagers:
-            villager_emotions = villager.emotions.get_emotional_state()
-            # Simple distance weighting (could be enhanced with actual positions)
-            weight = 1.0 / len(nearby_villagers)
+            if self.position is not None and villager.position is not None:
+                distance = np.linalg.norm(np.subtract(villager.position, self.position))
+                weight = float(curve(distance, radius))
+            else:
+                # Without positions every neighbour counts equally
+                weight = 1.0
             
-            for emotion in social_emotions:
-                social_emotions[emotion] += villager_emotions[emotion] * weight
-            total_weight += weight
+            if weight > 0:
+                # Each neighbour is read under its own lock, never while holding ours, so contagion cannot deadlock
+                with villager.lock:
+                    state = villager.emotions.current_values()
+                social_emotions += state * weight
+                total_weight += weight
         
         # Normalize and apply social contagion
         if total_weight > 0:
-            for emotion in social_emotions:
-                social_emotions[emotion] /= total_weight
+            social_emotions /= total_weight
             
             # Blend with current emotions (stronger social villagers are more affected)
-            contagion_strength = self.personality.traits['socialness'] * 0.1
-            self.emotions.blend_emotions(social_emotions, contagion_strength)
+            with self.lock:
+                contagion_strength = self.personality.traits['socialness'] * 0.1
+                self.emotions.blend_emotions(emotion_dict(social_emotions), contagion_strength)
     
-    def generate_dialogue(self, player_id: str, topic: str = "general") -> str:
+    def generate_dialogue(self, player_id: str, topic: str = DEFAULT_TOPIC) -> str:
         """Generate contextual dialogue based on emotional state"""
-        emotions = self.emotions.get_emotional_state()
-        player_bias = self.memory.get_player_bias(player_id)
-        reputation = self.memory.reputation_scores.get(player_id, 0.0)
+        with self.lock:
+            player_bias = self.memory.relationships.bias(self.memory.row, player_id)
+            
+            # Determine dominant emotion considering player relationship
+            combined = self.emotions.current_values() + player_bias * BIAS_WEIGHT
+            mood = int(mood_buckets(combined[EMOTION_INDEX['joy']], combined[EMOTION_INDEX['anger']],
+                                    combined[EMOTION_INDEX['fear']]))
+            
+            # Reputation picks the line variant (suspicious / warm suffix)
+            band = int(reputation_bands(self.memory.get_reputation(player_id)))
+        responses = self.dialogue.lines_for(mood, band, topic)
+        return responses[int(self.rng.integers(len(responses)))]
+    
+    def get_status(self) -> Dict:
+        """Get current villager emotional and behavioral status"""
+        with self.lock:
+            return {
+                'villager_id': self.villager_id,
+                'emotions': self.emotions.get_emotional_state(),
+                'dominant_emotion': self.emotions.get_dominant_emotion(),
+                'personality': self.personality.traits,
+                'behavior_weights': self.behavior_weights,
+                'reputation_scores': self.memory.reputation_scores.copy(),
+                'recent_actions': self.get_behavior_actions()
+            }
+
+class _EngineEmotionVector(EmotionVector):
+    """EmotionVector whose values live in a row of a VillageEmotionEngine"""
+    __slots__ = ('_engine', '_row')
+    
+    def __init__(self, engine: 'VillageEmotionEngine', row: int):
+        self._engine = engine
+        self._row = row
+        self.intensity = 1.0
+    
+    @property
+    def values(self) -> np.ndarray:
+        return self._engine._emotions[self._row]
+    
+    @values.setter
+    def values(self, values: np.ndarray):
+        self._engine._emotions[self._row] = values
+    
+    @property
+    def last_update(self) -> float:
+        return float(self._engine._last_update[self._row])
+    
+    @last_update.setter
+    def last_update(self, timestamp: float):
+        # Every mutation of an EmotionVector ends by stamping last_update
+        self._engine._last_update[self._row] = timestamp
+        self._engine._touch(self._row)
+    
+    @property
+    def decay_rate(self) -> float:
+        return self._engine.decay_rate
+    
+    @decay_rate.setter
+    def decay_rate(self, decay_rate: float):
+        if decay_rate != self._engine.decay_rate:
+            raise ValueError("Decay rate of engine-backed villagers is set on the VillageEmotionEngine")
+    
+    @property
+    def clock(self) -> Callable[[], float]:
+        return self._engine.clock
+
+class _EnginePersonality(VillagerPersonality):
+    """VillagerPersonality whose traits live in a row of a VillageEmotionEngine"""
+    __slots__ = ('_engine', '_row')
+    
+    def __init__(self, engine: 'VillageEmotionEngine', row: int):
+        self._engine = engine
+        self._row = row
+    
+    @property
+    def values(self) -> np.ndarray:
+        return self._engine._traits[self._row]
+    
+    @values.setter
+    def values(self, values: np.ndarray):
+        self._engine._traits[self._row] = values
+        self._engine._touch(self._row)
+    
+    @VillagerPersonality.traits.setter
+    def traits(self, traits: Dict[str, float]):
+        VillagerPersonality.traits.fset(self, traits)
+        self._engine._touch(self._row)
+
+class _EngineVillager(VillagerEmotionSystem):
+    """VillagerEmotionSystem view onto one row of a VillageEmotionEngine"""
+    def __init__(self, engine: 'VillageEmotionEngine', row: int):
+        self.villager_id = engine._ids[row]
+        self.emotions = _EngineEmotionVector(engine, row)
+        self.personality = _EnginePersonality(engine, row)
+        self.memory = engine.memory(row)
+        self.behavior_model = engine.behavior_model
+        self.dialogue = engine.dialogue
+        self.rng = engine.rng
+        self._engine = engine
+        self._row = row
+    
+    @property
+    def position(self) -> Optional[tuple]:
+        position = self._engine._positions[self._row]
+        return None if np.isnan(position).any() else tuple(position.tolist())
+    
+    @position.setter
+    def position(self, position: Optional[tuple]):
+        self._engine.move_villagers([self._row], [position])
+    
+    @property
+    def behavior_vector(self) -> np.ndarray:
+        # Derived from the shared emotion array on demand so batched updates are never stale
+        return self.behavior_model.weights(self.emotions.current_values())
+    
+    @property
+    def behavior_weights(self) -> Dict[str, float]:
+        return self.behavior_model.as_dict(self.behavior_vector)
+    
+    def update_behavior_weights(self):
+        pass
+    
+    @property
+    def instrumentation(self) -> Optional[Instrumentation]:
+        return self._engine.instrumentation
+    
+    @property
+    def event_catalog(self) -> EventCatalog:
+        return self._engine.event_catalog
+    
+    @event_catalog.setter
+    def event_catalog(self, event_catalog: EventCatalog):
+        # Views share the engine's catalog, so this (and event_responses) applies to every villager
+        self._engine.event_catalog = event_catalog
+    
+    @property
+    def event_responses(self) -> EventCatalog:
+        """The engine's event response table: edits apply to every villager of the engine"""
+        return self._engine.event_responses
+    
+    @event_responses.setter
+    def event_responses(self, responses: Dict[str, Dict[str, float]]):
+        self._engine.event_responses = responses
+    
+    @property
+    def lock(self) -> threading.RLock:
+        return self._engine.row_locks.lock_for(self._row)
+    
+    def generate_dialogue(self, player_id: str, topic: str = DEFAULT_TOPIC) -> str:
+        # Through the engine, which reads the shared relationship store under its lock
+        return self._engine.generate_dialogue_many([self.villager_id], player_id, topic)[0]
+    
+    def get_status(self) -> Dict:
+        with self.lock, self._engine._lock:
+            return super().get_status()
+    
+    def process_game_event(self, event: GameEvent):
+        """Process a game event through the engine (so batching, logging and dirty tracking see it)"""
+        if event.event_type in self.event_catalog:
+            trace = self.instrumentation.trace('process_game_event') if self.instrumentation is not None else None
+            self._engine.apply_event(event, [self._row])
+            if trace is not None:
+                trace.mark('apply_event')
+            with self.lock:
+                actions = self.get_behavior_actions()
+            if trace is not None:
+                trace.mark('get_behavior_actions')
+                trace.finish()
+            return actions
         
-        # Determine dominant emotion considering player relationship
-        combined_joy = emotions['joy'] + player_bias.get('joy', 0) * 0.3
-        combined_anger = emotions['anger'] + player_bias.get('anger', 0) * 0.3
-        combined_fear = emotions['fear'] + player_bias.get('fear', 0) * 0.3
+        return []
+
+# Consecutive rows sharing a lock stripe; villages spawned together stay on a few stripes
+ROW_STRIPE = 1024
+
+class VillageEmotionEngine:
+    """Emotional state of a whole village stored as structure-of-arrays columns.
+    
+    Row i of ``emotions`` (N x 6), ``traits`` (N x 5), ``last_update`` (N)
+    and ``positions`` (N x 3) belongs to the i-th villager added. Events are
+    applied to any subset of rows with a single vectorized decay/scale/clip
+    pass, and ``villager()`` hands out VillagerEmotionSystem views that read
+    and write the same rows. Positioned villagers are kept in a chunk-aligned
+    spatial index so contagion only looks at nearby chunks.
+    
+    Decay is lazy: ``emotions`` holds each row as of its ``last_update`` and
+    only rows that are touched or read are decayed, so idle villagers cost
+    nothing per tick. ``current_emotions()`` is the vectorized bulk read.
+    Player relationships and reputations of all villagers share one
+    RelationshipStore.
+    
+    The engine is safe to drive from several threads. Emotion rows are
+    guarded by ``row_locks``, striped over blocks of ROW_STRIPE rows, so
+    events for villagers in different stripes are applied in parallel
+    (the NumPy work releases the GIL on large batches). Everything shared
+    by all rows - relationships, memories, positions and the spatial index,
+    the change counter and the event log - sits behind one short-held
+    engine lock, always taken after any row stripes. Contagion computes
+    from a snapshot copy of the emotions it reads, taken under the row
+    stripes, and blends the result into the live rows afterwards, so
+    events keep landing while neighbours are gathered.
+    """
+    def __init__(self, capacity: int = 64, decay_rate: float = 0.98, clock: Callable[[], float] = time.time,
+                 rng: Optional[np.random.Generator] = None, behavior_model: BehaviorModel = DEFAULT_BEHAVIOR_MODEL,
+                 max_relationships: Optional[int] = None, max_memories: int = 100,
+                 dialogue: DialogueRegistry = DEFAULT_DIALOGUE, instrumentation: Optional[Instrumentation] = None,
+                 event_catalog: EventCatalog = DEFAULT_EVENT_CATALOG, lock_stripes: int = 64):
+        self.decay_rate = decay_rate
+        self.clock = clock
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.behavior_model = behavior_model
+        self.dialogue = dialogue
+        self.event_catalog = event_catalog
+        self._owns_catalog = False
+        self.row_locks = StripedLock(lock_stripes, ROW_STRIPE)
+        self._lock = threading.RLock()
         
-        if combined_joy > 0.4:
-            responses = [
-                f"Hello there! It's wonderful to see you again!",
-                f"What a beautiful day! How can I help you?",
-                f"*cheerful sounds* Trading today?",
-                f"You always bring such good energy to our village!"
-            ]
-        elif combined_anger > 0.3:
-            responses = [
-                f"*grumbles* What do you want?",
-                f"I'm not in the mood for visitors right now.",
-                f"Haven't you caused enough trouble already?",
-                f"Make it quick. I have important things to do."
-            ]
-        elif combined_fear > 0.3:
-            responses = [
-                f"*nervous sounds* P-please don't hurt me...",
-                f"I... I don't have anything valuable...",
-                f"Are you here to cause trouble again?",
-                f"*whispers* Maybe you should talk to the iron golem instead..."
-            ]
-        else:
-            responses = [
-                f"Greetings, traveler. How may I assist you?",
-                f"Welcome to our village. What brings you here?",
-                f"*nods politely* Good to see you.",
-                f"The weather has been quite nice lately, hasn't it?"
-            ]
+        self._size = 0
+        self._emotions = np.zeros((capacity, len(EMOTIONS)))
+        self._traits = np.zeros((capacity, len(TRAITS)))
+        self._last_update = np.zeros(capacity)
+        self._positions = np.full((capacity, 3), np.nan)
+        self._dirty = np.zeros(capacity, dtype=bool)
+        # change_sequence value of each row's latest change (independent of the snapshot dirty flags)
+        self._changed = np.zeros(capacity, dtype=np.int64)
+        self._change_sequence = 0
+        self.spatial_index = ChunkSpatialIndex()
+        self._ids = []
+        self._index = {}
+        self.relationships = RelationshipStore(clock=clock, max_relationships=max_relationships)
+        # Reputation updates and evictions inside the store reach the change feed too
+        self.relationships.on_change = self._stamp_changed
+        self.max_memories = max_memories
+        # Memories and views are created on first access; a snapshot loader can back the memories
+        self._memories: List[Optional[EmotionalMemory]] = []
+        self._views: List[Optional[VillagerEmotionSystem]] = []
+        self._memory_loader: Optional[Callable[[int], Optional[np.ndarray]]] = None
+        # Snapshot directory this engine was last saved to / loaded from, and its size then
+        self._checkpoint_path: Optional[str] = None
+        self._saved_size = 0
+        # Optional recorder (see event_log.EventLogRecorder) notified of every state-changing call
+        self.event_log = None
+        # Optional stage timers (see instrumentation.Instrumentation) shared with every view
+        self.instrumentation = instrumentation
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __contains__(self, villager_id: str) -> bool:
+        return villager_id in self._index
+    
+    @property
+    def event_responses(self) -> EventCatalog:
+        """This engine's event response table, copied from the shared catalog on first access"""
+        if not self._owns_catalog:
+            self.event_catalog = self.event_catalog.copy()
+            self._owns_catalog = True
+        return self.event_catalog
+    
+    @event_responses.setter
+    def event_responses(self, responses: Dict[str, Dict[str, float]]):
+        # Keep the interner so event codes already stored in memories still decode
+        self.event_catalog = (responses if isinstance(responses, EventCatalog)
+                              else EventCatalog(responses, self.event_catalog.types))
+        self._owns_catalog = True
+    
+    @property
+    def event_types(self) -> StringInterner:
+        """Interner for the event-type codes stored in memory records"""
+        return self.event_catalog.types
+    
+    @property
+    def villager_ids(self) -> List[str]:
+        return list(self._ids)
+    
+    @property
+    def emotions(self) -> np.ndarray:
+        """(N, 6) stored emotion matrix (as of ``last_update``), columns ordered as EMOTIONS"""
+        return self._emotions[:self._size]
+    
+    @property
+    def traits(self) -> np.ndarray:
+        """(N, 5) personality matrix, columns ordered as TRAITS"""
+        return self._traits[:self._size]
+    
+    @property
+    def last_update(self) -> np.ndarray:
+        """(N,) timestamp of each villager's last emotion update"""
+        return self._last_update[:self._size]
+    
+    def current_emotions(self, rows=None, now: Optional[float] = None) -> np.ndarray:
+        """Decayed emotions for the given rows (default: everyone) without storing them"""
+        with self.row_locks.hold(rows):
+            rows = self._select(rows)
+            if now is None:
+                now = self.clock()
+            return self._emotions[rows] * self.decay_rate ** (now - self._last_update[rows])[:, None]
+    
+    def dominant_emotions(self, rows=None) -> List[str]:
+        """Dominant emotion name for each of the given rows"""
+        with self.row_locks.hold(rows):
+            rows = self._select(rows)
+            stored = self._emotions[rows]
+        return [EMOTIONS[column] for column in np.argmax(np.abs(stored), axis=1).tolist()]
+    
+    def behavior_weights(self, rows=None, now: Optional[float] = None) -> np.ndarray:
+        """(n, B) behavior weights for the given rows in one matmul"""
+        return self.behavior_model.weights(self.current_emotions(rows, now))
+    
+    def sample_actions(self, rows=None, now: Optional[float] = None) -> np.ndarray:
+        """(n, B) boolean action mask for the given rows from one vectorized draw"""
+        return self.behavior_model.sample(self.behavior_weights(rows, now), self.rng)
+    
+    def sample_action_bits(self, rows=None, now: Optional[float] = None) -> np.ndarray:
+        """Like ``sample_actions`` but packed into (n, ceil(B / 8)) uint8 bitsets"""
+        return self.behavior_model.pack(self.sample_actions(rows, now))
+    
+    def generate_dialogue_many(self, villager_ids: List[str], player_ids, topics=DEFAULT_TOPIC,
+                               now: Optional[float] = None) -> List[str]:
+        """Dialogue for many villagers at once; ``player_ids`` and ``topics`` may be one value or one per villager
         
-        # Add reputation-based modifier
-        selected_response = random.choice(responses)
-        if reputation < -0.5:
-            selected_response += " *eyes you suspiciously*"
-        elif reputation > 0.5:
-            selected_response += " *smiles warmly*"
+        Moods and reputation bands are bucketed for the whole batch with
+        array operations and lines are drawn from the compiled dialogue
+        table, matching ``generate_dialogue`` call for call.
+        """
+        rows = self.rows_for(villager_ids)
+        if isinstance(player_ids, str):
+            player_ids = [player_ids] * len(rows)
+        if now is None:
+            now = self.clock()
+        with self._lock:
+            bias, reputation = self.relationships.biases(rows, player_ids, now)
+        combined = self.current_emotions(rows, now) + bias * BIAS_WEIGHT
+        moods = mood_buckets(combined[:, EMOTION_INDEX['joy']], combined[:, EMOTION_INDEX['anger']],
+                             combined[:, EMOTION_INDEX['fear']])
+        return self.dialogue.select(moods, reputation_bands(reputation), topics, self.rng)
+    
+    def materialize(self, rows=None, now: Optional[float] = None):
+        """Fold pending decay into the stored emotions of the given rows"""
+        everyone = rows is None
+        with self.row_locks.hold(rows):
+            rows = self._select(rows)
+            if now is None:
+                now = self.clock()
+            if self.event_log is not None:
+                with self._lock:
+                    self.event_log.record_materialize(now, None if everyone else rows)
+            self._emotions[rows] = self.current_emotions(rows, now)
+            self._last_update[rows] = now
+            self._touch(rows)
+    
+    @property
+    def positions(self) -> np.ndarray:
+        """(N, 3) block positions (x, y, z); NaN rows are unplaced villagers"""
+        return self._positions[:self._size]
+    
+    def _reserve(self, capacity: int):
+        if capacity <= len(self._last_update):
+            return
+        capacity = max(capacity, 2 * len(self._last_update))
+        for name in ('_emotions', '_traits', '_last_update', '_positions', '_dirty', '_changed'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+    
+    def add_villager(self, villager_id: str, traits: Optional[Dict[str, float]] = None,
+                     position: Optional[tuple] = None) -> VillagerEmotionSystem:
+        """Add one villager and return its VillagerEmotionSystem view"""
+        trait_rows = None if traits is None else np.array([[traits[trait] for trait in TRAITS]])
+        self.add_villagers([villager_id], trait_rows, None if position is None else [position])
+        return self.villager(villager_id)
+    
+    def add_villagers(self, villager_ids: List[str], traits: Optional[np.ndarray] = None,
+                      positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """Add many villagers at once, rolling random traits unless given; returns their rows"""
+        villager_ids = list(villager_ids)
+        if len(set(villager_ids)) != len(villager_ids):
+            raise ValueError("Duplicate villager ids")
+        
+        # Growing reallocates every column, so nothing else may be running
+        with self.row_locks.hold(), self._lock:
+            for villager_id in villager_ids:
+                if villager_id in self._index:
+                    raise ValueError(f"Villager {villager_id!r} already exists")
+            
+            count = len(villager_ids)
+            start = self._size
+            self._reserve(start + count)
+            rows = np.arange(start, start + count)
+            
+            if traits is None:
+                low, high = trait_bounds()
+                traits = self.rng.uniform(low, high, (count, len(TRAITS)))
+            now = self.clock()
+            if self.event_log is not None:
+                self.event_log.record_spawn(now, villager_ids, traits)
+            self._traits[rows] = traits
+            self._emotions[rows] = 0.0
+            self._last_update[rows] = now
+            self._positions[rows] = np.nan
+            self._touch(rows)
+            self._size += count
+            
+            for row, villager_id in zip(rows.tolist(), villager_ids):
+                self._index[villager_id] = row
+            self._ids.extend(villager_ids)
+            self._memories.extend([None] * count)
+            self._views.extend([None] * count)
         
-        return selected_response
+        if positions is not None:
+            self.move_villagers(rows, positions)
+        return rows
     
-    def get_status(self) -> Dict:
-        """Get current villager emotional and behavioral status"""
+    def move_villagers(self, rows, positions):
+        """Set positions for the given rows; only chunk crossings touch the spatial index"""
+        with self._lock:
+            rows = self._select(rows)
+            new = np.array([(np.nan,) * 3 if position is None else position for position in positions], dtype=float).reshape(-1, 3)
+            if self.event_log is not None:
+                self.event_log.record_move(self.clock(), rows, new)
+            old = self._positions[rows]
+            self._positions[rows] = new
+            self._touch(rows)
+            
+            cell = self.spatial_index.cell_size
+            unplaced = np.isnan(new).any(axis=1)
+            crossed = unplaced | np.isnan(old).any(axis=1) | \
+                (np.floor(old[:, [0, 2]] / cell) != np.floor(new[:, [0, 2]] / cell)).any(axis=1)
+            for row in rows[crossed & unplaced].tolist():
+                if row in self.spatial_index:
+                    self.spatial_index.remove(row)
+            moved = crossed & ~unplaced
+            self.spatial_index.insert_many(rows[moved].tolist(), new[moved, 0], new[moved, 2])
+    
+    def rows_within(self, position: tuple, radius: float) -> np.ndarray:
+        """Rows of villagers within ``radius`` blocks of a position"""
+        with self._lock:
+            candidates = np.array(self.spatial_index.query_radius(position[0], position[2], radius), dtype=np.intp)
+            if len(candidates) == 0:
+                return candidates
+            distance = np.linalg.norm(self._positions[candidates] - np.asarray(position, dtype=float), axis=1)
+        return candidates[distance <= radius]
+    
+    def regional_reputation(self, player_id: str, position: tuple, radius: float) -> Optional[Dict[str, float]]:
+        """Reputation stats of a player among villagers within ``radius`` blocks, None if none of them know the player
+        
+        Village-wide figures are maintained incrementally by
+        ``relationships.reputation_index``; a region is summarized on demand
+        from the spatial index, so it costs O(villagers nearby).
+        """
+        code = self.relationships.players.code(player_id)
+        if code is None:
+            return None
+        rows = self.rows_within(position, radius).tolist()
+        with self._lock:
+            slots = [self.relationships._rows.get(row, {}).get(code) for row in rows]
+            reputation = self.relationships._reputation[[slot for slot in slots if slot is not None]]
+        if len(reputation) == 0:
+            return None
         return {
-            'villager_id': self.villager_id,
-            'emotions': self.emotions.get_emotional_state(),
-            'dominant_emotion': self.emotions.get_dominant_emotion(),
-            'personality': self.personality.traits,
-            'behavior_weights': self.behavior_weights,
-            'reputation_scores': self.memory.reputation_scores.copy(),
-            'recent_actions': self.get_behavior_actions()
+            'sum': float(reputation.sum()),
+            'count': len(reputation),
+            'mean': float(reputation.mean()),
+            'min': float(reputation.min()),
+            'max': float(reputation.max())
         }
+    
+    def contagion_tick(self, radius: float = CONTAGION_RADIUS, falloff: str = 'linear', halo=None,
+                       rows=None) -> np.ndarray:
+        """Blend positioned villagers toward the distance-weighted mood of their neighbours.
+        
+        Neighbours are gathered chunk by chunk from the spatial index, so the
+        cost grows with villager count times local density rather than N^2.
+        All villagers read the same pre-tick snapshot, copied under the row
+        locks; the blend is then applied to the live rows, so events that
+        land while neighbours are gathered are kept. Returns the rows that
+        had at least one neighbour in range.
+        
+        ``rows`` restricts which villagers are updated (default: everyone);
+        their neighbours are still drawn from the whole village, and only
+        the villagers involved are decayed.
+        
+        ``halo`` is an optional ``(positions (H, 3), emotions (H, 6))`` pair
+        of read-only neighbours owned elsewhere (e.g. by another shard): they
+        influence villagers in range but are not updated themselves. Halos
+        are not written to the event log.
+        """
+        curve = FALLOFF_CURVES[falloff]
+        trace = self.instrumentation.trace('contagion_tick') if self.instrumentation is not None else None
+        # Gather targets and neighbourhoods while positions and the spatial index hold still
+        with self._lock:
+            size = self._size
+            now = self.clock()
+            if self.event_log is not None:
+                self.event_log.record_contagion(now, radius, falloff, None if rows is None else self._select(rows))
+            local_cells = self.spatial_index.cells
+            cell_size = self.spatial_index.cell_size
+            if rows is None:
+                targets = {cell: np.fromiter(members, np.intp, len(members)) for cell, members in local_cells.items()}
+            else:
+                rows = self._select(rows)
+                rows = rows[~np.isnan(self._positions[rows]).any(axis=1)]
+                targets = {
+                    cell: rows[members]
+                    for cell, members in group_by_cell(self._positions[rows, 0], self._positions[rows, 2], cell_size).items()
+                }
+            
+            # Halo villagers join the neighbour pool as extra rows after the local ones
+            halo_cells, occupied = {}, local_cells
+            if halo is not None and len(halo[0]):
+                halo_positions = np.asarray(halo[0], dtype=float).reshape(-1, 3)
+                halo_cells = group_by_cell(halo_positions[:, 0], halo_positions[:, 2], cell_size)
+                occupied = set(local_cells) | set(halo_cells)
+            
+            # Member arrays of every cell a target cell reaches (built once per cell)
+            pools = dict(targets) if rows is None else {}
+            for cell, members in halo_cells.items():
+                local = pools[cell] if cell in pools else np.fromiter(local_cells.get(cell, ()), np.intp)
+                pools[cell] = np.concatenate([local, members + size])
+            neighbourhoods = {}
+            for cell in targets:
+                neighbours = []
+                for other in self.spatial_index.neighbor_cells(cell, radius, occupied):
+                    if other not in pools:
+                        pools[other] = np.fromiter(local_cells[other], np.intp, len(local_cells[other]))
+                    neighbours.append(pools[other])
+                neighbourhoods[cell] = np.concatenate(neighbours)
+            
+            # Villagers taking part (everyone for a full tick); a subset tick renumbers them
+            # 0..len(involved) - 1, halo after them, so its buffers scale with the batch, not the village
+            if rows is None:
+                involved = np.arange(size)
+            else:
+                involved = np.unique(np.concatenate([np.zeros(0, dtype=np.intp), *targets.values(),
+                                                     *neighbourhoods.values()]))
+                involved = involved[involved < size]
+                
+                def compact(indices: np.ndarray) -> np.ndarray:
+                    return np.where(indices < size, np.searchsorted(involved, indices), indices - size + len(involved))
+                
+                targets = {cell: compact(cell_rows) for cell, cell_rows in targets.items()}
+                neighbourhoods = {cell: compact(neighbours) for cell, neighbours in neighbourhoods.items()}
+            positions = self._positions[involved]
+            if halo_cells:
+                positions = np.concatenate([positions, halo_positions])
+        
+        # Back buffer: decayed copy of the villagers taking part
+        emotions = self.current_emotions(involved, now)
+        sources = emotions
+        if halo_cells:
+            sources = np.concatenate([emotions, np.asarray(halo[1], dtype=float).reshape(-1, len(EMOTIONS))])
+        
+        social = np.zeros((len(involved), len(EMOTIONS)))
+        total_weight = np.zeros(len(involved))
+        for cell, cell_rows in targets.items():
+            neighbours = neighbourhoods[cell]
+            offsets = positions[cell_rows][:, None, :] - positions[neighbours][None, :, :]
+            weights = curve(np.sqrt((offsets * offsets).sum(axis=2)), radius)
+            weights[cell_rows[:, None] == neighbours[None, :]] = 0.0
+            social[cell_rows] = weights @ sources[neighbours]
+            total_weight[cell_rows] = weights.sum(axis=1)
+        if trace is not None:
+            trace.mark('gather_neighbours')
+        
+        reached = np.flatnonzero(total_weight > 0)
+        active = involved[reached]
+        with self.row_locks.hold(active):
+            # Blend into the live rows so events applied since the snapshot are kept; the logged
+            # timestamp is reused so replays stay exact
+            strength = self._traits[active, TRAIT_INDEX['socialness']][:, None] * 0.1
+            blended = self.current_emotions(active, now) * (1 - strength) + social[reached] / total_weight[reached, None] * strength
+            self._emotions[active] = np.clip(blended, -1.0, 1.0)
+            self._last_update[active] = now
+            self._touch(active)
+        if trace is not None:
+            trace.mark('blend')
+            trace.finish()
+        return active
+    
+    def villager(self, villager_id: str) -> VillagerEmotionSystem:
+        """VillagerEmotionSystem view backed by this engine's arrays"""
+        with self._lock:
+            row = self._index[villager_id]
+            view = self._views[row]
+            if view is None:
+                view = self._views[row] = _EngineVillager(self, row)
+            return view
+    
+    def memory(self, row: int) -> EmotionalMemory:
+        """EmotionalMemory of a row, created (and loaded from a snapshot) on first access"""
+        memory = self._memories[row]
+        if memory is None:
+            with self._lock:
+                memory = self._memories[row]
+                if memory is None:
+                    memory = EmotionalMemory(self.max_memories, self.clock, self.relationships, row, self.event_types)
+                    if self._memory_loader is not None:
+                        records = self._memory_loader(row)
+                        if records is not None and len(records):
+                            memory.event_memories.load(records)
+                    self._memories[row] = memory
+        return memory
+    
+    def dirty_rows(self) -> np.ndarray:
+        """Rows whose emotions, traits, position, relationships or memories changed since clear_dirty()"""
+        with self._lock:
+            dirty = self._dirty[:self._size].copy()
+            dirty[[row for row in self.relationships.dirty_rows if row < self._size]] = True
+        return np.flatnonzero(dirty)
+    
+    def clear_dirty(self):
+        with self._lock:
+            self._dirty[:] = False
+            self.relationships.dirty_rows.clear()
+    
+    def _touch(self, rows):
+        with self._lock:
+            self._dirty[rows] = True
+            self._stamp_changed(rows)
+    
+    def _stamp_changed(self, rows):
+        with self._lock:
+            self._change_sequence += 1
+            self._changed[rows] = self._change_sequence
+    
+    @property
+    def change_sequence(self) -> int:
+        """Counter stamped on rows by every change; pass it back to rows_changed_since()"""
+        return self._change_sequence
+    
+    def rows_changed_since(self, sequence: int) -> np.ndarray:
+        """Rows whose emotions, traits, position or relationships changed after ``sequence``"""
+        return np.flatnonzero(self._changed[:self._size] > sequence)
+    
+    def changes_since(self, sequence: int) -> Tuple[np.ndarray, int]:
+        """rows_changed_since() and the change_sequence it is complete up to, read atomically"""
+        with self._lock:
+            return np.flatnonzero(self._changed[:self._size] > sequence), self._change_sequence
+    
+    def rows_for(self, villager_ids: List[str], missing: Optional[int] = None) -> np.ndarray:
+        """Row indices of the given villagers (unknown ids map to ``missing`` if given, else raise KeyError)"""
+        if missing is None:
+            return np.array([self._index[villager_id] for villager_id in villager_ids], dtype=np.intp)
+        return np.array([self._index.get(villager_id, missing) for villager_id in villager_ids], dtype=np.intp)
+    
+    def _select(self, rows) -> np.ndarray:
+        if rows is None:
+            return np.arange(self._size)
+        return np.asarray(rows, dtype=np.intp).reshape(-1)
+    
+    def apply_event(self, event: GameEvent, rows=None) -> np.ndarray:
+        """Apply one event to the given rows (default: everyone).
+        
+        Returns the personality-modified (len(rows), 6) response matrix, or
+        an empty matrix when the event type is unknown.
+        """
+        return self.apply_events([event], rows)[0]
+    
+    def apply_events(self, events: List[GameEvent], rows=None) -> List[np.ndarray]:
+        """Apply a batch of events in order to the given rows (default: everyone)"""
+        everyone = rows is None
+        with self.row_locks.hold(rows):
+            rows = self._select(rows)
+            trace = self.instrumentation.trace('apply_events') if self.instrumentation is not None else None
+            current_time = self.clock()
+            if self.event_log is not None:
+                with self._lock:
+                    self.event_log.record_events(current_time, events, None if everyone else rows)
+            
+            # Decay everyone touched once; later events in the batch see zero elapsed time
+            emotions = self.current_emotions(rows, current_time)
+            gains = personality_gains(self._traits[rows])
+            if trace is not None:
+                trace.mark('decay')
+            
+            responses = []
+            for event in events:
+                base_response = self.event_catalog.response(event.event_type)
+                if base_response is None:
+                    responses.append(np.zeros((0, len(EMOTIONS))))
+                    continue
+                if trace is not None:
+                    self.instrumentation.count_event(event.event_type)
+                    self.instrumentation.count('villager_events', len(rows))
+                response = gains * (base_response * event.intensity)
+                emotions += response
+                np.clip(emotions, -1.0, 1.0, out=emotions)
+                responses.append(response)
+                if trace is not None:
+                    trace.mark('respond')
+                
+                # Record in memory if player involved
+                if event.player_id:
+                    self._record_interactions(rows, event.player_id, event.event_type, response, current_time)
+                    if trace is not None:
+                        trace.mark('record_interactions')
+            
+            self._emotions[rows] = emotions
+            self._last_update[rows] = current_time
+            self._touch(rows)
+            if trace is not None:
+                trace.mark('store')
+                trace.finish()
+            return responses
+    
+    def broadcast(self, event: BroadcastEvent) -> np.ndarray:
+        """Apply an area-of-effect or global event in one batched update; returns the rows it reached.
+        
+        Each villager within ``event.radius`` of the origin receives
+        ``intensity * falloff(distance)``; villagers the curve fades to zero
+        are left alone. Without a player there are no memory or
+        relationship writes, so a raid on a whole town is one vectorized
+        ``apply_event_batch``.
+        """
+        if event.origin is None:
+            rows = self._select(None)
+            intensities = np.full(len(rows), float(event.intensity))
+        else:
+            curve = FALLOFF_CURVES[event.falloff]
+            origin = np.asarray(event.origin, dtype=float)
+            rows = self.rows_within(origin, event.radius)
+            with self._lock:
+                distance = np.linalg.norm(self._positions[rows] - origin, axis=1)
+            intensities = event.intensity * curve(distance, event.radius)
+            reached = intensities > 0
+            rows, intensities = rows[reached], intensities[reached]
+        if len(rows):
+            self.apply_event_batch(event.event_type, event.player_id, rows, intensities)
+        return rows
+    
+    def apply_event_batch(self, event_type: str, player_id: str, rows, intensities) -> np.ndarray:
+        """Apply one event type to distinct rows, each with its own intensity.
+        
+        This is the coalesced form used by ingestion pipelines: every row is
+        decayed once and receives ``intensity * response`` in a single pass.
+        """
+        rows = self._select(rows)
+        base_response = self.event_catalog.response(event_type)
+        if base_response is None:
+            return np.zeros((0, len(EMOTIONS)))
+        with self.row_locks.hold(rows):
+            trace = self.instrumentation.trace('apply_event_batch', event_type) if self.instrumentation is not None else None
+            current_time = self.clock()
+            if self.event_log is not None:
+                with self._lock:
+                    self.event_log.record_batch(current_time, event_type, player_id, rows, intensities)
+            
+            intensities = np.broadcast_to(np.asarray(intensities, dtype=float), rows.shape)
+            response = personality_gains(self._traits[rows]) * (base_response * intensities[:, None])
+            emotions = self.current_emotions(rows, current_time) + response
+            self._emotions[rows] = np.clip(emotions, -1.0, 1.0)
+            self._last_update[rows] = current_time
+            self._touch(rows)
+            if trace is not None:
+                self.instrumentation.count('villager_events', len(rows))
+                trace.mark('respond')
+            
+            if player_id:
+                self._record_interactions(rows, player_id, event_type, response, current_time)
+                if trace is not None:
+                    trace.mark('record_interactions')
+            if trace is not None:
+                trace.finish()
+            return response
+    
+    def _record_interactions(self, rows: np.ndarray, player_id: str, event_type: str, response: np.ndarray,
+                             timestamp: float):
+        with self._lock:
+            self.relationships.record(rows, player_id, response, timestamp)
+            
+            for row, values in zip(rows.tolist(), response):
+                self.memory(row).event_memories.append(player_id, event_type, values, timestamp)
@@ -0,0 +1,324 @@
+import json
+import os
+import struct
+import numpy as np
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+from emotion_engine import (EMOTIONS, TRAITS, GameEvent, SimulatedClock, StringInterner,
+                            VillageEmotionEngine)
+
+# File layout: LOG_MAGIC, a uint16 version, then frames of
+# (uint8 kind, float64 timestamp, uint32 payload length) + payload.
+# Strings (villager ids, player ids, event types, falloff names) are interned
+# into a log-wide table: a STRINGS frame defines new codes just before the
+# first frame that uses them, so the file can be appended to indefinitely.
+# Version 2 appended the rows of subset contagion ticks to CONTAGION frames;
+# version 1 logs are still read (their contagion ticks covered every row).
+LOG_MAGIC = b'VELG'
+LOG_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+HEADER = struct.Struct('<4sH')
+FRAME = struct.Struct('<BdI')
+
+KIND_STRINGS = 1
+KIND_CONFIG = 2
+KIND_SPAWN = 3
+KIND_STATE = 4
+KIND_MOVE = 5
+KIND_EVENTS = 6
+KIND_BATCH = 7
+KIND_CONTAGION = 8
+KIND_MATERIALIZE = 9
+
+KIND_NAMES = {
+    KIND_CONFIG: 'config',
+    KIND_SPAWN: 'spawn',
+    KIND_STATE: 'state',
+    KIND_MOVE: 'move',
+    KIND_EVENTS: 'events',
+    KIND_BATCH: 'batch',
+    KIND_CONTAGION: 'contagion',
+    KIND_MATERIALIZE: 'materialize'
+}
+
+NO_STRING = 0xFFFFFFFF
+ALL_ROWS = -1
+
+EVENT_ENTRY = struct.Struct('<IId')
+
+class EventLogError(ValueError):
+    """Raised for files that are not (compatible) event logs"""
+
+class LogRecord(NamedTuple):
+    kind: str
+    timestamp: float
+    data: Dict
+
+def _rows_payload(rows: Optional[np.ndarray]) -> bytes:
+    if rows is None:
+        return struct.pack('<i', ALL_ROWS)
+    rows = np.asarray(rows, dtype='<i4')
+    return struct.pack('<i', len(rows)) + rows.tobytes()
+
+def _read_rows(payload: memoryview, offset: int):
+    (count,) = struct.unpack_from('<i', payload, offset)
+    offset += 4
+    if count == ALL_ROWS:
+        return None, offset
+    rows = np.frombuffer(payload, '<i4', count, offset).astype(np.intp)
+    return rows, offset + 4 * count
+
+class EventLogRecorder:
+    """Append-only binary recorder of everything that changes a VillageEmotionEngine.
+
+    ``attach(engine)`` writes the engine configuration (including the event
+    response table) and, if the engine is already populated, its villagers
+    and current emotions; from then on the engine reports spawns, moves,
+    events, coalesced batches, contagion ticks and materializations with the
+    timestamps it used. Relationships and memories that existed before
+    attaching are not captured, so attach before the first event for an
+    exact replay.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._strings = StringInterner()
+        self._pending_strings: List[int] = []
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            version = log_version(path)
+            if version != LOG_VERSION:
+                raise EventLogError(f"Cannot append version {LOG_VERSION} frames to a version {version} log")
+            # Continue the existing string table so old codes stay valid
+            for code, string in _read_string_table(path):
+                self._strings.intern(string)
+        self._file = open(path, 'ab')
+        if not exists:
+            self._file.write(HEADER.pack(LOG_MAGIC, LOG_VERSION))
+
+    def __enter__(self) -> 'EventLogRecorder':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def attach(self, engine: VillageEmotionEngine):
+        """Start recording an engine"""
+        now = engine.clock()
+        config = {
+            'decay_rate': engine.decay_rate,
+            'relationship_decay_rate': engine.relationships.decay_rate,
+            'max_relationships': engine.relationships.max_relationships,
+            'max_memories': engine.max_memories,
+            'event_responses': engine.event_catalog.as_dict()
+        }
+        self._write(KIND_CONFIG, now, json.dumps(config).encode('utf-8'))
+        if len(engine):
+            rows = np.arange(len(engine))
+            self.record_spawn(now, engine.villager_ids, engine.traits)
+            self.record_move(now, rows, engine.positions)
+            payload = engine.emotions.astype('<f8').tobytes() + engine.last_update.astype('<f8').tobytes()
+            self._write(KIND_STATE, now, struct.pack('<I', len(engine)) + payload)
+        engine.event_log = self
+
+    def detach(self, engine: VillageEmotionEngine):
+        if engine.event_log is self:
+            engine.event_log = None
+        self.flush()
+
+    def _code(self, string: Optional[str]) -> int:
+        if not string:
+            return NO_STRING
+        if string not in self._strings:
+            self._pending_strings.append(self._strings.intern(string))
+        return self._strings.code(string)
+
+    def _write(self, kind: int, timestamp: float, payload: bytes):
+        if self._pending_strings:
+            parts = [struct.pack('<I', len(self._pending_strings))]
+            for code in self._pending_strings:
+                encoded = self._strings.string(code).encode('utf-8')
+                parts.append(struct.pack('<IH', code, len(encoded)) + encoded)
+            self._pending_strings = []
+            strings = b''.join(parts)
+            self._file.write(FRAME.pack(KIND_STRINGS, timestamp, len(strings)) + strings)
+        self._file.write(FRAME.pack(kind, timestamp, len(payload)) + payload)
+
+    def record_spawn(self, timestamp: float, villager_ids: List, traits: np.ndarray):
+        # Ids are JSON-encoded so non-string ids (e.g. ints) survive the round trip
+        codes = np.array([self._code(json.dumps(villager_id)) for villager_id in villager_ids], dtype='<u4')
+        traits = np.asarray(traits, dtype='<f8').reshape(len(codes), len(TRAITS))
+        self._write(KIND_SPAWN, timestamp, struct.pack('<I', len(codes)) + codes.tobytes() + traits.tobytes())
+
+    def record_move(self, timestamp: float, rows: np.ndarray, positions: np.ndarray):
+        positions = np.asarray(positions, dtype='<f8').reshape(-1, 3)
+        self._write(KIND_MOVE, timestamp, _rows_payload(rows) + positions.tobytes())
+
+    def record_events(self, timestamp: float, events: List[GameEvent], rows: Optional[np.ndarray]):
+        entries = b''.join(
+            EVENT_ENTRY.pack(self._code(event.event_type), self._code(event.player_id), event.intensity)
+            for event in events
+        )
+        self._write(KIND_EVENTS, timestamp, struct.pack('<I', len(events)) + entries + _rows_payload(rows))
+
+    def record_batch(self, timestamp: float, event_type: str, player_id: str, rows: np.ndarray, intensities):
+        intensities = np.broadcast_to(np.asarray(intensities, dtype='<f8'), np.shape(rows))
+        header = struct.pack('<II', self._code(event_type), self._code(player_id))
+        self._write(KIND_BATCH, timestamp, header + _rows_payload(rows) + np.ascontiguousarray(intensities).tobytes())
+
+    def record_contagion(self, timestamp: float, radius: float, falloff: str, rows: Optional[np.ndarray] = None):
+        self._write(KIND_CONTAGION, timestamp, struct.pack('<dI', radius, self._code(falloff)) + _rows_payload(rows))
+
+    def record_materialize(self, timestamp: float, rows: Optional[np.ndarray]):
+        self._write(KIND_MATERIALIZE, timestamp, _rows_payload(rows))
+
+def _read_header(handle, path: str) -> int:
+    header = handle.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise EventLogError(f"{path} is too short to be an event log")
+    magic, version = HEADER.unpack(header)
+    if magic != LOG_MAGIC:
+        raise EventLogError(f"{path} is not an event log")
+    if version not in READABLE_VERSIONS:
+        raise EventLogError(f"Unsupported event log version {version} (expected one of {READABLE_VERSIONS})")
+    return version
+
+def log_version(path: str) -> int:
+    """Format version of an event log file"""
+    with open(path, 'rb') as handle:
+        return _read_header(handle, path)
+
+def _frames(path: str) -> Iterator:
+    with open(path, 'rb') as handle:
+        _read_header(handle, path)
+        while True:
+            frame = handle.read(FRAME.size)
+            if len(frame) < FRAME.size:
+                return
+            kind, timestamp, length = FRAME.unpack(frame)
+            payload = handle.read(length)
+            if len(payload) < length:
+                # A torn final frame (e.g. the server died mid-write) ends the log
+                return
+            yield kind, timestamp, memoryview(payload)
+
+def _decode_strings(payload: memoryview) -> Iterator:
+    (count,) = struct.unpack_from('<I', payload, 0)
+    offset = 4
+    for _ in range(count):
+        code, length = struct.unpack_from('<IH', payload, offset)
+        offset += 6
+        yield code, bytes(payload[offset:offset + length]).decode('utf-8')
+        offset += length
+
+def _read_string_table(path: str) -> Iterator:
+    for kind, _, payload in _frames(path):
+        if kind == KIND_STRINGS:
+            yield from _decode_strings(payload)
+
+def read_log(path: str) -> Iterator[LogRecord]:
+    """Decode an event log into LogRecords, oldest first"""
+    version = log_version(path)
+    strings: Dict[int, str] = {NO_STRING: ''}
+    for kind, timestamp, payload in _frames(path):
+        if kind == KIND_STRINGS:
+            strings.update(_decode_strings(payload))
+            continue
+        if kind == KIND_CONFIG:
+            data = json.loads(bytes(payload).decode('utf-8'))
+        elif kind == KIND_SPAWN:
+            (count,) = struct.unpack_from('<I', payload, 0)
+            codes = np.frombuffer(payload, '<u4', count, 4)
+            traits = np.frombuffer(payload, '<f8', count * len(TRAITS), 4 + 4 * count).reshape(count, len(TRAITS))
+            data = {'villager_ids': [json.loads(strings[code]) for code in codes.tolist()], 'traits': traits}
+        elif kind == KIND_STATE:
+            (count,) = struct.unpack_from('<I', payload, 0)
+            emotions = np.frombuffer(payload, '<f8', count * len(EMOTIONS), 4).reshape(count, len(EMOTIONS))
+            last_update = np.frombuffer(payload, '<f8', count, 4 + 8 * count * len(EMOTIONS))
+            data = {'emotions': emotions, 'last_update': last_update}
+        elif kind == KIND_MOVE:
+            rows, offset = _read_rows(payload, 0)
+            data = {'rows': rows, 'positions': np.frombuffer(payload, '<f8', offset=offset).reshape(-1, 3)}
+        elif kind == KIND_EVENTS:
+            (count,) = struct.unpack_from('<I', payload, 0)
+            events = []
+            for i in range(count):
+                event_type, player_id, intensity = EVENT_ENTRY.unpack_from(payload, 4 + i * EVENT_ENTRY.size)
+                events.append(GameEvent(strings[event_type], strings[player_id], intensity))
+            rows, _ = _read_rows(payload, 4 + count * EVENT_ENTRY.size)
+            data = {'events': events, 'rows': rows}
+        elif kind == KIND_BATCH:
+            event_type, player_id = struct.unpack_from('<II', payload, 0)
+            rows, offset = _read_rows(payload, 8)
+            data = {
+                'event_type': strings[event_type],
+                'player_id': strings[player_id],
+                'rows': rows,
+                'intensities': np.frombuffer(payload, '<f8', offset=offset)
+            }
+        elif kind == KIND_CONTAGION:
+            radius, falloff = struct.unpack_from('<dI', payload, 0)
+            rows, _ = _read_rows(payload, 12) if version >= 2 else (None, 12)
+            data = {'radius': radius, 'falloff': strings[falloff], 'rows': rows}
+        elif kind == KIND_MATERIALIZE:
+            rows, _ = _read_rows(payload, 0)
+            data = {'rows': rows}
+        else:
+            raise EventLogError(f"Unknown frame kind {kind}")
+        yield LogRecord(KIND_NAMES[kind], timestamp, data)
+
+def replay_log(path: str, event_responses: Optional[Dict[str, Dict[str, float]]] = None,
+               decay_rate: Optional[float] = None, on_record: Optional[Callable[[VillageEmotionEngine, LogRecord], None]] = None,
+               **engine_options) -> VillageEmotionEngine:
+    """Re-run a recorded session on a simulated clock, as fast as the CPU allows.
+
+    The engine is rebuilt from the log's config frame and every recorded
+    call is repeated at its recorded timestamp, so an unmodified replay ends
+    in exactly the live run's state. ``event_responses`` and ``decay_rate``
+    override the recorded values for offline tuning, and ``on_record`` is
+    called after each record (e.g. to sample metrics over time).
+    ``engine_options`` go to the VillageEmotionEngine constructor.
+    """
+    clock = SimulatedClock()
+    engine: Optional[VillageEmotionEngine] = None
+    for record in read_log(path):
+        clock.set(record.timestamp)
+        data = record.data
+        if record.kind == 'config':
+            if engine is None:
+                engine = VillageEmotionEngine(
+                    decay_rate=data['decay_rate'] if decay_rate is None else decay_rate,
+                    clock=clock, max_relationships=data['max_relationships'],
+                    max_memories=data['max_memories'], **engine_options
+                )
+                engine.relationships.decay_rate = data['relationship_decay_rate']
+                engine.event_responses = data['event_responses'] if event_responses is None else event_responses
+            continue
+        if engine is None:
+            raise EventLogError(f"{path} has no config frame before its first record")
+        if record.kind == 'spawn':
+            engine.add_villagers(data['villager_ids'], data['traits'])
+        elif record.kind == 'state':
+            rows = np.arange(len(data['emotions']))
+            engine.emotions[rows] = data['emotions']
+            engine.last_update[rows] = data['last_update']
+        elif record.kind == 'move':
+            engine.move_villagers(data['rows'], data['positions'])
+        elif record.kind == 'events':
+            engine.apply_events(data['events'], data['rows'])
+        elif record.kind == 'batch':
+            engine.apply_event_batch(data['event_type'], data['player_id'], data['rows'], data['intensities'])
+        elif record.kind == 'contagion':
+            engine.contagion_tick(data['radius'], data['falloff'], rows=data['rows'])
+        elif record.kind == 'materialize':
+            engine.materialize(data['rows'])
+        if on_record is not None:
+            on_record(engine, record)
+    if engine is None:
+        raise EventLogError(f"{path} contains no records")
+    return engine
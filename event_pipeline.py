@@ -0,0 +1,266 @@
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+from emotion_engine import GameEvent, VillageEmotionEngine
+
+OVERFLOW_POLICIES = ('block', 'drop_newest', 'drop_oldest')
+
+class QueueFullError(RuntimeError):
+    """Raised into a submission's future when backpressure drops it"""
+
+class _Pending:
+    __slots__ = ('intensity', 'count', 'futures')
+
+    def __init__(self):
+        self.intensity = 0.0
+        self.count = 0
+        self.futures: List[Future] = []
+
+class EventPipeline:
+    """Thread-safe ingestion of GameEvents into a VillageEmotionEngine.
+
+    Producers on any thread call ``submit``; a single worker thread drains
+    the pending set once per tick. A tick opens when an event arrives and
+    closes ``tick_interval`` seconds later, or as soon as ``batch_size``
+    entries are pending. Within a tick, events for the same
+    (villager, event type, player) are coalesced by summing their
+    intensities, and each event type is then applied with one vectorized
+    ``apply_event_batch`` call, so every villager decays once per tick.
+
+    Backpressure is bounded by ``max_pending`` distinct pending entries.
+    Events that coalesce into an existing entry are always accepted (merge);
+    new entries beyond the bound are handled by ``overflow``: 'block' waits
+    for the worker, 'drop_newest' rejects the new event and 'drop_oldest'
+    evicts the oldest pending entry. Dropped submissions fail their future
+    with QueueFullError.
+
+    ``submit`` returns a concurrent.futures.Future resolving to the
+    villager's sampled actions after the tick (wrap with
+    ``asyncio.wrap_future`` from async code). While the pipeline runs it
+    is the only writer of the engine. If applying an event type or the
+    ``on_actions`` callback raises, the affected futures fail with that
+    exception and the worker keeps running.
+    """
+    def __init__(self, engine: VillageEmotionEngine, max_pending: int = 10000, overflow: str = 'block',
+                 tick_interval: float = 0.05, on_actions: Optional[Callable[[str, List[str]], None]] = None,
+                 batch_size: int = 4096):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self.engine = engine
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.tick_interval = tick_interval
+        self.on_actions = on_actions
+        self.batch_size = batch_size
+
+        self._pending: 'OrderedDict[Tuple[str, str, str], _Pending]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._filled = threading.Condition(self._lock)
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._worker: Optional[threading.Thread] = None
+
+        self._submitted = 0
+        self._merged = 0
+        self._dropped = 0
+        self._processed = 0
+        self._errors = 0
+        self._ticks = 0
+        self._peak_depth = 0
+        self._last_tick_seconds = 0.0
+        self._started_at: Optional[float] = None
+
+    def start(self):
+        """Start the worker thread"""
+        if self._worker is not None:
+            return
+        self._stopping = False
+        self._started_at = time.perf_counter()
+        self._worker = threading.Thread(target=self._run, name='emotion-event-pipeline', daemon=True)
+        self._worker.start()
+
+    def stop(self, drain: bool = True):
+        """Stop the worker, processing whatever is still pending unless ``drain`` is False"""
+        if self._worker is None:
+            return
+        with self._lock:
+            self._stopping = True
+            self._not_full.notify_all()
+            self._filled.notify_all()
+        self._wakeup.set()
+        self._worker.join()
+        self._worker = None
+        if drain:
+            self.process_pending()
+        else:
+            with self._lock:
+                batch, self._pending = self._pending, OrderedDict()
+            for entry in batch.values():
+                self._fail(entry, QueueFullError("Pipeline stopped before the event was processed"))
+
+    def __enter__(self) -> 'EventPipeline':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def submit(self, villager_id: str, event: GameEvent, timeout: Optional[float] = None) -> Future:
+        """Queue an event for one villager; the future resolves to its actions after the tick"""
+        future = Future()
+        key = (villager_id, event.event_type, event.player_id or '')
+        with self._lock:
+            self._submitted += 1
+            entry = self._pending.get(key)
+            if entry is None:
+                if not self._make_room(timeout):
+                    self._dropped += 1
+                    future.set_exception(QueueFullError(f"Event queue full ({self.max_pending} pending)"))
+                    return future
+                entry = self._pending[key] = _Pending()
+                self._peak_depth = max(self._peak_depth, len(self._pending))
+            else:
+                self._merged += 1
+            entry.intensity += event.intensity
+            entry.count += 1
+            entry.futures.append(future)
+            if len(self._pending) >= self.batch_size:
+                self._filled.notify()
+        self._wakeup.set()
+        return future
+
+    def submit_many(self, villager_ids: List[str], event: GameEvent, timeout: Optional[float] = None) -> List[Future]:
+        """Queue the same event for several villagers"""
+        return [self.submit(villager_id, event, timeout) for villager_id in villager_ids]
+
+    def _make_room(self, timeout: Optional[float]) -> bool:
+        # Called with the lock held
+        if len(self._pending) < self.max_pending:
+            return True
+        if self.overflow == 'drop_newest':
+            return False
+        if self.overflow == 'drop_oldest':
+            _, evicted = self._pending.popitem(last=False)
+            self._dropped += 1
+            self._fail(evicted, QueueFullError("Evicted by newer events (drop_oldest)"))
+            return True
+        self._wakeup.set()
+        self._filled.notify()
+        return self._not_full.wait_for(
+            lambda: len(self._pending) < self.max_pending or self._stopping, timeout
+        ) and len(self._pending) < self.max_pending
+
+    @staticmethod
+    def _fail(entry: _Pending, error: Exception):
+        for future in entry.futures:
+            if not future.done():
+                future.set_exception(error)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            # Hold the tick open so events arriving together coalesce, unless a full batch is already waiting
+            with self._lock:
+                self._filled.wait_for(lambda: len(self._pending) >= self.batch_size or self._stopping,
+                                      self.tick_interval)
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            try:
+                self.process_pending()
+            except Exception:
+                # Already counted and raised into the batch's futures; keep serving later submissions
+                pass
+
+    def process_pending(self) -> int:
+        """Apply everything pending as one coalesced tick; returns the number of entries applied"""
+        with self._lock:
+            batch, self._pending = self._pending, OrderedDict()
+            self._not_full.notify_all()
+        if not batch:
+            return 0
+
+        started = time.perf_counter()
+        try:
+            self._apply(batch)
+        except Exception as error:
+            # Nothing in the batch may be left hanging
+            with self._lock:
+                self._errors += 1
+            for entry in batch.values():
+                self._fail(entry, error)
+            raise
+        finally:
+            with self._lock:
+                self._processed += sum(entry.count for entry in batch.values())
+                self._ticks += 1
+                self._last_tick_seconds = time.perf_counter() - started
+        return len(batch)
+
+    def _apply(self, batch: 'OrderedDict[Tuple[str, str, str], _Pending]'):
+        engine = self.engine
+        groups: Dict[Tuple[str, str], Tuple[List[int], List[float], List[_Pending]]] = {}
+        touched: Dict[int, List[_Pending]] = {}
+        for (villager_id, event_type, player_id), entry in batch.items():
+            if villager_id not in engine:
+                self._fail(entry, KeyError(villager_id))
+                continue
+            row = int(engine.rows_for([villager_id])[0])
+            touched.setdefault(row, []).append(entry)
+            if event_type in engine.event_catalog:
+                rows, intensities, entries = groups.setdefault((event_type, player_id), ([], [], []))
+                rows.append(row)
+                intensities.append(entry.intensity)
+                entries.append(entry)
+
+        for (event_type, player_id), (rows, intensities, entries) in groups.items():
+            try:
+                engine.apply_event_batch(event_type, player_id, rows, intensities)
+            except Exception as error:
+                # Only this event type's submissions fail; the rest of the tick still lands
+                with self._lock:
+                    self._errors += 1
+                for entry in entries:
+                    self._fail(entry, error)
+
+        if touched:
+            villager_ids = engine.villager_ids
+            rows = np.fromiter(touched, np.intp, len(touched))
+            masks = engine.sample_actions(rows)
+            for row, mask in zip(rows.tolist(), masks):
+                actions = engine.behavior_model.actions(mask)
+                entries = touched[row]
+                if self.on_actions is not None:
+                    try:
+                        self.on_actions(villager_ids[row], actions)
+                    except Exception as error:
+                        with self._lock:
+                            self._errors += 1
+                        for entry in entries:
+                            self._fail(entry, error)
+                        continue
+                for entry in entries:
+                    for future in entry.futures:
+                        if not future.done():
+                            future.set_result(actions)
+
+    def metrics(self) -> Dict[str, float]:
+        """Throughput and queue-depth counters"""
+        with self._lock:
+            elapsed = time.perf_counter() - self._started_at if self._started_at is not None else 0.0
+            return {
+                'queue_depth': len(self._pending),
+                'peak_queue_depth': self._peak_depth,
+                'submitted': self._submitted,
+                'merged': self._merged,
+                'dropped': self._dropped,
+                'processed': self._processed,
+                'errors': self._errors,
+                'ticks': self._ticks,
+                'last_tick_seconds': self._last_tick_seconds,
+                'events_per_second': self._processed / elapsed if elapsed > 0 else 0.0
+            }
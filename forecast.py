@@ -0,0 +1,285 @@
+import numpy as np
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union
+from emotion_engine import (CONTAGION_RADIUS, DEFAULT_BEHAVIOR_MODEL, DEFAULT_EVENT_CATALOG, EMOTIONS,
+                            REPUTATION_WEIGHTS, TRAIT_INDEX, TRAITS, BehaviorModel, BroadcastEvent, EventCatalog, GameEvent,
+                            VillageEmotionEngine, VillagerEmotionSystem, personality_gains)
+from spatial_index import CHUNK_SIZE, FALLOFF_CURVES, ChunkSpatialIndex, group_by_cell
+
+class ScheduledEvent(NamedTuple):
+    """One event of a what-if scenario, ``delay`` seconds after the forecast starts"""
+    delay: float
+    # A BroadcastEvent reaches villagers by distance from its origin and ignores ``targets``
+    event: Union[GameEvent, BroadcastEvent]
+    # Indices into the forecast's villagers (default: all of them)
+    targets: Optional[Sequence[int]] = None
+
+class Forecast(NamedTuple):
+    """Outcome of K scenarios over T sample times for n villagers"""
+    times: np.ndarray                      # (T,) seconds after the start
+    mean_emotions: np.ndarray              # (K, T, 6) village-mean emotion trajectory
+    mean_action_probabilities: np.ndarray  # (K, T, B) village-mean probability of each behavior firing
+    emotions: np.ndarray                   # (K, n, 6) per villager at the horizon
+    action_probabilities: np.ndarray       # (K, n, B) per villager at the horizon
+    players: List[str]
+    reputation_deltas: np.ndarray          # (K, P, n) change of each villager's reputation of each player
+    behavior_names: List[str]
+    trajectories: Optional[np.ndarray] = None  # (K, T, n, 6) when asked for
+
+    def reputation_delta(self, player_id: str) -> np.ndarray:
+        """(K, n) reputation change toward one player (zeros if no scenario involves them)"""
+        if player_id not in self.players:
+            return np.zeros(self.emotions.shape[:2])
+        return self.reputation_deltas[:, self.players.index(player_id)]
+
+    def expected_actions(self, behavior: str) -> np.ndarray:
+        """(K,) expected number of villagers performing ``behavior`` at the horizon"""
+        return self.action_probabilities[:, :, self.behavior_names.index(behavior)].sum(axis=1)
+
+def _neighbour_weights(positions: np.ndarray, sources: np.ndarray, radius: float, falloff: str,
+                       cell_size: int = CHUNK_SIZE) -> tuple:
+    # Nonzero contagion weights as (target, source, weight) arrays sorted by target, gathered chunk by
+    # chunk the same way VillageEmotionEngine.contagion_tick does
+    curve = FALLOFF_CURVES[falloff]
+    placed = np.flatnonzero(~np.isnan(positions).any(axis=1))
+    located = np.flatnonzero(~np.isnan(sources).any(axis=1))
+    pools = {cell: located[members] for cell, members in
+             group_by_cell(sources[located, 0], sources[located, 2], cell_size).items()}
+    grid = ChunkSpatialIndex(cell_size)
+    targets, neighbours, weights = [np.zeros(0, dtype=np.intp)], [np.zeros(0, dtype=np.intp)], [np.zeros(0)]
+    for cell, members in group_by_cell(positions[placed, 0], positions[placed, 2], cell_size).items():
+        cell_rows = placed[members]
+        pool = np.concatenate([pools[other] for other in grid.neighbor_cells(cell, radius, pools)])
+        offsets = positions[cell_rows][:, None, :] - sources[pool][None, :, :]
+        block = curve(np.sqrt((offsets * offsets).sum(axis=2)), radius)
+        block[cell_rows[:, None] == pool[None, :]] = 0.0
+        rows, columns = np.nonzero(block)
+        targets.append(cell_rows[rows])
+        neighbours.append(pool[columns])
+        weights.append(block[rows, columns])
+    targets, neighbours, weights = np.concatenate(targets), np.concatenate(neighbours), np.concatenate(weights)
+    order = np.argsort(targets, kind='stable')
+    return targets[order], neighbours[order], weights[order]
+
+class Forecaster:
+    """Vectorized what-if simulation of candidate event sequences on a copy of villager state.
+
+    A forecaster holds a snapshot of n villagers - emotions, personality
+    gains, positions and reputations - taken from an engine
+    (``from_engine``) or from standalone villagers (``from_villagers``).
+    ``run`` rolls K scenarios forward together as one (K, n, 6) array on a
+    simulated clock: events land at their exact delays with the same
+    response, clipping and reputation rules as the live code, decay is
+    applied in closed form, and contagion (optional) runs every ``step``
+    seconds like a TickScheduler would. Live state is never touched, so
+    forecasts can run beside the simulation.
+
+    Behaviors are sampled in the live game, so the forecast reports their
+    probabilities (weights clipped to [0, 1]) rather than sampled actions;
+    everything else in the model is deterministic.
+
+    ``halo`` is an optional ``(positions (H, 3), emotions (H, 6))`` pair of
+    neighbours outside the forecast: they pull on villagers in range and
+    decay over the horizon, but do not react to the scenarios.
+    """
+    def __init__(self, emotions: np.ndarray, traits: np.ndarray, positions: Optional[np.ndarray] = None,
+                 reputations: Optional[Dict[str, np.ndarray]] = None, decay_rate=0.98,
+                 event_catalog: EventCatalog = DEFAULT_EVENT_CATALOG,
+                 behavior_model: BehaviorModel = DEFAULT_BEHAVIOR_MODEL, halo=None):
+        self.emotions = np.array(emotions, dtype=float).reshape(-1, len(EMOTIONS))
+        count = len(self.emotions)
+        traits = np.asarray(traits, dtype=float).reshape(count, len(TRAITS))
+        self.gains = personality_gains(traits)
+        self.socialness = traits[:, TRAIT_INDEX['socialness']].copy()
+        if positions is None:
+            self.positions = np.full((count, 3), np.nan)
+        else:
+            self.positions = np.array(positions, dtype=float).reshape(count, 3)
+        self.reputations = {player_id: np.array(values, dtype=float).reshape(count)
+                            for player_id, values in (reputations or {}).items()}
+        # One rate per villager (standalone villagers may differ)
+        self.decay_rate = np.broadcast_to(np.asarray(decay_rate, dtype=float), (count,)).copy()
+        self.event_catalog = event_catalog
+        self.behavior_model = behavior_model
+        if halo is not None and len(halo[0]):
+            self.halo = (np.array(halo[0], dtype=float).reshape(-1, 3),
+                         np.array(halo[1], dtype=float).reshape(-1, len(EMOTIONS)))
+        else:
+            self.halo = None
+
+    def __len__(self) -> int:
+        return len(self.emotions)
+
+    @classmethod
+    def from_engine(cls, engine: VillageEmotionEngine, rows=None, radius: float = CONTAGION_RADIUS,
+                    now: Optional[float] = None) -> 'Forecaster':
+        """Snapshot the given engine rows (default: everyone); neighbours within ``radius`` become the halo"""
+        if now is None:
+            now = engine.clock()
+        with engine.row_locks.hold(rows):
+            rows = engine._select(rows)
+            emotions = engine.current_emotions(rows, now)
+            traits = engine._traits[rows].copy()
+
+        with engine._lock:
+            positions = engine._positions[rows].copy()
+            villagers, codes, values = engine.relationships.reputation_entries(rows)
+            players = engine.relationships.players
+            index = np.full(len(engine), -1, dtype=np.intp)
+            index[rows] = np.arange(len(rows))
+            reputations: Dict[str, np.ndarray] = {}
+            for code in np.unique(codes).tolist():
+                held = codes == code
+                reputation = reputations[players.string(code)] = np.zeros(len(rows))
+                reputation[index[villagers[held]]] = values[held]
+
+            # Positioned villagers outside the forecast that are close enough to pull on it
+            outside = np.zeros(0, dtype=np.intp)
+            if len(rows) < len(engine):
+                spatial = engine.spatial_index
+                placed = ~np.isnan(positions).any(axis=1)
+                nearby = set()
+                for cell in group_by_cell(positions[placed, 0], positions[placed, 2], spatial.cell_size):
+                    for other in spatial.neighbor_cells(cell, radius):
+                        nearby.update(spatial.cells[other])
+                outside = np.setdiff1d(np.fromiter(nearby, np.intp, len(nearby)), rows)
+            halo_positions = engine._positions[outside].copy()
+
+        halo = (halo_positions, engine.current_emotions(outside, now)) if len(outside) else None
+        return cls(emotions, traits, positions, reputations, engine.decay_rate, engine.event_catalog,
+                   engine.behavior_model, halo)
+
+    @classmethod
+    def from_villagers(cls, villagers: Sequence[VillagerEmotionSystem], now: Optional[float] = None) -> 'Forecaster':
+        """Snapshot standalone villagers (only positioned ones take part in contagion)"""
+        villagers = list(villagers)
+        emotions = np.zeros((len(villagers), len(EMOTIONS)))
+        reputations: Dict[str, np.ndarray] = {}
+        for i, villager in enumerate(villagers):
+            with villager.lock:
+                emotions[i] = villager.emotions.current_values(now)
+                for player_id, reputation in villager.memory.reputation_scores.items():
+                    reputations.setdefault(player_id, np.zeros(len(villagers)))[i] = reputation
+        traits = np.array([villager.personality.values for villager in villagers], dtype=float)
+        positions = np.array([(np.nan,) * 3 if villager.position is None else villager.position
+                              for villager in villagers], dtype=float).reshape(-1, 3)
+        decay_rate = [villager.emotions.decay_rate for villager in villagers]
+        first = villagers[0] if villagers else None
+        return cls(emotions, traits, positions, reputations, decay_rate,
+                   first.event_catalog if first is not None else DEFAULT_EVENT_CATALOG,
+                   first.behavior_model if first is not None else DEFAULT_BEHAVIOR_MODEL)
+
+    def _falloff(self, event: BroadcastEvent) -> np.ndarray:
+        # Intensity multiplier of an area-of-effect event per villager (0 out of range or unplaced)
+        distance = np.linalg.norm(self.positions - np.asarray(event.origin, dtype=float), axis=1)
+        scale = FALLOFF_CURVES[event.falloff](np.nan_to_num(distance, nan=np.inf), event.radius)
+        return np.where(distance <= event.radius, scale, 0.0)
+
+    def run(self, scenarios: Sequence[Sequence], horizon: float, step: float = 1.0, contagion: bool = True,
+            radius: float = CONTAGION_RADIUS, falloff: str = 'linear', keep_trajectories: bool = False) -> Forecast:
+        """Roll every scenario forward ``horizon`` seconds, sampling the state every ``step`` seconds.
+
+        Each scenario is a sequence of ScheduledEvent (or plain ``(delay,
+        event[, targets])`` tuples); an empty one is the do-nothing baseline.
+        Events after the horizon are ignored. Events falling in a step are
+        applied, in delay order, before that step's contagion.
+        """
+        count = len(self)
+        scenarios = [sorted((ScheduledEvent(*item) for item in scenario), key=lambda item: item.delay)
+                     for scenario in scenarios]
+        steps = max(1, int(np.ceil(horizon / step)))
+        times = np.minimum(np.arange(steps + 1) * step, horizon)
+
+        players = sorted(set(self.reputations) | {item.event.player_id for scenario in scenarios
+                                                  for item in scenario if item.event.player_id})
+        player_index = {player_id: i for i, player_id in enumerate(players)}
+        initial = np.zeros((len(players), count))
+        for player_id, values in self.reputations.items():
+            initial[player_index[player_id]] = values
+        reputation = np.broadcast_to(initial, (len(scenarios),) + initial.shape).copy()
+
+        # Events per scenario per step
+        buckets = [[[] for _ in range(steps + 1)] for _ in scenarios]
+        for bucket, scenario in zip(buckets, scenarios):
+            for item in scenario:
+                if 0 <= item.delay <= horizon:
+                    bucket[max(1, int(np.searchsorted(times, item.delay)))].append(item)
+
+        total_weight = np.zeros(count)
+        if contagion:
+            sources = self.positions if self.halo is None else np.concatenate([self.positions, self.halo[0]])
+            targets, neighbours, weights = _neighbour_weights(self.positions, sources, radius, falloff)
+            np.add.at(total_weight, targets, weights)
+            # Halo villagers only decay, so their pull is one fixed vector per villager scaled by decay
+            halo_pull = np.zeros((count, len(EMOTIONS)))
+            from_halo = neighbours >= count
+            if from_halo.any():
+                np.add.at(halo_pull, targets[from_halo],
+                          weights[from_halo, None] * self.halo[1][neighbours[from_halo] - count])
+            # Halos come from one engine, so every villager here shares its decay rate
+            halo_decay = float(self.decay_rate.mean()) if self.halo is not None else 1.0
+            targets, neighbours, weights = targets[~from_halo], neighbours[~from_halo], weights[~from_halo]
+            pulled, starts = np.unique(targets, return_index=True)
+        active = np.flatnonzero(total_weight > 0)
+        strength = self.socialness[active, None] * 0.1
+
+        state = np.broadcast_to(self.emotions, (len(scenarios), count, len(EMOTIONS))).copy()
+        clock = np.zeros(len(scenarios))
+        decay = self.decay_rate[None, :, None]
+        weights_of = self.behavior_model.weights
+        mean_emotions = np.zeros((len(scenarios), len(times), len(EMOTIONS)))
+        mean_actions = np.zeros((len(scenarios), len(times), len(self.behavior_model)))
+        trajectories = np.zeros((len(scenarios), len(times), count, len(EMOTIONS))) if keep_trajectories else None
+
+        def sample(j: int):
+            mean_emotions[:, j] = state.mean(axis=1) if count else 0.0
+            mean_actions[:, j] = np.clip(weights_of(state), 0.0, 1.0).mean(axis=1) if count else 0.0
+            if trajectories is not None:
+                trajectories[:, j] = state
+
+        sample(0)
+        for j in range(1, len(times)):
+            # The i-th event of the step for every scenario that has one, all scenarios at once
+            for i in range(max((len(bucket[j]) for bucket in buckets), default=0)):
+                ks = np.array([k for k, bucket in enumerate(buckets) if len(bucket[j]) > i], dtype=np.intp)
+                items = [buckets[k][j][i] for k in ks.tolist()]
+                delays = np.array([item.delay for item in items])
+                state[ks] *= decay ** (delays - clock[ks])[:, None, None]
+                clock[ks] = delays
+
+                known = [self.event_catalog.response(item.event.event_type) is not None for item in items]
+                if not any(known):
+                    continue
+                ks = ks[known]
+                items = [item for item, is_known in zip(items, known) if is_known]
+                base = np.array([self.event_catalog.response(item.event.event_type) * item.event.intensity
+                                 for item in items])
+                scale = np.ones((len(items), count))
+                for m, item in enumerate(items):
+                    if isinstance(item.event, BroadcastEvent):
+                        if item.event.origin is not None:
+                            scale[m] = self._falloff(item.event)
+                    elif item.targets is not None:
+                        scale[m] = 0.0
+                        scale[m, np.asarray(item.targets, dtype=np.intp)] = 1.0
+                response = self.gains[None] * base[:, None, :] * scale[:, :, None]
+                state[ks] = np.clip(state[ks] + response, -1.0, 1.0)
+
+                involved = [m for m, item in enumerate(items) if item.event.player_id]
+                if involved:
+                    codes = np.array([player_index[items[m].event.player_id] for m in involved], dtype=np.intp)
+                    change = response[involved] @ REPUTATION_WEIGHTS * 0.1
+                    reputation[ks[involved], codes] = np.clip(reputation[ks[involved], codes] + change, -1.0, 1.0)
+
+            state *= decay ** (times[j] - clock)[:, None, None]
+            clock[:] = times[j]
+
+            if len(active):
+                social = np.broadcast_to(halo_pull * halo_decay ** times[j], state.shape).copy()
+                if len(pulled):
+                    social[:, pulled] += np.add.reduceat(state[:, neighbours] * weights[:, None], starts, axis=1)
+                blended = state[:, active] * (1 - strength) + social[:, active] / total_weight[active, None] * strength
+                state[:, active] = np.clip(blended, -1.0, 1.0)
+            sample(j)
+
+        return Forecast(times, mean_emotions, mean_actions, state, np.clip(weights_of(state), 0.0, 1.0), players,
+                        reputation - initial, list(self.behavior_model.names), trajectories)
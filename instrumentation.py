@@ -0,0 +1,208 @@
+import bisect
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets; a final +Inf bucket is implied
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2,
+                   5e-2, 0.1, 0.25, 0.5, 1.0)
+
+# Stage name of an operation's end-to-end latency
+TOTAL_STAGE = 'total'
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus style"""
+    __slots__ = ('bounds', 'counts', 'count', 'total', 'max')
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the max for the overflow bucket)"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def as_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'buckets': dict(zip([*self.bounds, float('inf')], self.counts))
+        }
+
+class Trace:
+    """Stage timer for one operation; ``mark`` closes the stage that just ran"""
+    __slots__ = ('instrumentation', 'operation', 'event_type', 'started', 'last', 'stages')
+
+    def __init__(self, instrumentation: 'Instrumentation', operation: str, event_type: Optional[str], sampled: bool):
+        self.instrumentation = instrumentation
+        self.operation = operation
+        self.event_type = event_type
+        self.started = self.last = time.perf_counter()
+        self.stages: Optional[List] = [] if sampled else None
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        self.instrumentation.observe(self.operation, now - self.last, stage)
+        if self.stages is not None:
+            self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def finish(self):
+        now = time.perf_counter()
+        self.instrumentation.observe(self.operation, now - self.started)
+        if self.stages is not None:
+            self.instrumentation._keep_trace(self, now)
+
+class Instrumentation:
+    """Per-stage timers, counters and sampled traces for the event hot paths.
+
+    Attach one to a VillagerEmotionSystem or VillageEmotionEngine through
+    their ``instrumentation`` attribute; with the attribute left at None the
+    hot paths only pay an ``is None`` check. Every operation started with
+    ``trace`` records its total and per-stage latency histograms, keyed by
+    (operation, stage) so stages of the same name in different operations
+    stay apart, and a per-event-type count; a ``trace_sample_rate`` fraction of them also
+    keeps the full stage breakdown in a bounded ``traces`` buffer.
+
+    ``snapshot()`` returns everything as plain data, and ``export()`` hands
+    that snapshot to each registered exporter (e.g. PrometheusTextExporter).
+    """
+    def __init__(self, trace_sample_rate: float = 0.0, max_traces: int = 1000,
+                 buckets: Sequence[float] = LATENCY_BUCKETS, seed: Optional[int] = None):
+        self.trace_sample_rate = trace_sample_rate
+        self.buckets = tuple(buckets)
+        self.exporters: List = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._counters: Dict[str, int] = {}
+        self._event_counts: Dict[str, int] = {}
+        self._traces = deque(maxlen=max_traces)
+        self._started_at = time.time()
+
+    def trace(self, operation: str, event_type: Optional[str] = None) -> Trace:
+        """Start timing an operation (counted under ``event_type`` if given)"""
+        if event_type is not None:
+            self.count_event(event_type)
+        sampled = self.trace_sample_rate > 0.0 and self._random.random() < self.trace_sample_rate
+        return Trace(self, operation, event_type, sampled)
+
+    def observe(self, operation: str, seconds: float, stage: str = TOTAL_STAGE):
+        """Add one latency sample to the histogram of an operation's stage (its total by default)"""
+        key = (operation, stage)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def count_event(self, event_type: str, amount: int = 1):
+        with self._lock:
+            self._event_counts[event_type] = self._event_counts.get(event_type, 0) + amount
+
+    def _keep_trace(self, trace: Trace, finished: float):
+        with self._lock:
+            self._traces.append({
+                'operation': trace.operation,
+                'event_type': trace.event_type,
+                'seconds': finished - trace.started,
+                'stages': trace.stages
+            })
+
+    def snapshot(self) -> Dict:
+        """Point-in-time copy of every metric; ``latency`` maps operation -> stage -> histogram"""
+        with self._lock:
+            latency: Dict[str, Dict[str, Dict]] = {}
+            for (operation, stage), histogram in self._histograms.items():
+                latency.setdefault(operation, {})[stage] = histogram.as_dict()
+            return {
+                'started_at': self._started_at,
+                'timestamp': time.time(),
+                'latency': latency,
+                'counters': dict(self._counters),
+                'events': dict(self._event_counts),
+                'traces': list(self._traces)
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._event_counts.clear()
+            self._traces.clear()
+            self._started_at = time.time()
+
+    def export(self):
+        """Push a snapshot to every registered exporter"""
+        snapshot = self.snapshot()
+        for exporter in self.exporters:
+            exporter.export(snapshot)
+
+def _label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def render_prometheus(snapshot: Dict, prefix: str = 'villager_emotion') -> str:
+    """Prometheus text exposition format (0.0.4) for an Instrumentation snapshot"""
+    lines = [
+        f'# HELP {prefix}_stage_seconds Latency of hot-path operations (stage="{TOTAL_STAGE}") and their stages',
+        f"# TYPE {prefix}_stage_seconds histogram"
+    ]
+    for operation, stages in sorted(snapshot['latency'].items()):
+        for stage, histogram in sorted(stages.items()):
+            labels = f'operation="{_label(operation)}",stage="{_label(stage)}"'
+            cumulative = 0
+            for bound, count in histogram['buckets'].items():
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{prefix}_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_sum{{{labels}}} {histogram["sum"]!r}')
+            lines.append(f'{prefix}_stage_seconds_count{{{labels}}} {histogram["count"]}')
+    lines.append(f"# HELP {prefix}_events_total Game events processed by event type")
+    lines.append(f"# TYPE {prefix}_events_total counter")
+    for event_type, count in sorted(snapshot['events'].items()):
+        lines.append(f'{prefix}_events_total{{event_type="{_label(event_type)}"}} {count}')
+    for name, value in sorted(snapshot['counters'].items()):
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        lines.append(f"{prefix}_{name}_total {value}")
+    return '\n'.join(lines) + '\n'
+
+class PrometheusTextExporter:
+    """Writes snapshots as a Prometheus text file (e.g. for node_exporter's textfile collector)"""
+    def __init__(self, path: str, prefix: str = 'villager_emotion'):
+        self.path = path
+        self.prefix = prefix
+
+    def export(self, snapshot: Dict):
+        # Write then rename so scrapers never see a half-written file
+        staging = self.path + '.tmp'
+        with open(staging, 'w') as handle:
+            handle.write(render_prometheus(snapshot, self.prefix))
+        os.replace(staging, self.path)
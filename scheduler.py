@@ -0,0 +1,221 @@
+import threading
+import time
+import numpy as np
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+from emotion_engine import CONTAGION_RADIUS, VillageEmotionEngine
+from spatial_index import CHUNK_SIZE
+
+# Minecraft's server tick rate
+TICKS_PER_SECOND = 20
+
+TIER_NEAR = 'near'
+TIER_FAR = 'far'
+
+class TickScheduler:
+    """Fixed-rate simulation loop for a VillageEmotionEngine with level-of-detail tiers.
+
+    Villagers are tiered by their distance to online players:
+
+    - near (within ``near_radius`` blocks of a player): contagion and
+      behavior resampling every tick
+    - far (in a loaded chunk, i.e. within ``simulation_distance`` chunks of
+      a player): the same work every ``far_interval`` ticks, spread so
+      1/far_interval of them run on each tick
+    - unloaded: never touched; lazy decay catches them up when next read
+
+    Tiers are recomputed when players join, move or leave, and every
+    ``far_interval`` ticks to follow villager movement.
+
+    Each tick's work is split into batches of ``batch_size`` villagers.
+    Once a tick has spent ``budget`` seconds, the remaining batches are
+    deferred to the next tick instead of stalling the server. A near pass
+    that is still running is not restarted, and far batches beyond one
+    full cycle of backlog are shed. ``run`` paces ticks at ``tps`` and
+    skips ahead, rather than bursting, when it falls more than
+    ``max_catch_up`` ticks behind.
+
+    If ``pipeline`` (an EventPipeline whose worker is not started) is
+    given, its pending events are applied at the start of every tick.
+    ``on_actions(rows, masks)`` receives every resampled batch, and a
+    ``change_feed`` (ChangeFeed) is polled at the end of every tick.
+    """
+    def __init__(self, engine: VillageEmotionEngine, tps: int = TICKS_PER_SECOND, budget: Optional[float] = None,
+                 near_radius: float = 64.0, simulation_distance: int = 10, far_interval: int = 20,
+                 batch_size: int = 4096, radius: float = CONTAGION_RADIUS, falloff: str = 'linear',
+                 pipeline=None, change_feed=None, on_actions: Optional[Callable[[np.ndarray, np.ndarray], None]] = None,
+                 max_catch_up: int = 20, timer: Callable[[], float] = time.perf_counter,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.engine = engine
+        self.tps = tps
+        # Leave part of every tick to the rest of the server by default
+        self.budget = budget if budget is not None else 0.6 / tps
+        self.near_radius = near_radius
+        self.simulation_distance = simulation_distance
+        self.far_interval = far_interval
+        self.batch_size = batch_size
+        self.radius = radius
+        self.falloff = falloff
+        self.pipeline = pipeline
+        self.change_feed = change_feed
+        self.on_actions = on_actions
+        self.max_catch_up = max_catch_up
+        self.timer = timer
+        self.sleep = sleep
+
+        self.players: Dict[str, Tuple[float, float, float]] = {}
+        self.tick_count = 0
+        self._near = np.zeros(0, dtype=np.intp)
+        self._far = np.zeros(0, dtype=np.intp)
+        self._tiers_stale = True
+        self._queue = deque()
+        self._stopping = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+        self._overruns = 0
+        self._shed = 0
+        self._skipped = 0
+        self._batches = 0
+        self._last_tick_seconds = 0.0
+        self._total_tick_seconds = 0.0
+
+    def update_player(self, player_id: str, position: tuple):
+        """Add or move an online player"""
+        self.players[player_id] = tuple(position)
+        self._tiers_stale = True
+
+    def remove_player(self, player_id: str):
+        self.players.pop(player_id, None)
+        self._tiers_stale = True
+
+    def tiers(self) -> Dict[str, np.ndarray]:
+        """Rows currently in each updated tier (everyone else is unloaded)"""
+        return {TIER_NEAR: self._near, TIER_FAR: self._far}
+
+    def _retier(self):
+        engine = self.engine
+        players = np.array(list(self.players.values()), dtype=float).reshape(-1, 3)
+        near = [engine.rows_within(position, self.near_radius) for position in players]
+        self._near = np.unique(np.concatenate([np.zeros(0, dtype=np.intp)] + near))
+
+        loaded = np.zeros(0, dtype=np.intp)
+        # Villagers may move on other threads; read the chunk buckets while the engine holds them still
+        with engine._lock:
+            cells = engine.spatial_index.cells
+            if len(players) and cells:
+                keys = list(cells)
+                cell_coords = np.array(keys, dtype=np.int64)
+                player_chunks = np.floor(players[:, [0, 2]] / CHUNK_SIZE).astype(np.int64)
+                distance = np.abs(cell_coords[:, None, :] - player_chunks[None, :, :]).max(axis=2)
+                in_range = np.flatnonzero((distance <= self.simulation_distance).any(axis=1))
+                members = [cells[keys[i]] for i in in_range.tolist()]
+                loaded = np.fromiter((row for cell in members for row in cell), np.intp, sum(map(len, members)))
+        self._far = np.setdiff1d(loaded, self._near)
+        self._tiers_stale = False
+
+    def _schedule(self):
+        # Called at the start of a tick to queue its work
+        if self._tiers_stale or self.tick_count % self.far_interval == 0:
+            self._retier()
+        if not any(tier == TIER_NEAR for tier, _ in self._queue):
+            for start in range(0, len(self._near), self.batch_size):
+                self._queue.append((TIER_NEAR, self._near[start:start + self.batch_size]))
+        far = self._far[self._far % self.far_interval == self.tick_count % self.far_interval]
+        backlog = sum(1 for tier, _ in self._queue if tier == TIER_FAR) * self.batch_size
+        for start in range(0, len(far), self.batch_size):
+            if backlog > len(self._far):
+                self._shed += 1
+                continue
+            self._queue.append((TIER_FAR, far[start:start + self.batch_size]))
+            backlog += self.batch_size
+
+    def tick(self) -> int:
+        """Run one tick within the budget; returns the number of batches processed"""
+        started = self.timer()
+        engine = self.engine
+        trace = engine.instrumentation.trace('scheduler_tick') if engine.instrumentation is not None else None
+        if self.pipeline is not None:
+            self.pipeline.process_pending()
+            if trace is not None:
+                trace.mark('pipeline')
+        self._schedule()
+
+        processed = 0
+        # Always make some progress, even when the pipeline used up the budget
+        while self._queue and (processed == 0 or self.timer() - started < self.budget):
+            _, rows = self._queue.popleft()
+            engine.contagion_tick(self.radius, self.falloff, rows=rows)
+            masks = engine.sample_actions(rows)
+            if self.on_actions is not None:
+                self.on_actions(rows, masks)
+            processed += 1
+        if self._queue:
+            self._overruns += 1
+        if trace is not None:
+            trace.mark('batches')
+        if self.change_feed is not None:
+            self.change_feed.poll()
+            if trace is not None:
+                trace.mark('change_feed')
+        if trace is not None:
+            trace.finish()
+
+        self.tick_count += 1
+        self._batches += processed
+        self._last_tick_seconds = self.timer() - started
+        self._total_tick_seconds += self._last_tick_seconds
+        return processed
+
+    def run(self, ticks: Optional[int] = None):
+        """Tick at ``tps`` until ``ticks`` have run or ``stop`` is called"""
+        interval = 1.0 / self.tps
+        deadline = self.timer()
+        done = 0
+        while (ticks is None or done < ticks) and not self._stopping.is_set():
+            self.tick()
+            done += 1
+            deadline += interval
+            delay = deadline - self.timer()
+            if delay > 0:
+                self.sleep(delay)
+            elif -delay > self.max_catch_up * interval:
+                # Too far behind: drop the missed ticks instead of bursting through them
+                self._skipped += int(-delay / interval)
+                deadline = self.timer()
+
+    def start(self):
+        """Run the loop on a background thread"""
+        if self._worker is not None:
+            return
+        self._stopping.clear()
+        self._worker = threading.Thread(target=self.run, name='emotion-tick-scheduler', daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def __enter__(self) -> 'TickScheduler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def metrics(self) -> Dict[str, float]:
+        """Tick timing, deferral and tier counters"""
+        return {
+            'ticks': self.tick_count,
+            'batches': self._batches,
+            'overruns': self._overruns,
+            'deferred_batches': len(self._queue),
+            'shed_batches': self._shed,
+            'skipped_ticks': self._skipped,
+            'last_tick_seconds': self._last_tick_seconds,
+            'mean_tick_seconds': self._total_tick_seconds / self.tick_count if self.tick_count else 0.0,
+            'near_villagers': len(self._near),
+            'far_villagers': len(self._far),
+            'unloaded_villagers': len(self.engine) - len(self._near) - len(self._far)
+        }
@@ -0,0 +1,400 @@
+import math
+import multiprocessing
+import os
+import time
+import zlib
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+from emotion_engine import (CONTAGION_RADIUS, DEFAULT_BEHAVIOR_MODEL, EMOTIONS, TRAITS, BehaviorModel, BroadcastEvent,
+                            GameEvent, SimulatedClock, VillageEmotionEngine)
+
+# Villagers are assigned to shards by region: 32 x 32 chunks, like Minecraft's region files
+REGION_SIZE = 512
+
+class ShardError(RuntimeError):
+    """Raised in the coordinator when a shard fails a command"""
+
+def region_of(x: float, z: float, region_size: int = REGION_SIZE) -> Tuple[int, int]:
+    return (math.floor(x / region_size), math.floor(z / region_size))
+
+def _layout(capacity: int, behaviors: int) -> Dict[str, Tuple[tuple, str]]:
+    # Shape and dtype of every shared column of one shard
+    action_bytes = (behaviors + 7) // 8
+    return {
+        'emotions': ((capacity, len(EMOTIONS)), 'f8'),
+        'last_update': ((capacity,), 'f8'),
+        'traits': ((capacity, len(TRAITS)), 'f8'),
+        'positions': ((capacity, 3), 'f8'),
+        'actions': ((capacity, action_bytes), 'u1')
+    }
+
+class _SharedColumns:
+    """One shard's columns as NumPy arrays over multiprocessing.shared_memory blocks"""
+    def __init__(self, layout: Dict[str, Tuple[tuple, str]], names: Optional[Dict[str, str]] = None):
+        self.blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self.arrays: Dict[str, np.ndarray] = {}
+        for column, (shape, dtype) in layout.items():
+            size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            if names is None:
+                block = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                block = shared_memory.SharedMemory(name=names[column])
+            self.blocks[column] = block
+            self.arrays[column] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    @property
+    def names(self) -> Dict[str, str]:
+        return {column: block.name for column, block in self.blocks.items()}
+
+    def close(self):
+        # Views must go before the buffers they point into can be released
+        self.arrays.clear()
+        for block in self.blocks.values():
+            block.close()
+
+    def unlink(self):
+        for block in self.blocks.values():
+            block.unlink()
+
+def _shard_main(connection, names: Dict[str, str], capacity: int, options: Dict):
+    """Worker process: owns one VillageEmotionEngine whose columns live in shared memory"""
+    behavior_model = options['behavior_model']
+    columns = _SharedColumns(_layout(capacity, len(behavior_model)), names)
+    clock = SimulatedClock()
+    engine = VillageEmotionEngine(capacity=0, clock=clock, rng=np.random.default_rng(options['seed']),
+                                  decay_rate=options['decay_rate'], max_relationships=options['max_relationships'],
+                                  max_memories=options['max_memories'], behavior_model=behavior_model)
+    engine._emotions = columns.arrays['emotions']
+    engine._last_update = columns.arrays['last_update']
+    engine._traits = columns.arrays['traits']
+    engine._positions = columns.arrays['positions']
+    engine._dirty = np.zeros(capacity, dtype=bool)
+    engine._changed = np.zeros(capacity, dtype=np.int64)
+    actions = columns.arrays['actions']
+    try:
+        while True:
+            command, now, payload = connection.recv()
+            clock.set(now)
+            if command == 'stop':
+                connection.send(('ok', None))
+                return
+            try:
+                if command == 'spawn':
+                    villager_ids, traits, positions = payload
+                    result = engine.add_villagers(villager_ids, traits, positions)
+                elif command == 'move':
+                    rows, positions = payload
+                    result = engine.move_villagers(rows, positions)
+                elif command == 'events':
+                    for event, rows in payload:
+                        if isinstance(event, BroadcastEvent):
+                            engine.broadcast(event)
+                        else:
+                            engine.apply_event(event, rows)
+                    result = len(payload)
+                elif command == 'tick':
+                    contagion, halo = payload
+                    started = time.perf_counter()
+                    active = engine.contagion_tick(*contagion, halo=halo) if contagion is not None else ()
+                    actions[:len(engine)] = engine.sample_action_bits()
+                    result = {'villagers': len(engine), 'active': len(active), 'seconds': time.perf_counter() - started}
+                elif command == 'call':
+                    villager_id, method, args, kwargs = payload
+                    target = engine if villager_id is None else engine.villager(villager_id)
+                    result = getattr(target, method)(*args, **kwargs)
+                else:
+                    raise ValueError(f"Unknown shard command {command!r}")
+                connection.send(('ok', result))
+            except Exception as error:
+                connection.send(('error', error))
+    finally:
+        # Drop every view into the shared buffers before closing them
+        engine = actions = None
+        columns.close()
+
+class ShardedSimulation:
+    """A village network split across worker processes that share their state arrays.
+
+    Each shard is a process owning a VillageEmotionEngine whose emotion,
+    trait, position, last-update and action-bit columns live in
+    ``multiprocessing.shared_memory`` blocks created by this coordinator.
+    The coordinator reads emotions and sampled actions straight from those
+    arrays (no pickling of villager objects); commands and events travel
+    over one pipe per shard and all shards work on a tick concurrently.
+
+    Villagers are owned by the shard of the region (REGION_SIZE blocks
+    square) they spawn in, or by an explicitly given shard, so whole
+    villages stay together. Events are routed to the owning shards and
+    queued until ``tick()``.
+
+    A tick runs in two phases. First every shard applies its queued events;
+    then contagion runs with a halo exchange: the coordinator buckets every
+    villager into radius-sized cells, and each shard receives the (decayed)
+    positions and emotions of other shards' villagers in cells adjacent to
+    its own. Halo villagers influence the shard's villagers exactly as local
+    neighbours would but are only updated by their owner, so every shard
+    reads the same pre-contagion snapshot and results match a single engine.
+
+    Relationships, memories and dialogue stay inside each shard; reach them
+    with ``call``. Capacity per shard and the behavior model (which sizes
+    the action-bit columns) are fixed when the shared blocks are created;
+    registering behaviors after ``start()`` makes the next tick raise
+    ShardError.
+    """
+    def __init__(self, num_shards: Optional[int] = None, capacity: int = 65536, region_size: int = REGION_SIZE,
+                 clock: Callable[[], float] = time.time, seed: int = 0, decay_rate: float = 0.98,
+                 max_relationships: Optional[int] = None, max_memories: int = 100,
+                 contagion_radius: float = CONTAGION_RADIUS, falloff: str = 'linear', context=None,
+                 behavior_model: BehaviorModel = DEFAULT_BEHAVIOR_MODEL):
+        self.num_shards = num_shards if num_shards is not None else os.cpu_count() or 1
+        self.capacity = capacity
+        self.region_size = region_size
+        self.clock = clock
+        self.seed = seed
+        self.decay_rate = decay_rate
+        self.max_relationships = max_relationships
+        self.max_memories = max_memories
+        self.contagion_radius = contagion_radius
+        self.falloff = falloff
+        self.behavior_model = behavior_model
+        self._behaviors = len(behavior_model)
+        self._context = context if context is not None else multiprocessing.get_context()
+
+        self._columns: List[_SharedColumns] = []
+        self._connections = []
+        self._processes = []
+        self._sizes = [0] * self.num_shards
+        self._owner: Dict[str, Tuple[int, int]] = {}
+        self._ids: List[List[str]] = [[] for _ in range(self.num_shards)]
+        self._queued: List[List[Tuple[Union[GameEvent, BroadcastEvent], Optional[np.ndarray]]]] = [[] for _ in range(self.num_shards)]
+        # Halo membership only changes when villagers spawn or move
+        self._halo_rows: Optional[List[List[Tuple[int, np.ndarray]]]] = None
+
+    def start(self):
+        """Create the shared blocks and start one process per shard"""
+        if self._processes:
+            return
+        self._behaviors = len(self.behavior_model)
+        for shard in range(self.num_shards):
+            columns = _SharedColumns(_layout(self.capacity, self._behaviors))
+            columns.arrays['positions'][:] = np.nan
+            parent, child = self._context.Pipe()
+            options = {
+                'seed': self.seed + shard,
+                'decay_rate': self.decay_rate,
+                'max_relationships': self.max_relationships,
+                'max_memories': self.max_memories,
+                'behavior_model': self.behavior_model
+            }
+            process = self._context.Process(target=_shard_main, args=(child, columns.names, self.capacity, options),
+                                            name=f'emotion-shard-{shard}', daemon=True)
+            process.start()
+            child.close()
+            self._columns.append(columns)
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def close(self):
+        """Stop the workers and release the shared memory"""
+        for connection in self._connections:
+            try:
+                connection.send(('stop', 0.0, None))
+                connection.recv()
+            except (EOFError, OSError):
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join()
+        for columns in self._columns:
+            columns.close()
+            columns.unlink()
+        self._columns, self._connections, self._processes = [], [], []
+
+    def __enter__(self) -> 'ShardedSimulation':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._owner)
+
+    def __contains__(self, villager_id: str) -> bool:
+        return villager_id in self._owner
+
+    def _run(self, commands: Dict[int, Tuple[str, object]], now: float) -> Dict[int, object]:
+        # Send every command first so the shards work concurrently, then gather
+        for shard, (command, payload) in commands.items():
+            self._connections[shard].send((command, now, payload))
+        results, errors = {}, []
+        for shard in commands:
+            status, result = self._connections[shard].recv()
+            if status == 'ok':
+                results[shard] = result
+            else:
+                errors.append(f"shard {shard}: {result!r}")
+        if errors:
+            raise ShardError('; '.join(errors))
+        return results
+
+    def shard_for(self, position: Optional[tuple]) -> int:
+        """Shard owning the region of a position (the least loaded shard when unplaced)"""
+        if position is None or any(math.isnan(value) for value in position):
+            return int(np.argmin(self._sizes))
+        rx, rz = region_of(position[0], position[2], self.region_size)
+        return zlib.crc32(f'{rx},{rz}'.encode()) % self.num_shards
+
+    def owner(self, villager_id: str) -> Tuple[int, int]:
+        """(shard, row) of a villager"""
+        return self._owner[villager_id]
+
+    def add_villagers(self, villager_ids: List[str], positions: Optional[Sequence] = None,
+                      traits: Optional[np.ndarray] = None, shard: Optional[int] = None) -> np.ndarray:
+        """Spawn villagers on the shards owning their regions (or all on ``shard``); returns their shards"""
+        villager_ids = list(villager_ids)
+        for villager_id in villager_ids:
+            if villager_id in self._owner:
+                raise ValueError(f"Villager {villager_id!r} already exists")
+        positions = [None] * len(villager_ids) if positions is None else list(positions)
+        if shard is not None:
+            shards = np.full(len(villager_ids), shard)
+        else:
+            shards = np.array([self.shard_for(None if position is None else tuple(position)) for position in positions])
+        commands = {}
+        for target in np.unique(shards).tolist():
+            members = np.flatnonzero(shards == target)
+            if self._sizes[target] + len(members) > self.capacity:
+                raise ValueError(f"Shard {target} is full ({self.capacity} villagers)")
+            commands[target] = ('spawn', (
+                [villager_ids[i] for i in members.tolist()],
+                None if traits is None else np.asarray(traits)[members],
+                [positions[i] for i in members.tolist()]
+            ))
+        for target, rows in self._run(commands, self.clock()).items():
+            members = np.flatnonzero(shards == target).tolist()
+            for i, row in zip(members, np.asarray(rows).tolist()):
+                self._owner[villager_ids[i]] = (target, row)
+                self._ids[target].append(villager_ids[i])
+            self._sizes[target] += len(members)
+        self._halo_rows = None
+        return shards
+
+    def _group(self, villager_ids: List[str]) -> Dict[int, Tuple[List[int], List[int]]]:
+        # shard -> (indices into villager_ids, rows in the shard)
+        groups: Dict[int, Tuple[List[int], List[int]]] = {}
+        for i, villager_id in enumerate(villager_ids):
+            shard, row = self._owner[villager_id]
+            indices, rows = groups.setdefault(shard, ([], []))
+            indices.append(i)
+            rows.append(row)
+        return groups
+
+    def move_villagers(self, villager_ids: List[str], positions: Sequence):
+        """Move villagers (they stay with their shard; halos follow the new positions)"""
+        positions = list(positions)
+        commands = {
+            shard: ('move', (np.array(rows, dtype=np.intp), [positions[i] for i in indices]))
+            for shard, (indices, rows) in self._group(list(villager_ids)).items()
+        }
+        self._run(commands, self.clock())
+        self._halo_rows = None
+
+    def submit(self, event: Union[GameEvent, BroadcastEvent], villager_ids: Optional[List[str]] = None):
+        """Queue an event for the given villagers (default: everyone) until the next tick
+
+        A BroadcastEvent picks its own villagers: every shard resolves it
+        against its own spatial index, since villagers can wander out of
+        the region that assigned their shard.
+        """
+        if villager_ids is None or isinstance(event, BroadcastEvent):
+            for queue in self._queued:
+                queue.append((event, None))
+            return
+        for shard, (_, rows) in self._group(list(villager_ids)).items():
+            self._queued[shard].append((event, np.array(rows, dtype=np.intp)))
+
+    def _cell_keys(self, positions: np.ndarray) -> np.ndarray:
+        # Radius-sized cells packed into one int64 (offset so neighbouring keys never wrap)
+        cells = np.floor(positions[:, [0, 2]] / self.contagion_radius).astype(np.int64) + (1 << 31)
+        return (cells[:, 0] << 32) + cells[:, 1]
+
+    def _halos(self) -> List[List[Tuple[int, np.ndarray]]]:
+        """For each shard, the (other shard, rows) pairs of villagers in cells next to its own"""
+        if self._halo_rows is not None:
+            return self._halo_rows
+        keys, rows = [], []
+        for shard, columns in enumerate(self._columns):
+            positions = columns.arrays['positions'][:self._sizes[shard]]
+            placed = np.flatnonzero(~np.isnan(positions).any(axis=1))
+            keys.append(self._cell_keys(positions[placed]))
+            rows.append(placed)
+        # Anything within the radius is at most one cell away on each axis
+        offsets = np.array([(dx << 32) + dz for dx in (-1, 0, 1) for dz in (-1, 0, 1)], dtype=np.int64)
+        halos = []
+        for shard in range(self.num_shards):
+            reach = np.unique((np.unique(keys[shard])[:, None] + offsets[None, :]).ravel())
+            halos.append([
+                (other, rows[other][np.isin(keys[other], reach)])
+                for other in range(self.num_shards)
+                if other != shard and len(keys[other])
+            ])
+        self._halo_rows = halos
+        return halos
+
+    def tick(self, contagion: bool = True) -> Dict[int, Dict]:
+        """Apply queued events and (optionally) one contagion pass on every shard in parallel"""
+        if len(self.behavior_model) != self._behaviors:
+            raise ShardError(f"Behavior model changed after start() ({self._behaviors} -> {len(self.behavior_model)} "
+                             "behaviors); the shards' action columns cannot hold it")
+        now = self.clock()
+        queued = {shard: ('events', events) for shard, events in enumerate(self._queued) if events}
+        self._queued = [[] for _ in range(self.num_shards)]
+        if queued:
+            self._run(queued, now)
+
+        halos = self._halos() if contagion else [[] for _ in range(self.num_shards)]
+        commands = {}
+        for shard in range(self.num_shards):
+            halo = None
+            if contagion and halos[shard]:
+                halo = (
+                    np.concatenate([self._columns[other].arrays['positions'][rows] for other, rows in halos[shard]]),
+                    np.concatenate([self._decayed(other, rows, now) for other, rows in halos[shard]])
+                )
+            commands[shard] = ('tick', ((self.contagion_radius, self.falloff) if contagion else None, halo))
+        return self._run(commands, now)
+
+    def _decayed(self, shard: int, rows: np.ndarray, now: float) -> np.ndarray:
+        arrays = self._columns[shard].arrays
+        return arrays['emotions'][rows] * self.decay_rate ** (now - arrays['last_update'][rows])[:, None]
+
+    def emotions(self, villager_ids: List[str], now: Optional[float] = None) -> np.ndarray:
+        """Current (decayed) (n, 6) emotions read directly from the shards' shared arrays"""
+        if now is None:
+            now = self.clock()
+        villager_ids = list(villager_ids)
+        result = np.zeros((len(villager_ids), len(EMOTIONS)))
+        for shard, (indices, rows) in self._group(villager_ids).items():
+            result[indices] = self._decayed(shard, np.array(rows, dtype=np.intp), now)
+        return result
+
+    def action_bits(self, villager_ids: List[str]) -> np.ndarray:
+        """Packed action bitsets sampled for each villager at the last tick"""
+        villager_ids = list(villager_ids)
+        result = np.zeros((len(villager_ids), _layout(0, self._behaviors)['actions'][0][1]), dtype=np.uint8)
+        for shard, (indices, rows) in self._group(villager_ids).items():
+            result[indices] = self._columns[shard].arrays['actions'][rows]
+        return result
+
+    def actions(self, villager_id: str) -> List[str]:
+        """Behavior names sampled for a villager at the last tick"""
+        mask = self.behavior_model.unpack(self.action_bits([villager_id]))[0]
+        return self.behavior_model.actions(mask)
+
+    def call(self, villager_id: Optional[str], method: str, *args, shard: Optional[int] = None, **kwargs):
+        """Run a method on a villager view (or, with ``villager_id=None``, on ``shard``'s engine) and return the result"""
+        if villager_id is not None:
+            shard = self._owner[villager_id][0]
+        return self._run({shard: ('call', (villager_id, method, args, kwargs))}, self.clock())[shard]
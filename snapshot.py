@@ -0,0 +1,236 @@
+import json
+import os
+import shutil
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from emotion_engine import MEMORY_DTYPE, VillageEmotionEngine
+
+SNAPSHOT_FORMAT = 'village-emotion-snapshot'
+SNAPSHOT_VERSION = 1
+
+# A snapshot is a directory of numbered parts: one full part followed by
+# zero or more delta parts holding only the rows dirtied since the previous
+# part. Every part is a directory with a JSON manifest and one .npy file per
+# column, so loading can memory-map the columns instead of reading them.
+PART_NAME = '{:06d}'
+MANIFEST = 'manifest.json'
+
+VILLAGER_COLUMNS = ('emotions', 'traits', 'last_update', 'positions')
+RELATIONSHIP_COLUMNS = ('villager', 'player', 'emotions', 'last_update', 'last_access', 'reputation')
+
+class SnapshotError(ValueError):
+    """Raised for missing, corrupt or incompatible snapshots"""
+
+def _parts(path: str) -> List[Tuple[int, str]]:
+    if not os.path.isdir(path):
+        return []
+    parts = []
+    for name in os.listdir(path):
+        if name.isdigit() and os.path.isfile(os.path.join(path, name, MANIFEST)):
+            parts.append((int(name), os.path.join(path, name)))
+    return sorted(parts)
+
+def _read_manifest(part: str) -> Dict:
+    with open(os.path.join(part, MANIFEST)) as handle:
+        manifest = json.load(handle)
+    if manifest.get('format') != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"{part} is not a village emotion snapshot")
+    if manifest.get('version') != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {manifest.get('version')} (expected {SNAPSHOT_VERSION})")
+    return manifest
+
+def _memory_columns(engine: VillageEmotionEngine, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # CSR layout: records of rows[i] are records[offsets[i]:offsets[i + 1]]
+    chunks = []
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    for i, row in enumerate(rows.tolist()):
+        if engine._memories[row] is not None:
+            records = engine._memories[row].event_memories.records()
+        elif engine._memory_loader is not None:
+            records = engine._memory_loader(row)
+        else:
+            records = None
+        if records is not None and len(records):
+            chunks.append(records)
+            offsets[i + 1] = offsets[i] + len(records)
+        else:
+            offsets[i + 1] = offsets[i]
+    records = np.concatenate(chunks) if chunks else np.zeros(0, MEMORY_DTYPE)
+    return offsets, records
+
+def _write_part(engine: VillageEmotionEngine, part: str, kind: str, rows: np.ndarray):
+    staging = part + '.tmp'
+    if os.path.exists(staging):
+        shutil.rmtree(staging)
+    os.makedirs(staging)
+
+    columns = {
+        'rows': rows,
+        'emotions': engine._emotions[rows],
+        'traits': engine._traits[rows],
+        'last_update': engine._last_update[rows],
+        'positions': engine._positions[rows]
+    }
+    relationships = engine.relationships.export(None if kind == 'full' else rows)
+    for name, values in relationships.items():
+        columns['rel_' + name] = values
+    columns['mem_offsets'], columns['mem_records'] = _memory_columns(engine, rows)
+    for name, values in columns.items():
+        np.save(os.path.join(staging, name + '.npy'), np.ascontiguousarray(values))
+
+    manifest = {
+        'format': SNAPSHOT_FORMAT,
+        'version': SNAPSHOT_VERSION,
+        'kind': kind,
+        'created': time.time(),
+        'villagers': len(engine),
+        'decay_rate': engine.decay_rate,
+        'relationship_decay_rate': engine.relationships.decay_rate,
+        'max_relationships': engine.relationships.max_relationships,
+        'max_memories': engine.max_memories,
+        # Villagers appended since the previous part (all of them for a full part)
+        'first_new_row': 0 if kind == 'full' else engine._saved_size,
+        'new_villager_ids': engine._ids[0 if kind == 'full' else engine._saved_size:],
+        'players': [engine.relationships.players.string(code) for code in range(len(engine.relationships.players))],
+        'event_types': [engine.event_types.string(code) for code in range(len(engine.event_types))]
+    }
+    with open(os.path.join(staging, MANIFEST), 'w') as handle:
+        json.dump(manifest, handle)
+    os.replace(staging, part)
+
+def save_snapshot(engine: VillageEmotionEngine, path: str, incremental: bool = False) -> str:
+    """Write the engine's state under ``path`` and return the part directory written.
+
+    With ``incremental=True`` and an engine that was last saved to or loaded
+    from ``path``, only rows dirtied since then are written as a delta part.
+    Otherwise a full part is written and older parts are removed.
+    """
+    os.makedirs(path, exist_ok=True)
+    parts = _parts(path)
+    sequence = parts[-1][0] + 1 if parts else 0
+    part = os.path.join(path, PART_NAME.format(sequence))
+
+    if incremental and parts and engine._checkpoint_path == os.path.abspath(path):
+        rows = np.union1d(engine.dirty_rows(), np.arange(engine._saved_size, len(engine)))
+        _write_part(engine, part, 'delta', rows.astype(np.intp))
+    else:
+        _write_part(engine, part, 'full', np.arange(len(engine)))
+        for _, old in parts:
+            shutil.rmtree(old)
+
+    engine.clear_dirty()
+    engine._checkpoint_path = os.path.abspath(path)
+    engine._saved_size = len(engine)
+    return part
+
+def _load_columns(part: str, names, mmap: bool) -> Dict[str, np.ndarray]:
+    # Copy-on-write maps: pages are read on first touch and writes stay in memory
+    mode = 'c' if mmap else None
+    return {name: np.load(os.path.join(part, name + '.npy'), mmap_mode=mode) for name in names}
+
+def _code_map(interner, strings: List[str]) -> np.ndarray:
+    return np.array([interner.intern(string) for string in strings], dtype=np.int32)
+
+def _remap_records(records: np.ndarray, players: np.ndarray, event_types: np.ndarray) -> np.ndarray:
+    records = np.array(records)
+    records['player'] = players[records['player']]
+    records['event_type'] = event_types[records['event_type']]
+    return records
+
+def _apply_part(engine: VillageEmotionEngine, part: str, manifest: Dict, mmap: bool, memory_sources: List):
+    columns = _load_columns(part, ('rows',) + VILLAGER_COLUMNS, mmap and manifest['kind'] == 'full')
+    rows = np.asarray(columns['rows'], dtype=np.intp)
+    new_ids = manifest['new_villager_ids']
+
+    if manifest['kind'] == 'full':
+        count = len(new_ids)
+        engine._emotions = columns['emotions']
+        engine._traits = columns['traits']
+        engine._last_update = columns['last_update']
+        engine._positions = columns['positions']
+        engine._dirty = np.zeros(count, dtype=bool)
+        engine._changed = np.zeros(count, dtype=np.int64)
+        engine._size = count
+        engine._ids = list(new_ids)
+        engine._index = {villager_id: row for row, villager_id in enumerate(new_ids)}
+        engine._memories = [None] * count
+        engine._views = [None] * count
+        placed = np.flatnonzero(~np.isnan(engine._positions).any(axis=1))
+        engine.spatial_index.insert_many(placed.tolist(), engine._positions[placed, 0], engine._positions[placed, 2])
+    else:
+        first_new = manifest['first_new_row']
+        if first_new != len(engine):
+            raise SnapshotError(f"Delta part {part} does not follow the previous part")
+        new_rows = np.arange(first_new, first_new + len(new_ids))
+        engine._reserve(first_new + len(new_ids))
+        engine._size += len(new_ids)
+        for row, villager_id in zip(new_rows.tolist(), new_ids):
+            engine._index[villager_id] = row
+        engine._ids.extend(new_ids)
+        engine._memories.extend([None] * len(new_ids))
+        engine._views.extend([None] * len(new_ids))
+        engine._emotions[rows] = columns['emotions']
+        engine._traits[rows] = columns['traits']
+        engine._last_update[rows] = columns['last_update']
+        engine.move_villagers(rows, columns['positions'])
+
+    players = _code_map(engine.relationships.players, manifest['players'])
+    event_types = _code_map(engine.event_types, manifest['event_types'])
+
+    relationships = _load_columns(part, ['rel_' + name for name in RELATIONSHIP_COLUMNS], False)
+    if manifest['kind'] != 'full':
+        engine.relationships.drop_rows(rows)
+    engine.relationships.load(
+        relationships['rel_villager'], players[relationships['rel_player']], relationships['rel_emotions'],
+        relationships['rel_last_update'], relationships['rel_last_access'], relationships['rel_reputation']
+    )
+
+    memory = _load_columns(part, ('mem_offsets', 'mem_records'), mmap)
+    # Full parts hold every row in order; deltas need a row -> position lookup
+    positions = None if manifest['kind'] == 'full' else {row: i for i, row in enumerate(rows.tolist())}
+    memory_sources.append((positions, len(rows), memory['mem_offsets'], memory['mem_records'], players, event_types))
+    # Rows rewritten by this part must not keep memories built from older parts
+    for row in rows.tolist():
+        engine._memories[row] = None
+
+def load_snapshot(path: str, mmap: bool = True, **engine_options) -> VillageEmotionEngine:
+    """Rebuild a VillageEmotionEngine from a snapshot directory.
+
+    The newest full part is loaded and later delta parts are applied on top.
+    With ``mmap=True`` villager columns and memory buffers of the full part
+    are memory-mapped copy-on-write, so startup only reads the manifests,
+    positions and relationships; memory buffers are decoded per villager on
+    first access. ``engine_options`` (clock, rng, behavior_model...) are
+    passed to the VillageEmotionEngine constructor.
+    """
+    parts = _parts(path)
+    fulls = [i for i, (_, part) in enumerate(parts) if _read_manifest(part)['kind'] == 'full']
+    if not fulls:
+        raise SnapshotError(f"No full snapshot found under {path}")
+    parts = parts[fulls[-1]:]
+
+    first = _read_manifest(parts[0][1])
+    engine = VillageEmotionEngine(
+        capacity=0, decay_rate=first['decay_rate'], max_relationships=first['max_relationships'],
+        max_memories=first['max_memories'], **engine_options
+    )
+    engine.relationships.decay_rate = first['relationship_decay_rate']
+
+    memory_sources = []
+    for _, part in parts:
+        _apply_part(engine, part, _read_manifest(part), mmap, memory_sources)
+
+    def load_memory(row: int) -> Optional[np.ndarray]:
+        # Later parts win: look the row up newest first
+        for positions, count, offsets, records, players, event_types in reversed(memory_sources):
+            i = (row if row < count else None) if positions is None else positions.get(row)
+            if i is not None:
+                return _remap_records(records[offsets[i]:offsets[i + 1]], players, event_types)
+        return None
+
+    engine._memory_loader = load_memory
+    engine.clear_dirty()
+    engine._checkpoint_path = os.path.abspath(path)
+    engine._saved_size = len(engine)
+    return engine
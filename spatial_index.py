@@ -0,0 +1,140 @@
+import math
+import numpy as np
+from typing import Dict, Hashable, Iterator, List, Sequence, Set, Tuple
+
+# Minecraft chunks are 16x16 blocks in the horizontal (x, z) plane
+CHUNK_SIZE = 16
+
+def chunk_of(x: float, z: float, cell_size: int = CHUNK_SIZE) -> Tuple[int, int]:
+    """Chunk (cell) coordinates containing a block position"""
+    return (math.floor(x / cell_size), math.floor(z / cell_size))
+
+def linear_falloff(distance: np.ndarray, radius: float) -> np.ndarray:
+    """1 at the origin fading linearly to 0 at the radius"""
+    return np.clip(1.0 - distance / radius, 0.0, 1.0)
+
+def smooth_falloff(distance: np.ndarray, radius: float) -> np.ndarray:
+    """Smoothstep-shaped falloff: flat near the origin, soft at the edge"""
+    t = np.clip(1.0 - distance / radius, 0.0, 1.0)
+    return t * t * (3.0 - 2.0 * t)
+
+def inverse_square_falloff(distance: np.ndarray, radius: float) -> np.ndarray:
+    """Inverse-square falloff (in block units), cut off at the radius"""
+    return np.where(distance <= radius, 1.0 / (1.0 + distance * distance), 0.0)
+
+def constant_falloff(distance: np.ndarray, radius: float) -> np.ndarray:
+    """Full strength everywhere inside the radius"""
+    return np.where(distance <= radius, 1.0, 0.0)
+
+FALLOFF_CURVES = {
+    'linear': linear_falloff,
+    'smooth': smooth_falloff,
+    'inverse_square': inverse_square_falloff,
+    'constant': constant_falloff
+}
+
+def group_by_cell(xs: np.ndarray, zs: np.ndarray, cell_size: int = CHUNK_SIZE) -> Dict[Tuple[int, int], np.ndarray]:
+    """Indices of positions bucketed by the cell containing them"""
+    cells = np.column_stack([np.floor(np.asarray(xs, dtype=float) / cell_size),
+                             np.floor(np.asarray(zs, dtype=float) / cell_size)]).astype(np.int64)
+    if len(cells) == 0:
+        return {}
+    order = np.lexsort((cells[:, 1], cells[:, 0]))
+    keys, starts = np.unique(cells[order], axis=0, return_index=True)
+    return dict(zip(map(tuple, keys.tolist()), np.split(order, starts[1:])))
+
+class ChunkSpatialIndex:
+    """Uniform grid over the (x, z) plane, aligned with Minecraft chunks.
+
+    Items are bucketed by the chunk they stand in. Moves only touch the
+    buckets when an item crosses a chunk border, and radius queries visit
+    the few chunks overlapping the query disc, so lookups cost O(local
+    density) instead of O(N).
+    """
+    def __init__(self, cell_size: int = CHUNK_SIZE):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._cell_of: Dict[Hashable, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._cell_of
+
+    def insert(self, item: Hashable, x: float, z: float):
+        """Add an item at a position (moves it if already present)"""
+        cell = chunk_of(x, z, self.cell_size)
+        previous = self._cell_of.get(item)
+        if previous == cell:
+            return
+        if previous is not None:
+            self._discard(item, previous)
+        self.cells.setdefault(cell, set()).add(item)
+        self._cell_of[item] = cell
+
+    # Moving is the same operation; the alias reads better at call sites
+    move = insert
+
+    def insert_many(self, items: Sequence[Hashable], xs: np.ndarray, zs: np.ndarray):
+        """Bulk ``insert``: chunk coordinates are computed in one vectorized pass"""
+        cxs = np.floor(np.asarray(xs, dtype=float) / self.cell_size).astype(np.int64).tolist()
+        czs = np.floor(np.asarray(zs, dtype=float) / self.cell_size).astype(np.int64).tolist()
+        cells = self.cells
+        cell_of = self._cell_of
+        for item, cell in zip(items, zip(cxs, czs)):
+            previous = cell_of.get(item)
+            if previous == cell:
+                continue
+            if previous is not None:
+                self._discard(item, previous)
+            bucket = cells.get(cell)
+            if bucket is None:
+                bucket = cells[cell] = set()
+            bucket.add(item)
+            cell_of[item] = cell
+
+    def remove(self, item: Hashable):
+        """Remove an item from the index"""
+        cell = self._cell_of.pop(item)
+        self._discard(item, cell)
+
+    def _discard(self, item: Hashable, cell: Tuple[int, int]):
+        bucket = self.cells[cell]
+        bucket.discard(item)
+        if not bucket:
+            del self.cells[cell]
+
+    def cell_of(self, item: Hashable) -> Tuple[int, int]:
+        return self._cell_of[item]
+
+    def cells_in_radius(self, x: float, z: float, radius: float) -> Iterator[Tuple[int, int]]:
+        """Occupied cells overlapping the square bounding a query disc"""
+        min_cx, min_cz = chunk_of(x - radius, z - radius, self.cell_size)
+        max_cx, max_cz = chunk_of(x + radius, z + radius, self.cell_size)
+        for cx in range(min_cx, max_cx + 1):
+            for cz in range(min_cz, max_cz + 1):
+                if (cx, cz) in self.cells:
+                    yield (cx, cz)
+
+    def query_radius(self, x: float, z: float, radius: float) -> List[Hashable]:
+        """Candidate items in cells overlapping the disc (caller filters by exact distance)"""
+        candidates = []
+        for cell in self.cells_in_radius(x, z, radius):
+            candidates.extend(self.cells[cell])
+        return candidates
+
+    def neighbor_cells(self, cell: Tuple[int, int], radius: float, occupied=None) -> List[Tuple[int, int]]:
+        """Occupied cells that may hold items within radius of anything in ``cell``
+
+        ``occupied`` overrides which cells count as occupied (default: this index's cells).
+        """
+        occupied = self.cells if occupied is None else occupied
+        reach = int(math.ceil(radius / self.cell_size))
+        cx, cz = cell
+        return [
+            (cx + dx, cz + dz)
+            for dx in range(-reach, reach + 1)
+            for dz in range(-reach, reach + 1)
+            if (cx + dx, cz + dz) in occupied
+        ]
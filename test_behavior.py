@@ -0,0 +1,78 @@
+import numpy as np
+from emotion_engine import (DEFAULT_BEHAVIOR_MODEL, EMOTIONS, BehaviorModel, SimulatedClock, VillageEmotionEngine,
+                            VillagerEmotionSystem, emotion_dict)
+
+def _formulas(emotions):
+    """The hand-written behavior weights the matrix model replaced"""
+    return {
+        'approach_player': max(0, emotions['joy'] * 0.8 + emotions['curiosity'] * 0.5 - emotions['fear'] * 0.6),
+        'give_gift': max(0, emotions['joy'] * 0.9 + emotions['trust'] * 0.7),
+        'wave_greeting': max(0, emotions['joy'] * 0.6 + emotions['curiosity'] * 0.4),
+        'follow_player': max(0, emotions['joy'] * 0.5 + emotions['trust'] * 0.8 - emotions['fear'] * 0.3),
+        'flee_from_player': max(0, emotions['fear'] * 0.9 + emotions['anger'] * 0.3),
+        'hide_indoors': max(0, emotions['fear'] * 0.8 + emotions['sadness'] * 0.4),
+        'call_for_help': max(0, emotions['fear'] * 0.7 + emotions['anger'] * 0.5),
+        'avoid_interaction': max(0, emotions['anger'] * 0.6 + emotions['sadness'] * 0.7),
+        'work_efficiency': 1.0 + emotions['joy'] * 0.3 - emotions['sadness'] * 0.4 - emotions['fear'] * 0.2,
+        'trading_willingness': max(0.1, 1.0 + emotions['joy'] * 0.4 + emotions['trust'] * 0.6 - emotions['anger'] * 0.8),
+        'explore_area': max(0, emotions['curiosity'] * 0.8 + emotions['joy'] * 0.3 - emotions['fear'] * 0.5),
+        'investigate_sounds': max(0, emotions['curiosity'] * 0.7 - emotions['fear'] * 0.4)
+    }
+
+def test_default_model_matches_the_original_formulas():
+    states = np.random.default_rng(6).uniform(-1, 1, (200, len(EMOTIONS)))
+    weights = DEFAULT_BEHAVIOR_MODEL.weights(states)
+    for state, row in zip(states, weights):
+        expected = _formulas(emotion_dict(state))
+        assert list(expected) == DEFAULT_BEHAVIOR_MODEL.names
+        assert np.allclose(row, list(expected.values()))
+        # One emotion row gives the same weights as the batched call
+        assert np.allclose(DEFAULT_BEHAVIOR_MODEL.weights(state), row)
+
+def test_villager_behavior_weights_follow_its_emotions():
+    villager = VillagerEmotionSystem('villager_0', clock=SimulatedClock(), rng=np.random.default_rng(1))
+    villager.emotions.values[:] = [0.6, -0.2, 0.3, 0.1, 0.5, 0.4]
+    villager.update_behavior_weights()
+    assert villager.behavior_weights == DEFAULT_BEHAVIOR_MODEL.as_dict(villager.behavior_vector)
+    assert np.allclose(list(villager.behavior_weights.values()),
+                       list(_formulas(villager.emotions.get_emotional_state()).values()))
+
+def test_seeded_sampling_is_deterministic():
+    def sample(seed):
+        engine = VillageEmotionEngine(capacity=64, clock=SimulatedClock(), rng=np.random.default_rng(seed))
+        engine.add_villagers([f'villager_{i}' for i in range(50)])
+        engine._emotions[:50] = np.random.default_rng(2).uniform(-1, 1, (50, len(EMOTIONS)))
+        return engine.sample_actions(), engine.sample_action_bits()
+
+    masks, bits = sample(42)
+    again_masks, again_bits = sample(42)
+    assert np.array_equal(masks, again_masks) and np.array_equal(bits, again_bits)
+    assert not np.array_equal(masks, sample(43)[0])
+    assert masks.shape == (50, len(DEFAULT_BEHAVIOR_MODEL)) and bits.shape == (50, 2)
+    assert np.array_equal(DEFAULT_BEHAVIOR_MODEL.unpack(DEFAULT_BEHAVIOR_MODEL.pack(masks)), masks)
+
+    first = VillagerEmotionSystem('villager_0', clock=SimulatedClock(), rng=np.random.default_rng(7))
+    second = VillagerEmotionSystem('villager_0', clock=SimulatedClock(), rng=np.random.default_rng(7))
+    first.emotions.values[:] = second.emotions.values[:] = 0.5
+    first.update_behavior_weights()
+    second.update_behavior_weights()
+    assert [first.get_behavior_actions() for _ in range(20)] == [second.get_behavior_actions() for _ in range(20)]
+
+def test_sampling_frequency_follows_weights():
+    model = BehaviorModel()
+    model.register('always', {}, bias=1.0)
+    model.register('never', {})
+    model.register('sometimes', {'joy': 0.5})
+    mask = model.sample(model.weights(np.tile([0.6, 0, 0, 0, 0, 0], (20000, 1))), np.random.default_rng(0))
+    assert mask[:, 0].all() and not mask[:, 1].any()
+    assert abs(mask[:, 2].mean() - 0.3) < 0.02
+    assert model.actions(mask[0])[0] == 'always'
+
+def test_registering_a_behavior_at_runtime():
+    model = BehaviorModel()
+    model.register('sing', {'joy': 1.0})
+    model.register('sulk', {'sadness': 0.5}, bias=0.1)
+    assert model.names == ['sing', 'sulk']
+    assert np.allclose(model.weights(np.array([0.4, 0, 0, -0.5, 0, 0])), [0.4, 0.0])
+    model.register('sing', {'joy': 0.5})
+    assert len(model) == 2 and np.allclose(model.weights(np.array([0.4, 0, 0, 0, 0, 0])), [0.2, 0.1])
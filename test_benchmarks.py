@@ -0,0 +1,11 @@
+from benchmarks import compare
+
+def _report(**metrics):
+    return {'results': [{'benchmark': 'broadcast', 'villagers': 100, **metrics}]}
+
+def test_compare_flags_slower_timings_only():
+    baseline = _report(seconds_per_broadcast=0.01, villagers_reached=40, events_per_second=1000.0)
+    assert compare(_report(seconds_per_broadcast=0.01, villagers_reached=80, events_per_second=1000.0), baseline) == []
+    regressions = compare(_report(seconds_per_broadcast=0.02, villagers_reached=40, events_per_second=500.0), baseline)
+    assert len(regressions) == 2
+    assert all('villagers_reached' not in line for line in regressions)
@@ -0,0 +1,127 @@
+import json
+import numpy as np
+import pytest
+from bridge import (ACK, FLAG_JSON, MSG_ACK, MSG_ACTIONS, MSG_DESPAWN, MSG_DIALOGUE, MSG_ERROR, MSG_EVENTS, MSG_MOVE,
+                    MSG_SPAWN, NO_STRING, BridgeError, BridgeServer, FRAME, _Request, decode_actions, decode_dialogue,
+                    decode_events, decode_lines, decode_placements, decode_strings, encode_actions, encode_dialogue,
+                    encode_events, encode_lines, encode_placements, encode_villagers)
+from emotion_engine import GameEvent, SimulatedClock, VillageEmotionEngine
+
+def _server() -> BridgeServer:
+    engine = VillageEmotionEngine(capacity=8, clock=SimulatedClock(), rng=np.random.default_rng(5))
+    engine.add_villagers([f'villager_{i}' for i in range(4)])
+    return BridgeServer(engine)
+
+def _reply(frame: bytes):
+    length, kind, flags, request_id = FRAME.unpack_from(frame)
+    return kind, request_id, frame[FRAME.size:FRAME.size + length]
+
+def test_event_codec_round_trip():
+    events = [('villager_0', GameEvent('player_gift', 'alice', 0.5)), ('villager_1', GameEvent('monster_nearby', '', 2.0))]
+    strings, records = decode_events(encode_events(events))
+    assert [strings[code] for code in records['villager']] == ['villager_0', 'villager_1']
+    assert [strings[code] for code in records['event_type']] == ['player_gift', 'monster_nearby']
+    assert strings[records['player'][0]] == 'alice' and records['player'][1] == NO_STRING
+    assert np.allclose(records['intensity'], [0.5, 2.0])
+
+def test_dialogue_lines_and_actions_round_trip():
+    strings, records = decode_dialogue(encode_dialogue([('villager_2', 'bob', 'weather')]))
+    assert [strings[records[0][field]] for field in ('villager', 'player', 'topic')] == ['villager_2', 'bob', 'weather']
+    assert decode_lines(encode_lines(['hello', None, 'hello'])) == ['hello', None, 'hello']
+
+    behaviors = ['flee', 'trade', 'gossip']
+    bitsets = np.packbits(np.array([[1, 0, 1], [0, 1, 0]], bool), axis=-1, bitorder='little')
+    payload = encode_events([('a', GameEvent('x', '', 1.0)), ('b', GameEvent('x', '', 1.0))])
+    table, _ = decode_strings(payload)
+    actions, unknown = decode_actions(encode_actions(3, np.array([0, 2]), bitsets, 4), table, behaviors)
+    assert actions == {'a': ['flee', 'gossip'], 'b': ['trade']} and unknown == 4
+
+@pytest.mark.parametrize('intensity', [float('nan'), float('inf'), float('-inf')])
+def test_non_finite_intensities_are_rejected(intensity):
+    with pytest.raises(BridgeError):
+        decode_events(encode_events([('villager_0', GameEvent('player_gift', 'alice', intensity))]))
+
+@pytest.mark.parametrize('body', [
+    b'not json', b'[]', b'{"events": {}}', b'{"events": [1]}',
+    b'{"events": [{"villager_id": 3, "event_type": "player_gift"}]}',
+    b'{"events": [{"villager_id": "villager_0", "event_type": "player_gift", "intensity": "high"}]}',
+    b'{"events": [{"villager_id": "villager_0", "event_type": "player_gift", "intensity": true}]}',
+    b'{"events": [{"villager_id": "villager_0", "event_type": "player_gift", "intensity": NaN}]}'
+])
+def test_malformed_json_events_get_an_error_reply(body):
+    server = _server()
+    try:
+        kind, request_id, payload = _reply(server._process([_Request(MSG_EVENTS, FLAG_JSON, 7, body)])[0])
+    finally:
+        server._executor.shutdown()
+    assert kind == MSG_ERROR and request_id == 7
+    assert json.loads(payload)['error'].startswith('BridgeError')
+
+def test_unexpected_errors_only_fail_their_own_request():
+    server = _server()
+    server.dialogue = lambda strings, records: 1 / 0
+    requests = [_Request(MSG_DIALOGUE, 0, 1, encode_dialogue([('villager_0', 'alice', 'weather')])),
+                _Request(MSG_EVENTS, 0, 2, encode_events([('villager_0', GameEvent('player_gift', 'alice', 0.5))]))]
+    try:
+        replies = [_reply(frame) for frame in server._process(requests)]
+    finally:
+        server._executor.shutdown()
+    assert replies[0][:2] == (MSG_ERROR, 1) and replies[0][2].startswith(b'ZeroDivisionError')
+    assert replies[1][:2] == (MSG_ACTIONS, 2)
+    assert server.metrics()['errors'] == 1
+
+def _ack(server: BridgeServer, kind: int, payload: bytes, flags: int = 0):
+    reply_kind, _, body = _reply(server._process([_Request(kind, flags, 3, payload)])[0])
+    assert reply_kind == MSG_ACK, body
+    return json.loads(body) if flags & FLAG_JSON else ACK.unpack(body)
+
+def test_placement_codec_round_trip():
+    strings, records = decode_placements(encode_placements([('villager_0', (30000000.5, 64.0, -12.25)),
+                                                            ('villager_1', None)]))
+    assert [strings[code] for code in records['villager']] == ['villager_0', 'villager_1']
+    assert records[0][['x', 'y', 'z']].tolist() == (30000000.5, 64.0, -12.25)
+    assert np.isnan(records[1]['x'])
+    with pytest.raises(BridgeError):
+        decode_placements(encode_placements([('villager_0', (float('inf'), 64.0, 0.0))]))
+
+def test_spawn_move_and_despawn_keep_the_engine_in_step():
+    server = _server()
+    engine = server.engine
+    try:
+        # villager_0 is already known, so it is placed rather than created; repeats in a frame count once
+        spawned = encode_placements([('villager_0', (0.0, 64.0, 0.0)), ('villager_9', (4.0, 64.0, 0.0)),
+                                     ('villager_9', (5.0, 64.0, 0.0))])
+        assert _ack(server, MSG_SPAWN, spawned) == (1, 0)
+        assert len(engine) == 5 and engine.villager('villager_9').position == (5.0, 64.0, 0.0)
+        assert sorted(engine.rows_within((0.0, 64.0, 0.0), 8.0).tolist()) == [0, 4]
+
+        assert _ack(server, MSG_MOVE, encode_placements([('villager_9', (100.0, 64.0, 0.0)),
+                                                         ('ghost', (0.0, 64.0, 0.0))])) == (1, 1)
+        assert engine.rows_within((0.0, 64.0, 0.0), 8.0).tolist() == [0]
+
+        engine.apply_event(GameEvent('player_gift', 'alice', 1.0), [0])
+        emotions = engine.current_emotions([0])
+        assert _ack(server, MSG_DESPAWN, encode_villagers(['villager_0', 'ghost'])) == (1, 1)
+        # Despawned villagers leave the spatial index but keep their state and can come back
+        assert engine.villager('villager_0').position is None and len(engine.rows_within((0.0, 64.0, 0.0), 8.0)) == 0
+        assert np.array_equal(engine.current_emotions([0]), emotions)
+        assert _ack(server, MSG_SPAWN, encode_placements([('villager_0', (1.0, 64.0, 1.0))])) == (0, 0)
+        assert engine.rows_within((0.0, 64.0, 0.0), 8.0).tolist() == [0]
+    finally:
+        server._executor.shutdown()
+
+def test_placements_in_json():
+    server = _server()
+    try:
+        body = {'villagers': [{'villager_id': 'villager_7', 'position': [1, 64, 2]}, {'villager_id': 'villager_8'}]}
+        assert _ack(server, MSG_SPAWN, json.dumps(body).encode('utf-8'), FLAG_JSON) == {'applied': 2, 'unknown': 0}
+        assert server.engine.villager('villager_7').position == (1.0, 64.0, 2.0)
+        assert server.engine.villager('villager_8').position is None
+        body = {'villagers': [{'villager_id': 'villager_7'}, {'villager_id': 'nobody'}]}
+        assert _ack(server, MSG_DESPAWN, json.dumps(body).encode('utf-8'), FLAG_JSON) == {'applied': 1, 'unknown': 1}
+
+        bad = json.dumps({'villagers': [{'villager_id': 'villager_7', 'position': [1, 2]}]}).encode('utf-8')
+        kind, _, payload = _reply(server._process([_Request(MSG_MOVE, FLAG_JSON, 4, bad)])[0])
+        assert kind == MSG_ERROR and json.loads(payload)['error'].startswith('BridgeError')
+    finally:
+        server._executor.shutdown()
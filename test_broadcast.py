@@ -0,0 +1,57 @@
+import numpy as np
+from emotion_engine import EMOTIONS, BroadcastEvent, GameEvent, SimulatedClock, VillageEmotionEngine
+from spatial_index import FALLOFF_CURVES
+
+POSITIONS = [(0.0, 64.0, 0.0), (8.0, 64.0, 0.0), (0.0, 64.0, -24.0), (40.0, 64.0, 0.0), (np.nan, np.nan, np.nan)]
+
+def _engine() -> VillageEmotionEngine:
+    engine = VillageEmotionEngine(capacity=8, clock=SimulatedClock(), rng=np.random.default_rng(5))
+    engine.add_villagers([f'villager_{i}' for i in range(len(POSITIONS))], positions=np.array(POSITIONS))
+    return engine
+
+def test_intensity_fades_with_distance():
+    for falloff in ('linear', 'smooth', 'inverse_square'):
+        engine, reference = _engine(), _engine()
+        reached = engine.broadcast(BroadcastEvent('monster_nearby', 0.8, origin=(0.0, 64.0, 0.0), radius=32.0,
+                                                  falloff=falloff))
+        assert sorted(reached.tolist()) == [0, 1, 2]
+        # Same as applying the event villager by villager at the faded intensity
+        for row, distance in zip((0, 1, 2), (0.0, 8.0, 24.0)):
+            intensity = 0.8 * float(FALLOFF_CURVES[falloff](np.array(distance), 32.0))
+            reference.apply_event(GameEvent('monster_nearby', '', intensity), [row])
+        assert np.allclose(engine.current_emotions(), reference.current_emotions()), falloff
+        assert np.array_equal(engine.current_emotions()[3:], np.zeros((2, len(EMOTIONS))))
+
+def test_villagers_at_the_edge_are_left_alone():
+    engine = _engine()
+    reached = engine.broadcast(BroadcastEvent('monster_nearby', 1.0, origin=(0.0, 64.0, 0.0), radius=24.0))
+    # Villager 2 stands exactly on the radius, where linear falloff reaches zero
+    assert sorted(reached.tolist()) == [0, 1]
+    assert engine.last_update[2] == 0.0 and not engine.emotions[2].any()
+
+def test_global_broadcast_reaches_everyone_at_full_intensity():
+    engine, reference = _engine(), _engine()
+    engine.clock.advance(5.0)
+    reference.clock.advance(5.0)
+    reached = engine.broadcast(BroadcastEvent('sunny_weather', 0.7))
+    reference.apply_event(GameEvent('sunny_weather', '', 0.7))
+    assert sorted(reached.tolist()) == list(range(len(POSITIONS)))
+    assert np.allclose(engine.current_emotions(), reference.current_emotions())
+
+def test_broadcasts_without_a_player_skip_memory_writes():
+    engine = _engine()
+    engine.broadcast(BroadcastEvent('monster_nearby', 1.0, origin=(0.0, 64.0, 0.0), radius=32.0))
+    engine.broadcast(BroadcastEvent('night_time', 0.5))
+    assert len(engine.relationships) == 0
+    assert all(len(engine.memory(row).event_memories) == 0 for row in range(len(POSITIONS)))
+
+    # A player-caused broadcast is remembered by the villagers it reached
+    engine.broadcast(BroadcastEvent('village_celebration', 1.0, origin=(0.0, 64.0, 0.0), radius=16.0,
+                                    player_id='alice'))
+    assert [len(engine.memory(row).event_memories) for row in range(len(POSITIONS))] == [1, 1, 0, 0, 0]
+    assert engine.relationships.slot(0, 'alice') is not None and engine.relationships.slot(2, 'alice') is None
+
+def test_unknown_event_types_change_nothing():
+    engine = _engine()
+    engine.broadcast(BroadcastEvent('meteor_shower', 1.0))
+    assert not engine.emotions.any() and not engine.last_update.any()
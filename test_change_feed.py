@@ -0,0 +1,29 @@
+import numpy as np
+from change_feed import CHANGE_REPUTATION, ChangeFeed
+from emotion_engine import SimulatedClock, VillageEmotionEngine
+
+def _engine(max_relationships=None) -> VillageEmotionEngine:
+    engine = VillageEmotionEngine(capacity=16, clock=SimulatedClock(), rng=np.random.default_rng(6),
+                                  max_relationships=max_relationships)
+    engine.add_villagers([f'villager_{i}' for i in range(8)])
+    return engine
+
+def test_direct_reputation_updates_reach_the_feed():
+    engine = _engine()
+    feed = ChangeFeed(engine)
+    subscription = feed.subscribe(dominant=False, reputation=True)
+    for _ in range(5):
+        engine.villager('villager_3').memory.update_reputation('alice', {'joy': 1.0, 'trust': 1.0})
+    assert feed.poll() == 1
+    deltas = subscription.drain()[0].deltas
+    assert deltas['kind'][0] == CHANGE_REPUTATION and deltas['row'][0] == 3
+    assert feed.describe(deltas)[0]['new'] == 'warm'
+
+def test_evicted_relationships_stamp_their_rows():
+    engine = _engine(max_relationships=4)
+    engine.apply_event_batch('player_gift', 'alice', np.arange(4), 0.5)
+    sequence = engine.change_sequence
+    engine.apply_event_batch('player_gift', 'alice', np.arange(4, 8), 0.5)
+    rows, current = engine.changes_since(sequence)
+    assert current == engine.change_sequence
+    assert set(rows.tolist()) == set(range(8))
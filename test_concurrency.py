@@ -0,0 +1,101 @@
+import copy
+import pickle
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from emotion_engine import DEFAULT_EVENT_CATALOG, GameEvent, SimulatedClock, VillageEmotionEngine, VillagerEmotionSystem
+from scheduler import TIER_FAR, TIER_NEAR, TickScheduler
+
+def _engine(size: int = 4000) -> VillageEmotionEngine:
+    rng = np.random.default_rng(2)
+    engine = VillageEmotionEngine(capacity=size, clock=SimulatedClock(), rng=rng)
+    positions = np.column_stack([rng.uniform(0, 500, size), np.full(size, 64.0), rng.uniform(0, 500, size)])
+    engine.add_villagers([f'villager_{i}' for i in range(size)], positions=positions)
+    return engine
+
+def test_parallel_partitions_match_serial():
+    serial, parallel = _engine(), _engine()
+    partitions = np.array_split(np.arange(len(serial)), 8)
+
+    def work(engine, i):
+        for k in range(10):
+            engine.apply_event_batch('player_gift' if k % 2 else 'monster_nearby', f'p{i % 3}', partitions[i], 0.3)
+
+    for i in range(8):
+        work(serial, i)
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: work(parallel, i), range(8)))
+    assert np.allclose(serial.emotions, parallel.emotions)
+
+def test_mixed_workload_does_not_deadlock():
+    engine = _engine(2000)
+    stop = threading.Event()
+    errors = []
+    calls = [
+        lambda: engine.apply_event(GameEvent('player_gift', 'x', 0.5), np.arange(0, 2000, 7)),
+        lambda: engine.contagion_tick(),
+        lambda: engine.move_villagers([5], [(1.0, 64.0, 1.0)]),
+        lambda: engine.generate_dialogue_many(engine.villager_ids[:20], 'x'),
+        lambda: engine.villager('villager_3').get_status(),
+        lambda: engine.dirty_rows()
+    ]
+
+    def loop(call):
+        try:
+            while not stop.is_set():
+                call()
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=loop, args=(call,)) for call in calls]
+    for thread in threads:
+        thread.start()
+    stop.wait(1.0)
+    stop.set()
+    for thread in threads:
+        thread.join(10)
+    assert not any(thread.is_alive() for thread in threads)
+    assert not errors
+    assert np.isfinite(engine.emotions).all()
+
+def test_standalone_villagers_copy_and_pickle():
+    villager = VillagerEmotionSystem('s', clock=SimulatedClock())
+    villager.process_game_event(GameEvent('player_gift', 'p', 0.5))
+    for clone in (copy.deepcopy(villager), pickle.loads(pickle.dumps(villager))):
+        assert clone.memory.get_reputation('p') == villager.memory.get_reputation('p')
+        clone.process_game_event(GameEvent('player_gift', 'p', 0.5))
+        assert clone.memory.get_reputation('p') > villager.memory.get_reputation('p')
+
+def test_copied_catalog_is_independent():
+    catalog = copy.deepcopy(DEFAULT_EVENT_CATALOG)
+    catalog['dragon_roar'] = {'fear': 0.9}
+    assert 'dragon_roar' in catalog
+    assert 'dragon_roar' not in DEFAULT_EVENT_CATALOG
+
+def test_retiering_while_villagers_move():
+    engine = _engine(3000)
+    scheduler = TickScheduler(engine, simulation_distance=4)
+    scheduler.update_player('alice', (250.0, 64.0, 250.0))
+    stop = threading.Event()
+    errors = []
+
+    def wander():
+        rng = np.random.default_rng(8)
+        while not stop.is_set():
+            rows = rng.integers(0, 3000, 200)
+            positions = np.column_stack([rng.uniform(0, 500, 200), np.full(200, 64.0), rng.uniform(0, 500, 200)])
+            engine.move_villagers(rows, positions)
+
+    mover = threading.Thread(target=wander)
+    mover.start()
+    try:
+        for _ in range(200):
+            scheduler._retier()
+    except Exception as error:
+        errors.append(error)
+    finally:
+        stop.set()
+        mover.join()
+    assert not errors
+    tiers = scheduler.tiers()
+    assert len(tiers[TIER_NEAR]) + len(tiers[TIER_FAR]) > 0
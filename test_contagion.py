@@ -0,0 +1,90 @@
+import numpy as np
+from emotion_engine import (EMOTIONS, TRAIT_INDEX, SimulatedClock, VillageEmotionEngine, VillagerEmotionSystem)
+from spatial_index import FALLOFF_CURVES, ChunkSpatialIndex
+
+def _engine(positions, seed: int = 3) -> VillageEmotionEngine:
+    rng = np.random.default_rng(seed)
+    engine = VillageEmotionEngine(capacity=8, clock=SimulatedClock(), rng=rng)
+    engine.add_villagers([f'villager_{i}' for i in range(len(positions))], positions=np.array(positions, dtype=float))
+    engine._emotions[:len(engine)] = rng.uniform(-1, 1, (len(engine), len(EMOTIONS)))
+    return engine
+
+def _all_pairs(engine: VillageEmotionEngine, radius: float, falloff: str) -> np.ndarray:
+    """Reference contagion over every pair of villagers"""
+    emotions = engine.current_emotions()
+    positions = engine.positions
+    distance = np.linalg.norm(positions[:, None, :] - positions[None, :, :], axis=2)
+    weights = FALLOFF_CURVES[falloff](distance, radius)
+    np.fill_diagonal(weights, 0.0)
+    total = weights.sum(axis=1)
+    strength = engine.traits[:, TRAIT_INDEX['socialness']][:, None] * 0.1
+    reached = total > 0
+    social = weights[reached] @ emotions / total[reached, None]
+    expected = emotions.copy()
+    expected[reached] = np.clip(emotions[reached] * (1 - strength[reached]) + social * strength[reached], -1.0, 1.0)
+    return expected
+
+def test_falloff_curves():
+    distance = np.array([0.0, 8.0, 16.0, 20.0])
+    assert np.allclose(FALLOFF_CURVES['linear'](distance, 16.0), [1.0, 0.5, 0.0, 0.0])
+    assert np.allclose(FALLOFF_CURVES['smooth'](distance, 16.0), [1.0, 0.5, 0.0, 0.0])
+    assert np.allclose(FALLOFF_CURVES['constant'](distance, 16.0), [1.0, 1.0, 1.0, 0.0])
+    assert np.allclose(FALLOFF_CURVES['inverse_square'](distance, 16.0), [1.0, 1 / 65, 1 / 257, 0.0])
+    # Smoothstep stays flatter than linear near the origin
+    assert FALLOFF_CURVES['smooth'](np.array(2.0), 16.0) > FALLOFF_CURVES['linear'](np.array(2.0), 16.0)
+
+def test_contagion_matches_all_pairs_reference():
+    rng = np.random.default_rng(12)
+    # Spread over several chunks so neighbourhoods cross chunk borders
+    positions = np.column_stack([rng.uniform(-40, 40, 300), np.full(300, 64.0), rng.uniform(-40, 40, 300)])
+    for falloff in FALLOFF_CURVES:
+        engine = _engine(positions)
+        expected = _all_pairs(engine, 10.0, falloff)
+        engine.contagion_tick(radius=10.0, falloff=falloff)
+        assert np.allclose(engine.current_emotions(), expected), falloff
+
+def test_villagers_out_of_range_are_untouched():
+    engine = _engine([(0.0, 64.0, 0.0), (4.0, 64.0, 0.0), (200.0, 64.0, 0.0)])
+    before = engine.current_emotions()
+    active = engine.contagion_tick(radius=16.0)
+    assert sorted(active.tolist()) == [0, 1]
+    assert np.array_equal(engine.current_emotions()[2], before[2])
+
+    # Closer neighbours pull harder: a cheerful neighbour at 2 blocks outweighs an unhappy one at 12
+    engine = _engine([(0.0, 64.0, 0.0), (2.0, 64.0, 0.0), (-12.0, 64.0, 0.0)])
+    engine._emotions[:3] = 0.0
+    engine._emotions[1, 0] = 1.0
+    engine._emotions[2, 0] = -1.0
+    engine.contagion_tick(radius=16.0, rows=[0])
+    assert engine.current_emotions()[0, 0] > 0
+
+def test_moves_update_neighbourhoods():
+    engine = _engine([(0.0, 64.0, 0.0), (100.0, 64.0, 100.0)])
+    assert len(engine.contagion_tick(radius=16.0)) == 0
+    engine.move_villagers([1], [(5.0, 64.0, -3.0)])
+    assert sorted(engine.contagion_tick(radius=16.0).tolist()) == [0, 1]
+    assert sorted(engine.rows_within((0.0, 64.0, 0.0), 16.0).tolist()) == [0, 1]
+
+def test_spatial_index_moves_between_chunks():
+    index = ChunkSpatialIndex()
+    index.insert('a', 1.0, 1.0)
+    index.insert('b', 40.0, 1.0)
+    assert index.cell_of('b') == (2, 0)
+    index.move('b', -5.0, 3.0)
+    assert index.cell_of('b') == (-1, 0)
+    assert (2, 0) not in index.cells
+    assert sorted(index.query_radius(0.0, 0.0, 8.0)) == ['a', 'b']
+    index.remove('a')
+    assert index.query_radius(0.0, 0.0, 8.0) == ['b'] and len(index) == 1
+
+def test_standalone_contagion_ignores_villagers_out_of_range():
+    clock = SimulatedClock()
+    villager = VillagerEmotionSystem('villager_0', position=(0.0, 64.0, 0.0), clock=clock)
+    near = VillagerEmotionSystem('villager_1', position=(4.0, 64.0, 0.0), clock=clock)
+    far = VillagerEmotionSystem('villager_2', position=(80.0, 64.0, 0.0), clock=clock)
+    far.emotions.values[:] = 1.0
+    villager.process_social_contagion([far], radius=16.0)
+    assert np.array_equal(villager.emotions.current_values(), np.zeros(len(EMOTIONS)))
+    near.emotions.values[:] = 0.5
+    villager.process_social_contagion([near, far], radius=16.0)
+    assert (villager.emotions.current_values() > 0).all()
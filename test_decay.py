@@ -0,0 +1,72 @@
+import numpy as np
+from emotion_engine import EMOTIONS, EmotionVector, GameEvent, RelationshipStore, SimulatedClock, VillageEmotionEngine
+
+def _eager(deltas, gaps, decay_rate: float, step: float = 0.25) -> np.ndarray:
+    """Reference that decays every ``step`` seconds, like a per-tick update loop"""
+    values = np.zeros(len(EMOTIONS))
+    for delta, gap in zip(deltas, gaps):
+        for _ in range(int(round(gap / step))):
+            values = values * decay_rate ** step
+        values = np.clip(values + delta, -1.0, 1.0)
+    return values
+
+def test_lazy_emotion_vector_matches_eager_decay():
+    rng = np.random.default_rng(4)
+    deltas = rng.uniform(-0.6, 0.6, (40, len(EMOTIONS)))
+    gaps = rng.integers(0, 40, 40) * 0.25
+    clock = SimulatedClock()
+    vector = EmotionVector(decay_rate=0.95, clock=clock)
+    for delta, gap in zip(deltas, gaps):
+        clock.advance(gap)
+        vector.add(delta)
+    assert np.allclose(vector.current_values(), _eager(deltas, gaps, 0.95))
+    clock.advance(7.5)
+    assert np.allclose(vector.current_values(), _eager(list(deltas) + [np.zeros(6)], list(gaps) + [7.5], 0.95))
+
+def test_reads_do_not_write_and_materialize_is_idempotent():
+    clock = SimulatedClock()
+    vector = EmotionVector(decay_rate=0.9, clock=clock)
+    vector.add(np.array([0.8, 0.0, -0.4, 0.0, 0.2, 0.0]))
+    stored = vector.values.copy()
+    clock.advance(10.0)
+    current = vector.current_values()
+    vector.get_emotional_state()
+    vector.get_dominant_emotion()
+    assert np.array_equal(vector.values, stored) and vector.last_update == 0.0
+    vector.materialize()
+    assert np.allclose(vector.values, current) and vector.last_update == 10.0
+    vector.materialize()
+    assert np.allclose(vector.values, current)
+
+def test_engine_decays_lazily_per_row():
+    clock = SimulatedClock()
+    engine = VillageEmotionEngine(capacity=4, clock=clock, rng=np.random.default_rng(1))
+    engine.add_villagers(['busy', 'idle'])
+    engine.apply_event(GameEvent('player_gift', 'alice', 1.0))
+    idle_before = engine.emotions[1].copy()
+
+    deltas, gaps = [engine.emotions[0].copy()], [0.0]
+    for _ in range(12):
+        clock.advance(5.0)
+        response = engine.apply_event(GameEvent('monster_nearby', '', 0.3), [0])[0]
+        deltas.append(response)
+        gaps.append(5.0)
+    # The idle row was never written while the busy one decayed on every event
+    assert np.array_equal(engine.emotions[1], idle_before) and engine.last_update[1] == 0.0
+    assert np.allclose(engine.current_emotions()[0], _eager(deltas, gaps, engine.decay_rate))
+    assert np.allclose(engine.current_emotions()[1], _eager([idle_before, np.zeros(6)], [0.0, 60.0], engine.decay_rate))
+
+    expected = engine.current_emotions()
+    engine.materialize()
+    assert np.allclose(engine.emotions, expected)
+    assert (engine.last_update == clock()).all()
+
+def test_relationships_decay_lazily():
+    clock = SimulatedClock()
+    store = RelationshipStore(capacity=4, decay_rate=0.97, clock=clock)
+    response = np.array([0.4, 0.0, 0.0, 0.0, 0.3, 0.0])
+    store.record([0], 'alice', response)
+    clock.advance(30.0)
+    assert np.allclose(store.bias(0, 'alice'), response * 0.97 ** 30)
+    store.record([0], 'alice', response)
+    assert np.allclose(store.bias(0, 'alice'), _eager([response, response], [0.0, 30.0], 0.97))
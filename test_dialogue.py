@@ -0,0 +1,79 @@
+import json
+import numpy as np
+import pytest
+from dialogue import (DEFAULT_LINES, DEFAULT_SUFFIXES, DEFAULT_TOPIC, MOOD_INDEX, BAND_INDEX, DialogueRegistry,
+                      mood_buckets, reputation_bands)
+from emotion_engine import EMOTION_INDEX, SimulatedClock, VillageEmotionEngine, VillagerEmotionSystem
+
+TRUST = np.array([0.0, 0.0, 0.0, 0.0, 1.0, 0.0])
+
+def _write(tmp_path, data) -> str:
+    path = tmp_path / 'lines.json'
+    path.write_text(json.dumps(data))
+    return str(path)
+
+def test_buckets_and_bands():
+    assert mood_buckets([0.5, 0.0, 0.0, 0.5, 0.0], [0.0, 0.4, 0.0, 0.9, 0.0], [0.0, 0.0, 0.4, 0.9, 0.0]).tolist() == [
+        MOOD_INDEX['joyful'], MOOD_INDEX['angry'], MOOD_INDEX['fearful'], MOOD_INDEX['joyful'], MOOD_INDEX['neutral']]
+    assert reputation_bands([-0.8, -0.5, 0.0, 0.5, 0.9]).tolist() == [
+        BAND_INDEX['suspicious'], BAND_INDEX['neutral'], BAND_INDEX['neutral'], BAND_INDEX['neutral'], BAND_INDEX['warm']]
+
+def test_lines_for_renders_suffixes_and_falls_back_to_the_default_topic():
+    registry = DialogueRegistry()
+    registry.add_lines('joyful', ["Fine harvest this year!"], topic='farming')
+    warm = registry.lines_for(MOOD_INDEX['joyful'], BAND_INDEX['warm'], 'farming')
+    assert warm == ("Fine harvest this year!" + DEFAULT_SUFFIXES['warm'],)
+    assert registry.lines_for(MOOD_INDEX['angry'], BAND_INDEX['neutral'], 'farming') == tuple(DEFAULT_LINES['angry'][DEFAULT_TOPIC])
+    assert registry.lines_for(MOOD_INDEX['neutral'], BAND_INDEX['neutral'], 'unknown') == \
+        registry.lines_for(MOOD_INDEX['neutral'], BAND_INDEX['neutral'], DEFAULT_TOPIC)
+    # Registering more lines drops compiled buckets and cached lookups
+    registry.add_lines('joyful', ["Rain is coming."], topic='farming')
+    assert len(registry.lines_for(MOOD_INDEX['joyful'], BAND_INDEX['warm'], 'farming')) == 2
+
+def test_from_file_on_top_of_the_defaults(tmp_path):
+    path = _write(tmp_path, {'lines': {'angry': {DEFAULT_TOPIC: ["Go away."]}, 'neutral': {'trade': ["Best prices!"]}},
+                             'suffixes': {'suspicious': " *squints*"}})
+    registry = DialogueRegistry.from_file(path)
+    assert registry.lines_for(MOOD_INDEX['angry'], BAND_INDEX['neutral']) == ("Go away.",)
+    assert registry.lines_for(MOOD_INDEX['angry'], BAND_INDEX['suspicious']) == ("Go away. *squints*",)
+    assert registry.lines_for(MOOD_INDEX['neutral'], BAND_INDEX['neutral'], 'trade') == ("Best prices!",)
+    assert registry.lines_for(MOOD_INDEX['joyful'], BAND_INDEX['neutral']) == tuple(DEFAULT_LINES['joyful'][DEFAULT_TOPIC])
+
+def test_from_file_without_defaults_needs_every_mood(tmp_path):
+    registry = DialogueRegistry.from_file(_write(tmp_path, {'lines': {'joyful': {DEFAULT_TOPIC: ["Hi!"]}}}),
+                                          defaults=False)
+    with pytest.raises(ValueError):
+        registry.compile()
+    with pytest.raises(ValueError):
+        DialogueRegistry.from_file(_write(tmp_path, {'lines': {'bored': {DEFAULT_TOPIC: ["Meh."]}}}))
+
+def test_generate_dialogue_many_picks_each_villagers_bucket():
+    engine = VillageEmotionEngine(capacity=4, clock=SimulatedClock(), rng=np.random.default_rng(3),
+                                  dialogue=DialogueRegistry())
+    engine.add_villagers(['happy', 'cross', 'scared', 'calm'])
+    engine._emotions[0, EMOTION_INDEX['joy']] = 0.9
+    engine._emotions[1, EMOTION_INDEX['anger']] = 0.9
+    engine._emotions[2, EMOTION_INDEX['fear']] = 0.9
+    for _ in range(10):
+        engine.relationships.update_reputation(0, 'alice', TRUST)
+    engine.dialogue.add_lines('neutral', ["Need anything for the forge?"], topic='smithing')
+
+    lines = engine.generate_dialogue_many(['happy', 'cross', 'scared', 'calm'], 'alice',
+                                          [DEFAULT_TOPIC, DEFAULT_TOPIC, DEFAULT_TOPIC, 'smithing'])
+    suffix = DEFAULT_SUFFIXES['warm']
+    assert lines[0].endswith(suffix) and lines[0][:-len(suffix)] in DEFAULT_LINES['joyful'][DEFAULT_TOPIC]
+    assert lines[1] in DEFAULT_LINES['angry'][DEFAULT_TOPIC]
+    assert lines[2] in DEFAULT_LINES['fearful'][DEFAULT_TOPIC]
+    assert lines[3] == "Need anything for the forge?"
+    # Views go through the same batched path
+    assert engine.villager('cross').generate_dialogue('alice') in DEFAULT_LINES['angry'][DEFAULT_TOPIC]
+
+def test_batched_generation_matches_standalone_villagers():
+    villager = VillagerEmotionSystem('villager_0', clock=SimulatedClock(), rng=np.random.default_rng(11))
+    engine = VillageEmotionEngine(capacity=4, clock=SimulatedClock(), rng=np.random.default_rng(11))
+    engine.add_villagers(['villager_0'])
+    villager.emotions.values[EMOTION_INDEX['fear']] = engine._emotions[0, EMOTION_INDEX['fear']] = 0.6
+    villager.memory.update_reputation('bob', {'anger': 1.0})
+    engine.relationships.update_reputation(0, 'bob', np.array([0.0, 1.0, 0.0, 0.0, 0.0, 0.0]))
+    for _ in range(20):
+        assert engine.generate_dialogue_many(['villager_0'], 'bob') == [villager.generate_dialogue('bob')]
@@ -1,17 +1,22 @@
 import time
 import json
-from emotion_engine import VillagerEmotionSystem, GameEvent
+from emotion_engine import VillagerEmotionSystem, GameEvent, CONTAGION_RADIUS
+from spatial_index import ChunkSpatialIndex
 
 class EmotionalVillagerTestSuite:
     def __init__(self):
         self.villagers = {}
+        self.spatial_index = ChunkSpatialIndex()
         self.test_results = []
     
     def create_test_village(self, num_villagers: int = 3):
         """Create a test village with multiple villagers"""
         for i in range(num_villagers):
             villager_id = f"villager_{i+1}"
-            self.villagers[villager_id] = VillagerEmotionSystem(villager_id)
+            # Spread villagers along a street, a few blocks apart
+            position = (i * 6.0, 64.0, 0.0)
+            self.villagers[villager_id] = VillagerEmotionSystem(villager_id, position)
+            self.spatial_index.insert(villager_id, position[0], position[2])
             print(f"Created {villager_id} with personality: {self.villagers[villager_id].personality.traits}")
     
     def simulate_player_interactions(self):
@@ -55,11 +60,14 @@ class EmotionalVillagerTestSuite:
     
     def process_village_social_dynamics(self):
         """Simulate social contagion between villagers"""
-        villager_list = list(self.villagers.values())
-        
-        for villager in villager_list:
-            # Each villager is affected by others (simplified - in real game would be distance-based)
-            nearby_villagers = [v for v in villager_list if v != villager]
+        for villager_id, villager in self.villagers.items():
+            # Each villager is affected by others within contagion range
+            x, _, z = villager.position
+            nearby_villagers = [
+                self.villagers[other_id]
+                for other_id in self.spatial_index.query_radius(x, z, CONTAGION_RADIUS)
+                if other_id != villager_id
+            ]
             villager.process_social_contagion(nearby_villagers)
     
     def test_emotional_memory(self):
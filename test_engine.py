@@ -0,0 +1,62 @@
+import numpy as np
+from emotion_engine import EMOTIONS, GameEvent, SimulatedClock, VillageEmotionEngine, VillagerEmotionSystem
+
+EVENT_TYPES = ['player_gift', 'player_attack', 'player_trade', 'monster_nearby', 'village_celebration']
+
+def _village(count: int, seed: int = 2):
+    clock = SimulatedClock(100.0)
+    villagers = [VillagerEmotionSystem(f'villager_{i}', clock=clock, rng=np.random.default_rng(seed + i))
+                 for i in range(count)]
+    engine = VillageEmotionEngine(capacity=4, clock=clock, rng=np.random.default_rng(seed))
+    engine.add_villagers([villager.villager_id for villager in villagers],
+                         traits=np.array([villager.personality.values for villager in villagers]))
+    return clock, villagers, engine
+
+def _events(count: int, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    return [GameEvent(EVENT_TYPES[rng.integers(len(EVENT_TYPES))], ['', 'alice', 'bob'][rng.integers(3)],
+                      float(rng.uniform(0.1, 1.0)))
+            for _ in range(count)]
+
+def _assert_matches(villagers, engine: VillageEmotionEngine):
+    current = engine.current_emotions()
+    for row, villager in enumerate(villagers):
+        assert np.allclose(current[row], villager.emotions.current_values())
+        view = engine.villager(villager.villager_id)
+        assert view.emotions.get_dominant_emotion() == villager.emotions.get_dominant_emotion()
+        for player_id in ('alice', 'bob'):
+            assert np.isclose(view.memory.get_reputation(player_id), villager.memory.get_reputation(player_id))
+            assert np.allclose(list(view.memory.get_player_bias(player_id).values()),
+                               list(villager.memory.get_player_bias(player_id).values()))
+
+def test_per_villager_events_match_standalone_villagers():
+    clock, villagers, engine = _village(6)
+    rng = np.random.default_rng(9)
+    for event in _events(120):
+        clock.advance(float(rng.uniform(0, 30)))
+        target = int(rng.integers(len(villagers)))
+        villagers[target].process_game_event(event)
+        engine.apply_event(event, [target])
+    _assert_matches(villagers, engine)
+
+def test_village_wide_events_match_looping_over_villagers():
+    clock, villagers, engine = _village(8)
+    events = _events(40)
+    for start in range(0, len(events), 4):
+        clock.advance(12.5)
+        for event in events[start:start + 4]:
+            for villager in villagers:
+                villager.process_game_event(event)
+        engine.apply_events(events[start:start + 4])
+    _assert_matches(villagers, engine)
+    assert engine.emotions.shape == (8, len(EMOTIONS))
+    assert engine.dominant_emotions() == [villager.emotions.get_dominant_emotion() for villager in villagers]
+
+def test_views_process_events_through_the_engine():
+    clock, villagers, engine = _village(3)
+    for event in _events(30):
+        clock.advance(4.0)
+        villagers[1].process_game_event(event)
+        engine.villager('villager_1').process_game_event(event)
+    _assert_matches(villagers, engine)
+    assert len(engine.memory(1).event_memories) == len(villagers[1].memory.event_memories)
@@ -0,0 +1,44 @@
+import dataclasses
+import numpy as np
+from emotion_engine import (DEFAULT_EVENT_CATALOG, EventCatalog, GameEvent, SimulatedClock, VillageEmotionEngine,
+                            VillagerEmotionSystem)
+
+def test_setting_event_responses_on_a_view_updates_the_engine():
+    engine = VillageEmotionEngine(capacity=4, clock=SimulatedClock(), rng=np.random.default_rng(7))
+    engine.add_villagers(['villager_0', 'villager_1'])
+    villager = engine.villager('villager_0')
+    villager.event_responses = {'dragon_roar': {'fear': 0.9}}
+    assert isinstance(engine.event_catalog, EventCatalog)
+    assert engine.villager('villager_1').event_catalog is engine.event_catalog
+    villager.process_game_event(GameEvent('dragon_roar', 'alice', 1.0))
+    assert engine.villager('villager_0').emotions.values[2] > 0
+
+def test_game_event_stays_a_slotted_dataclass():
+    event = GameEvent('player_gift', 'alice', 0.5)
+    assert dataclasses.is_dataclass(event) and not hasattr(event, '__dict__')
+    assert dataclasses.replace(event, intensity=1.0) == GameEvent('player_gift', 'alice', 1.0)
+    assert event.context is None
+
+def test_editing_a_villagers_responses_leaves_the_shared_catalog_alone():
+    first, second = VillagerEmotionSystem('villager_0'), VillagerEmotionSystem('villager_1')
+    first.event_responses['dragon_roar'] = {'fear': 0.9}
+    first.event_responses['player_gift'] = {'anger': 0.5}
+    assert 'dragon_roar' in first.event_responses
+    assert 'dragon_roar' not in DEFAULT_EVENT_CATALOG and 'dragon_roar' not in second.event_responses
+    assert second.event_responses['player_gift'] == DEFAULT_EVENT_CATALOG['player_gift'] != {'anger': 0.5}
+    assert second.process_game_event(GameEvent('dragon_roar', 'alice', 1.0)) == []
+
+def test_copied_catalog_keeps_memory_codes():
+    villager = VillagerEmotionSystem('villager_0', clock=SimulatedClock())
+    villager.process_game_event(GameEvent('player_gift', 'alice', 1.0))
+    villager.event_responses = {'dragon_roar': {'fear': 0.9}}
+    villager.process_game_event(GameEvent('dragon_roar', 'alice', 1.0))
+    assert [memory['event_type'] for memory in villager.memory.event_memories] == ['player_gift', 'dragon_roar']
+
+def test_engine_responses_are_copied_from_the_shared_catalog():
+    engine = VillageEmotionEngine(capacity=4, clock=SimulatedClock(), rng=np.random.default_rng(7))
+    other = VillageEmotionEngine(capacity=4, clock=SimulatedClock())
+    engine.add_villagers(['villager_0'])
+    engine.villager('villager_0').event_responses['dragon_roar'] = {'fear': 0.9}
+    assert 'dragon_roar' in engine.event_catalog
+    assert 'dragon_roar' not in other.event_catalog and 'dragon_roar' not in DEFAULT_EVENT_CATALOG
@@ -0,0 +1,84 @@
+import struct
+import numpy as np
+import pytest
+from emotion_engine import GameEvent, SimulatedClock, VillageEmotionEngine
+from event_log import (FRAME, HEADER, KIND_CONTAGION, KIND_STRINGS, LOG_MAGIC, LOG_VERSION, EventLogError,
+                       EventLogRecorder, log_version, read_log, replay_log)
+
+class AdvancingClock(SimulatedClock):
+    """Moves forward on every read, like a wall clock under load"""
+    def __call__(self) -> float:
+        self.now += 0.001
+        return self.now
+
+def _record_session(path, clock) -> VillageEmotionEngine:
+    engine = VillageEmotionEngine(clock=clock, rng=np.random.default_rng(1))
+    engine.add_villagers(['a', 'b'], positions=[(0, 64, 0), (3, 64, 3)])
+    recorder = EventLogRecorder(str(path))
+    recorder.attach(engine)
+    engine.add_villagers(['c', 'd'], positions=[(5, 64, 5), None])
+    for i in range(30):
+        clock.advance(0.37)
+        engine.apply_event(GameEvent('player_gift', 'steve', 0.8), [i % 4])
+        engine.apply_events([GameEvent('monster_nearby', '', 0.5), GameEvent('player_attack', 'alex', 0.3)])
+        engine.contagion_tick(falloff='smooth')
+        engine.contagion_tick(rows=[0, 1])
+        engine.move_villagers([3], [(i, 64, i)])
+        engine.apply_event_batch('player_trade', 'steve', [0, 2], [0.4, 0.1])
+        if i % 10 == 0:
+            engine.materialize()
+    recorder.close()
+    return engine
+
+def _assert_same(live: VillageEmotionEngine, replayed: VillageEmotionEngine):
+    assert replayed.villager_ids == live.villager_ids
+    assert np.array_equal(replayed.emotions, live.emotions)
+    assert np.array_equal(replayed.last_update, live.last_update)
+    assert np.array_equal(replayed.positions, live.positions, equal_nan=True)
+    for row in range(len(live)):
+        for player_id in ('steve', 'alex'):
+            assert replayed.memory(row).get_reputation(player_id) == live.memory(row).get_reputation(player_id)
+
+def test_replay_is_bit_exact(tmp_path):
+    path = tmp_path / 'session.velog'
+    live = _record_session(path, SimulatedClock(1000.0))
+    _assert_same(live, replay_log(str(path)))
+
+def test_replay_is_bit_exact_with_an_advancing_clock(tmp_path):
+    path = tmp_path / 'session.velog'
+    live = _record_session(path, AdvancingClock(1000.0))
+    _assert_same(live, replay_log(str(path)))
+
+def test_read_log_lists_every_call(tmp_path):
+    path = tmp_path / 'session.velog'
+    _record_session(path, SimulatedClock())
+    kinds = [record.kind for record in read_log(str(path))]
+    assert kinds[0] == 'config'
+    assert kinds.count('contagion') == 60
+    assert kinds.count('batch') == 30
+
+def _legacy_log(path):
+    # A version 1 log: CONTAGION frames carry only the radius and falloff code
+    strings = struct.pack('<I', 1) + struct.pack('<IH', 0, len(b'linear')) + b'linear'
+    contagion = struct.pack('<dI', 16.0, 0)
+    with open(path, 'wb') as handle:
+        handle.write(HEADER.pack(LOG_MAGIC, 1))
+        handle.write(FRAME.pack(KIND_STRINGS, 1.0, len(strings)) + strings)
+        handle.write(FRAME.pack(KIND_CONTAGION, 1.0, len(contagion)) + contagion)
+
+def test_version_1_contagion_frames_are_still_read(tmp_path):
+    path = tmp_path / 'legacy.velog'
+    _legacy_log(path)
+    assert log_version(str(path)) == 1
+    [record] = read_log(str(path))
+    assert record.kind == 'contagion'
+    assert record.data == {'radius': 16.0, 'falloff': 'linear', 'rows': None}
+    with pytest.raises(EventLogError):
+        EventLogRecorder(str(path))
+
+def test_subset_contagion_rows_are_logged(tmp_path):
+    path = tmp_path / 'session.velog'
+    _record_session(path, SimulatedClock())
+    assert log_version(str(path)) == LOG_VERSION
+    subsets = [record.data['rows'] for record in read_log(str(path)) if record.kind == 'contagion']
+    assert subsets[0] is None and subsets[1].tolist() == [0, 1]
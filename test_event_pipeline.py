@@ -0,0 +1,62 @@
+import time
+import numpy as np
+import pytest
+from emotion_engine import GameEvent, SimulatedClock, VillageEmotionEngine
+from event_pipeline import EventPipeline
+
+def _engine(size: int = 20) -> VillageEmotionEngine:
+    engine = VillageEmotionEngine(capacity=size, clock=SimulatedClock(), rng=np.random.default_rng(4))
+    engine.add_villagers([f'villager_{i}' for i in range(size)])
+    return engine
+
+def test_callback_error_fails_its_future_and_the_worker_survives():
+    def on_actions(villager_id, actions):
+        if villager_id == 'villager_0':
+            raise RuntimeError('boom')
+
+    pipeline = EventPipeline(_engine(), tick_interval=0.01, on_actions=on_actions)
+    with pipeline:
+        failing = pipeline.submit('villager_0', GameEvent('player_gift', 'alice', 0.5))
+        with pytest.raises(RuntimeError):
+            failing.result(timeout=5)
+        later = pipeline.submit('villager_1', GameEvent('player_gift', 'alice', 0.5))
+        assert isinstance(later.result(timeout=5), list)
+    assert pipeline.metrics()['errors'] == 1
+
+def test_failed_event_type_only_fails_its_own_futures():
+    engine = _engine()
+    apply_event_batch = engine.apply_event_batch
+
+    def flaky(event_type, *args, **kwargs):
+        if event_type == 'monster_nearby':
+            raise ValueError('bad batch')
+        return apply_event_batch(event_type, *args, **kwargs)
+
+    engine.apply_event_batch = flaky
+    pipeline = EventPipeline(engine, tick_interval=0.01)
+    with pipeline:
+        bad = pipeline.submit('villager_2', GameEvent('monster_nearby', None, 0.5))
+        good = pipeline.submit('villager_3', GameEvent('player_gift', 'alice', 0.5))
+        with pytest.raises(ValueError):
+            bad.result(timeout=5)
+        assert isinstance(good.result(timeout=5), list)
+        again = pipeline.submit('villager_4', GameEvent('player_gift', 'alice', 0.5))
+        assert isinstance(again.result(timeout=5), list)
+
+def test_submissions_within_the_window_share_a_tick():
+    pipeline = EventPipeline(_engine(), tick_interval=0.2)
+    with pipeline:
+        futures = []
+        for i in range(10):
+            futures.append(pipeline.submit(f'villager_{i}', GameEvent('player_gift', 'alice', 0.1)))
+            time.sleep(0.005)
+        for future in futures:
+            future.result(timeout=5)
+        assert pipeline.metrics()['ticks'] == 1
+
+def test_full_batch_drains_before_the_window_closes():
+    pipeline = EventPipeline(_engine(), tick_interval=30.0, batch_size=5)
+    with pipeline:
+        futures = pipeline.submit_many([f'villager_{i}' for i in range(5)], GameEvent('player_gift', 'alice', 0.1))
+        for future in futures:
+            future.result(timeout=5)
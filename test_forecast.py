@@ -0,0 +1,81 @@
+import numpy as np
+from emotion_engine import BroadcastEvent, EMOTIONS, GameEvent, SimulatedClock, VillageEmotionEngine, VillagerEmotionSystem
+from forecast import Forecaster, ScheduledEvent
+
+SCENARIO = [
+    ScheduledEvent(0.5, GameEvent('player_gift', 'alice', 0.8), [0, 1, 2]),
+    ScheduledEvent(2.25, GameEvent('player_attack', 'alice', 0.6), [3]),
+    ScheduledEvent(2.25, BroadcastEvent('monster_nearby', 0.9, origin=(0.0, 64.0, 0.0), radius=20.0)),
+    ScheduledEvent(4.0, GameEvent('village_celebration', '', 0.5))
+]
+
+def _engine() -> VillageEmotionEngine:
+    rng = np.random.default_rng(21)
+    engine = VillageEmotionEngine(capacity=8, clock=SimulatedClock(50.0), rng=rng)
+    positions = np.column_stack([rng.uniform(-20, 20, 40), np.full(40, 64.0), rng.uniform(-20, 20, 40)])
+    engine.add_villagers([f'villager_{i}' for i in range(40)], positions=positions)
+    engine._emotions[:40] = rng.uniform(-0.5, 0.5, (40, len(EMOTIONS)))
+    engine.apply_event(GameEvent('player_trade', 'alice', 0.4), np.arange(0, 40, 3))
+    engine.clock.advance(3.0)
+    return engine
+
+def _live(engine: VillageEmotionEngine, scenario, horizon: float, step: float, radius: float):
+    """Play a scenario on the engine the way the forecaster models it"""
+    start = engine.clock()
+    times = np.minimum(np.arange(int(np.ceil(horizon / step)) + 1) * step, horizon)
+    pending = sorted(scenario, key=lambda item: item.delay)
+    for time in times[1:]:
+        while pending and pending[0].delay <= time:
+            item = pending.pop(0)
+            engine.clock.set(start + item.delay)
+            if isinstance(item.event, BroadcastEvent):
+                engine.broadcast(item.event)
+            else:
+                engine.apply_event(item.event, item.targets)
+        engine.clock.set(start + time)
+        engine.contagion_tick(radius=radius)
+
+def test_forecast_matches_a_live_run():
+    engine = _engine()
+    before = {row: engine.relationships.reputation(row, 'alice') for row in range(40)}
+    forecast = Forecaster.from_engine(engine).run([SCENARIO, []], horizon=6.0, step=1.0, radius=8.0)
+
+    for k, scenario in enumerate([SCENARIO, []]):
+        live = _engine()
+        _live(live, scenario, 6.0, 1.0, 8.0)
+        assert np.allclose(forecast.emotions[k], live.current_emotions())
+        assert np.allclose(forecast.mean_emotions[k, -1], live.current_emotions().mean(axis=0))
+        expected = [live.relationships.reputation(row, 'alice') - before[row] for row in range(40)]
+        assert np.allclose(forecast.reputation_delta('alice')[k], expected)
+        probabilities = np.clip(live.behavior_weights(), 0.0, 1.0)
+        assert np.allclose(forecast.action_probabilities[k], probabilities)
+    assert forecast.times.tolist() == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+    assert np.allclose(forecast.reputation_delta('bob'), 0.0)
+
+def test_forecast_leaves_live_state_untouched():
+    engine = _engine()
+    emotions, last_update = engine.emotions.copy(), engine.last_update.copy()
+    reputations = [engine.relationships.reputations(row) for row in range(40)]
+    memories = [len(engine.memory(row).event_memories) for row in range(40)]
+    sequence = engine.change_sequence
+    Forecaster.from_engine(engine).run([SCENARIO] * 3, horizon=30.0, keep_trajectories=True)
+    assert np.array_equal(engine.emotions, emotions) and np.array_equal(engine.last_update, last_update)
+    assert [engine.relationships.reputations(row) for row in range(40)] == reputations
+    assert [len(engine.memory(row).event_memories) for row in range(40)] == memories
+    assert engine.change_sequence == sequence and engine.clock() == 53.0
+
+def test_forecast_from_standalone_villagers():
+    clock = SimulatedClock()
+    villagers = [VillagerEmotionSystem(f'villager_{i}', clock=clock, rng=np.random.default_rng(i)) for i in range(5)]
+    stored = [villager.emotions.values.copy() for villager in villagers]
+    scenario = [(1.0, GameEvent('player_gift', 'bob', 1.0), [2])]
+    forecast = Forecaster.from_villagers(villagers).run([scenario], horizon=3.0, contagion=False)
+    assert all(np.array_equal(villager.emotions.values, values) for villager, values in zip(villagers, stored))
+    assert villagers[2].memory.reputation_scores == {}
+
+    # Unpositioned standalone villagers take no part in contagion, so a live replay is plain events and decay
+    clock.set(1.0)
+    villagers[2].process_game_event(GameEvent('player_gift', 'bob', 1.0))
+    clock.set(3.0)
+    assert np.allclose(forecast.emotions[0], [villager.emotions.current_values() for villager in villagers])
+    assert np.isclose(forecast.reputation_delta('bob')[0, 2], villagers[2].memory.get_reputation('bob'))
@@ -0,0 +1,23 @@
+from instrumentation import TOTAL_STAGE, Instrumentation, render_prometheus
+
+def test_stages_are_kept_per_operation():
+    instrumentation = Instrumentation()
+    for operation, seconds in (('apply_events', 1e-3), ('apply_event_batch', 1e-5)):
+        trace = instrumentation.trace(operation)
+        instrumentation.observe(operation, seconds, 'respond')
+        trace.finish()
+    latency = instrumentation.snapshot()['latency']
+    assert set(latency) == {'apply_events', 'apply_event_batch'}
+    assert latency['apply_events']['respond']['max'] == 1e-3
+    assert latency['apply_event_batch']['respond']['max'] == 1e-5
+    assert latency['apply_events'][TOTAL_STAGE]['count'] == 1
+
+def test_prometheus_labels_carry_the_operation():
+    instrumentation = Instrumentation()
+    trace = instrumentation.trace('process_game_event', 'player_gift')
+    trace.mark('respond')
+    trace.finish()
+    text = render_prometheus(instrumentation.snapshot())
+    assert 'villager_emotion_stage_seconds_count{operation="process_game_event",stage="respond"} 1' in text
+    assert f'villager_emotion_stage_seconds_count{{operation="process_game_event",stage="{TOTAL_STAGE}"}} 1' in text
+    assert 'villager_emotion_events_total{event_type="player_gift"} 1' in text
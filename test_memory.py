@@ -0,0 +1,75 @@
+import numpy as np
+from emotion_engine import EMOTIONS, MemoryRing
+
+PLAYERS = ['alice', 'bob', 'carol']
+EVENT_TYPES = ['player_gift', 'player_attack', 'player_trade']
+
+def _fill(ring: MemoryRing, count: int, seed: int = 8):
+    """Append ``count`` random memories one second apart; returns them as (player, event, response, time) tuples"""
+    rng = np.random.default_rng(seed)
+    appended = []
+    for i in range(count):
+        memory = (PLAYERS[rng.integers(3)], EVENT_TYPES[rng.integers(3)], rng.uniform(-1, 1, len(EMOTIONS)), float(i))
+        ring.append(*memory)
+        appended.append(memory)
+    return appended
+
+def test_ring_keeps_the_newest_records_in_order():
+    ring = MemoryRing(capacity=10)
+    assert len(ring) == 0 and ring.nbytes == 0 and len(ring.records()) == 0
+    appended = _fill(ring, 27)
+    kept = appended[-10:]
+    records = ring.records()
+    assert len(ring) == 10
+    assert records['timestamp'].tolist() == [memory[3] for memory in kept]
+    assert [ring.players.string(code) for code in records['player'].tolist()] == [memory[0] for memory in kept]
+    assert np.allclose(records['response'], [memory[2] for memory in kept])
+    assert [memory['event_type'] for memory in ring] == [memory[1] for memory in kept]
+
+def test_last_from_player_after_wraparound():
+    ring = MemoryRing(capacity=12)
+    kept = _fill(ring, 50)[-12:]
+    for player_id in PLAYERS:
+        expected = [memory[3] for memory in kept if memory[0] == player_id]
+        assert ring.last_from_player(player_id, 3)['timestamp'].tolist() == expected[-3:]
+        assert ring.last_from_player(player_id, 100)['timestamp'].tolist() == expected
+    assert len(ring.last_from_player('stranger')) == 0
+    assert len(ring.last_from_player('alice', 0)) == 0
+
+def test_time_window_after_wraparound():
+    ring = MemoryRing(capacity=16)
+    _fill(ring, 40)
+    assert ring.in_window(30.0, 35.0)['timestamp'].tolist() == [30.0, 31.0, 32.0, 33.0, 34.0]
+    # Part of the window has already been overwritten
+    assert ring.in_window(20.0, 26.0)['timestamp'].tolist() == [24.0, 25.0]
+    assert len(ring.in_window(100.0, 200.0)) == 0
+
+def test_aggregates_follow_evictions():
+    ring = MemoryRing(capacity=9)
+    kept = _fill(ring, 31)[-9:]
+    aggregates = ring.aggregate_by_event_type()
+    for event_type in EVENT_TYPES:
+        responses = [memory[2] for memory in kept if memory[1] == event_type]
+        if not responses:
+            assert event_type not in aggregates
+            continue
+        assert aggregates[event_type]['count'] == len(responses)
+        assert np.allclose(list(aggregates[event_type]['mean_response'].values()), np.mean(responses, axis=0))
+
+def test_load_rebuilds_the_indexes():
+    ring = MemoryRing(capacity=8)
+    _fill(ring, 20)
+    copy = MemoryRing(capacity=8, players=ring.players, event_types=ring.event_types)
+    copy.load(ring.records())
+    assert np.array_equal(copy.records(), ring.records())
+    assert np.array_equal(copy.last_from_player('bob', 5), ring.last_from_player('bob', 5))
+    assert copy.aggregate_by_event_type().keys() == ring.aggregate_by_event_type().keys()
+    # Loading more than fits keeps the newest
+    smaller = MemoryRing(capacity=3, players=ring.players, event_types=ring.event_types)
+    smaller.load(ring.records())
+    assert smaller.records()['timestamp'].tolist() == [17.0, 18.0, 19.0]
+
+def test_zero_capacity_stores_nothing():
+    ring = MemoryRing(capacity=0)
+    _fill(ring, 5)
+    assert len(ring) == 0 and len(ring.records()) == 0 and ring.aggregate_by_event_type() == {}
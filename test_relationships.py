@@ -0,0 +1,130 @@
+import numpy as np
+from emotion_engine import EMOTIONS, RelationshipStore, SimulatedClock
+
+GIFT = np.array([0.5, 0.0, 0.0, 0.0, 0.5, 0.0])
+
+def _index_consistent(store: RelationshipStore, player_id: str):
+    index = store.reputation_index
+    code = store.players.code(player_id)
+    held = np.flatnonzero(store._player == code)
+    stats = index.stats(player_id)
+    assert stats is not None
+    assert stats['count'] == len(held)
+    assert np.isclose(stats['sum'], store._reputation[held].sum())
+    assert stats['min'] == store._reputation[held].min()
+    assert stats['max'] == store._reputation[held].max()
+
+def test_eviction_keeps_relationships_of_the_current_batch():
+    clock = SimulatedClock()
+    store = RelationshipStore(capacity=8, max_relationships=4, clock=clock)
+    store.record([0, 1, 2, 3], 'alice', np.tile(GIFT, (4, 1)))
+    clock.advance(1.0)
+    store.record([0, 10, 11, 12], 'alice', np.tile(GIFT, (4, 1)))
+
+    assert len(store) == 4
+    assert store.slot(0, 'alice') is not None
+    assert np.isclose(store.reputation(0, 'alice'), 2 * GIFT @ np.array([0.5, -0.8, -0.3, 0, 0.7, 0]) * 0.1)
+    for row in (10, 11, 12):
+        assert store.slot(row, 'alice') is not None
+    slots = [slot for row_slots in store._rows.values() for slot in row_slots.values()]
+    assert len(set(slots)) == len(slots)
+    _index_consistent(store, 'alice')
+
+def test_index_counts_survive_repeated_eviction():
+    clock = SimulatedClock()
+    rng = np.random.default_rng(3)
+    store = RelationshipStore(capacity=4, max_relationships=16, clock=clock)
+    for _ in range(50):
+        clock.advance(1.0)
+        rows = rng.integers(0, 40, 6)
+        store.record(rows, 'alice', rng.uniform(-1, 1, (len(rows), len(EMOTIONS))))
+        assert len(store) <= 16
+        _index_consistent(store, 'alice')
+
+def test_duplicate_rows_are_counted_once():
+    store = RelationshipStore(capacity=8, clock=SimulatedClock())
+    store.record([5, 5, 6], 'bob', np.tile(GIFT, (3, 1)))
+    assert len(store) == 2
+    _index_consistent(store, 'bob')
+    assert store.reputation_index.stats('bob')['count'] == 2
+
+def test_stats_after_every_opinion_is_evicted():
+    clock = SimulatedClock()
+    store = RelationshipStore(capacity=8, clock=clock)
+    store.record([0, 1, 2], 'carol', np.array([GIFT, 2 * GIFT, -GIFT]))
+    clock.advance(10.0)
+    store.record([3], 'dave', GIFT.reshape(1, -1))
+    assert store.reputation_index.stats('carol')['count'] == 3
+
+    # Dropping the extremes forces min/max to be recomputed from what is left
+    store.drop_rows([1, 2])
+    stats = store.reputation_index.stats('carol')
+    assert stats['count'] == 1 and stats['min'] == stats['max'] == store.reputation(0, 'carol')
+
+    assert store.evict_stale(5.0) == 1
+    assert store.reputation_index.stats('carol') is None
+    assert [player for player, _ in store.reputation_index.top()] == ['dave']
+    _index_consistent(store, 'dave')
+
+def _churn(store: RelationshipStore, clock: SimulatedClock, query_first: bool):
+    rng = np.random.default_rng(11)
+    if query_first:
+        store.reputation_index
+    for step in range(40):
+        clock.advance(0.5)
+        rows = rng.integers(0, 20, 5)
+        store.record(rows, f'player_{step % 3}', rng.uniform(-1, 1, (len(rows), len(EMOTIONS))))
+        store.update_reputation(int(rows[0]), 'player_3', rng.uniform(-1, 1, len(EMOTIONS)))
+
+def test_lazily_built_index_matches_a_maintained_one():
+    maintained_clock, lazy_clock = SimulatedClock(), SimulatedClock()
+    maintained = RelationshipStore(capacity=8, max_relationships=48, clock=maintained_clock)
+    lazy = RelationshipStore(capacity=8, max_relationships=48, clock=lazy_clock)
+    _churn(maintained, maintained_clock, True)
+    _churn(lazy, lazy_clock, False)
+    assert lazy._reputation_index is None
+    for player_id in ('player_0', 'player_1', 'player_2', 'player_3'):
+        expected, actual = maintained.reputation_index.stats(player_id), lazy.reputation_index.stats(player_id)
+        assert expected.keys() == actual.keys()
+        assert all(np.isclose(actual[key], expected[key]) for key in expected)
+        _index_consistent(lazy, player_id)
+    assert [player for player, _ in lazy.reputation_index.top(4)] == [player for player, _ in maintained.reputation_index.top(4)]
+
+def test_single_row_records_match_batched_records():
+    rng = np.random.default_rng(11)
+    single_clock, batch_clock = SimulatedClock(), SimulatedClock()
+    single = RelationshipStore(capacity=4, decay_rate=0.9, clock=single_clock)
+    batch = RelationshipStore(capacity=4, decay_rate=0.9, clock=batch_clock)
+    for _ in range(30):
+        single_clock.advance(0.5)
+        batch_clock.advance(0.5)
+        rows = rng.choice(12, 3, replace=False)
+        responses = rng.uniform(-1, 1, (3, len(EMOTIONS)))
+        player = 'alice' if rng.random() < 0.5 else 'bob'
+        batch.record(rows, player, responses)
+        for row, response in zip(rows, responses):
+            single.record([row], player, response)
+    for row in range(12):
+        for player in ('alice', 'bob'):
+            assert np.allclose(single.bias(row, player), batch.bias(row, player))
+            assert np.isclose(single.reputation(row, player), batch.reputation(row, player))
+    _index_consistent(single, 'alice')
+    _index_consistent(single, 'bob')
+
+def test_single_row_records_evict_the_least_recently_used():
+    clock = SimulatedClock()
+    store = RelationshipStore(capacity=4, max_relationships=8, clock=clock)
+    for row in range(8):
+        clock.advance(1.0)
+        store.record([row], 'alice', GIFT)
+    _index_consistent(store, 'alice')
+    # Touching row 0 makes row 1 the oldest, so it goes first when the store overflows
+    clock.advance(1.0)
+    store.update_reputation(0, 'alice', GIFT)
+    clock.advance(1.0)
+    store.record([20], 'alice', GIFT)
+    assert len(store) <= 8
+    assert store.slot(0, 'alice') is not None
+    assert store.slot(20, 'alice') is not None
+    assert store.slot(1, 'alice') is None
+    _index_consistent(store, 'alice')
@@ -0,0 +1,68 @@
+import itertools
+import numpy as np
+from emotion_engine import SimulatedClock, VillageEmotionEngine
+from scheduler import TIER_FAR, TIER_NEAR, TickScheduler
+
+def _engine(positions) -> VillageEmotionEngine:
+    engine = VillageEmotionEngine(capacity=8, clock=SimulatedClock(), rng=np.random.default_rng(4))
+    engine.add_villagers([f'villager_{i}' for i in range(len(positions))], positions=np.array(positions, dtype=float))
+    return engine
+
+def _recorder():
+    batches = []
+    return batches, lambda rows, masks: batches.append(sorted(rows.tolist()))
+
+def test_villagers_are_tiered_by_distance_to_players():
+    # Near within 64 blocks, far in a loaded chunk, unloaded beyond the simulation distance
+    engine = _engine([(10.0, 64.0, 10.0), (-40.0, 64.0, 0.0), (120.0, 64.0, 0.0), (0.0, 64.0, -150.0),
+                      (1000.0, 64.0, 0.0), (0.0, 64.0, 900.0)])
+    scheduler = TickScheduler(engine, simulation_distance=10, budget=float('inf'))
+    scheduler.update_player('alice', (0.0, 64.0, 0.0))
+    scheduler.tick()
+    tiers = scheduler.tiers()
+    assert tiers[TIER_NEAR].tolist() == [0, 1]
+    assert tiers[TIER_FAR].tolist() == [2, 3]
+    assert scheduler.metrics()['unloaded_villagers'] == 2
+
+    # A second player pulls a far-away villager into the near tier
+    scheduler.update_player('bob', (990.0, 64.0, 0.0))
+    scheduler.tick()
+    assert scheduler.tiers()[TIER_NEAR].tolist() == [0, 1, 4]
+    scheduler.remove_player('bob')
+    scheduler.tick()
+    assert scheduler.tiers()[TIER_NEAR].tolist() == [0, 1]
+
+def test_work_over_budget_is_deferred_to_the_next_tick():
+    engine = _engine([(float(i), 64.0, 0.0) for i in range(6)])
+    batches, on_actions = _recorder()
+    # Every timer read is a second later, so each tick's budget is spent after one batch
+    timer = itertools.count().__next__
+    scheduler = TickScheduler(engine, budget=0.5, batch_size=2, on_actions=on_actions, timer=timer)
+    scheduler.update_player('alice', (0.0, 64.0, 0.0))
+
+    assert scheduler.tick() == 1
+    assert scheduler.metrics()['deferred_batches'] == 2
+    assert scheduler.metrics()['overruns'] == 1
+    # The near pass still queued is carried over, not restarted
+    assert scheduler.tick() == 1
+    assert scheduler.tick() == 1
+    assert batches == [[0, 1], [2, 3], [4, 5]]
+    assert scheduler.metrics()['deferred_batches'] == 0
+
+def test_far_villagers_run_every_far_interval_ticks():
+    positions = [(0.0, 64.0, 0.0), (5.0, 64.0, 5.0)] + [(100.0 + 4 * i, 64.0, 0.0) for i in range(8)]
+    engine = _engine(positions)
+    batches, on_actions = _recorder()
+    scheduler = TickScheduler(engine, far_interval=4, budget=float('inf'), on_actions=on_actions)
+    scheduler.update_player('alice', (0.0, 64.0, 0.0))
+
+    runs = {row: [] for row in range(len(positions))}
+    for tick in range(8):
+        batches.clear()
+        scheduler.tick()
+        for row in itertools.chain.from_iterable(batches):
+            runs[row].append(tick)
+    assert runs[0] == runs[1] == list(range(8))
+    for row in range(2, len(positions)):
+        # Spread across the interval: each far villager runs once per cycle, on its own phase
+        assert runs[row] == [row % 4, row % 4 + 4]
@@ -0,0 +1,27 @@
+import pytest
+from emotion_engine import EMOTIONS, BehaviorModel, SimulatedClock
+from sharding import ShardError, ShardedSimulation
+
+def _model(behaviors: int) -> BehaviorModel:
+    model = BehaviorModel()
+    for i in range(behaviors):
+        model.register(f'behavior_{i}', {EMOTIONS[i % len(EMOTIONS)]: 0.5}, bias=1.0)
+    return model
+
+def test_action_columns_follow_the_behavior_model():
+    model = _model(11)
+    with ShardedSimulation(num_shards=2, capacity=64, clock=SimulatedClock(), behavior_model=model) as simulation:
+        simulation.add_villagers([f'villager_{i}' for i in range(10)],
+                                 positions=[(i * 600.0, 64.0, 0.0) for i in range(10)])
+        simulation.tick()
+        assert simulation.action_bits(['villager_0']).shape == (1, 2)
+        # A bias of 1 makes every behavior fire, including those past the first byte
+        assert simulation.actions('villager_7') == model.names
+
+def test_registering_behaviors_after_start_is_rejected():
+    model = _model(3)
+    with ShardedSimulation(num_shards=1, capacity=8, clock=SimulatedClock(), behavior_model=model) as simulation:
+        simulation.tick()
+        model.register('late', {'joy': 1.0})
+        with pytest.raises(ShardError):
+            simulation.tick()
@@ -0,0 +1,40 @@
+import os
+import numpy as np
+from emotion_engine import GameEvent, SimulatedClock, VillageEmotionEngine
+from snapshot import PART_NAME, load_snapshot, save_snapshot
+
+def _engine(clock: SimulatedClock) -> VillageEmotionEngine:
+    rng = np.random.default_rng(9)
+    engine = VillageEmotionEngine(capacity=64, clock=clock, rng=rng)
+    positions = np.column_stack([rng.uniform(0, 200, 50), np.full(50, 64.0), rng.uniform(0, 200, 50)])
+    engine.add_villagers([f'villager_{i}' for i in range(50)], positions=positions)
+    for i, event_type in enumerate(('player_gift', 'player_attack', 'monster_nearby')):
+        clock.advance(1.0)
+        engine.apply_event(GameEvent(event_type, f'player_{i % 2}', 0.7), np.arange(i, 50, 3))
+    return engine
+
+def _assert_same(loaded: VillageEmotionEngine, engine: VillageEmotionEngine):
+    assert loaded.villager_ids == engine.villager_ids
+    for name in ('_emotions', '_traits', '_last_update', '_positions'):
+        assert np.array_equal(getattr(loaded, name)[:len(engine)], getattr(engine, name)[:len(engine)], equal_nan=True)
+    for row in range(len(engine)):
+        assert loaded.relationships.reputations(row) == engine.relationships.reputations(row)
+        assert list(loaded.memory(row).event_memories) == list(engine.memory(row).event_memories)
+
+def test_full_snapshot_round_trip(tmp_path):
+    clock = SimulatedClock()
+    engine = _engine(clock)
+    save_snapshot(engine, str(tmp_path))
+    _assert_same(load_snapshot(str(tmp_path), clock=clock), engine)
+
+def test_incremental_snapshot_round_trip(tmp_path):
+    clock = SimulatedClock()
+    engine = _engine(clock)
+    save_snapshot(engine, str(tmp_path))
+    clock.advance(1.0)
+    engine.apply_event(GameEvent('player_trade', 'player_2', 0.4), [4, 5, 6])
+    engine.move_villagers([7], [(500.0, 64.0, 500.0)])
+    engine.add_villagers(['newcomer'], positions=[(10.0, 64.0, 10.0)])
+    part = save_snapshot(engine, str(tmp_path), incremental=True)
+    assert os.path.basename(part) == PART_NAME.format(1)
+    _assert_same(load_snapshot(str(tmp_path), clock=clock, mmap=False), engine)